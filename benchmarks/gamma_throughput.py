@@ -0,0 +1,86 @@
+"""
+Gamma 计算吞吐量基准测试
+
+比较逐结构循环（按化学符号列表推导索引原子，每个结构单独做小矩阵乘法）
+与批量实现 compute_gamma_from_projection（每种元素一次 GEMM）的吞吐量，
+单位为 atoms/s。B_projection 与活跃集逆矩阵均为随机合成数据，不需要 PyNEP。
+
+用法:
+    python benchmarks/gamma_throughput.py --frames 2000 --atoms 128 --dim 30
+"""
+
+import argparse
+import time
+
+import numpy as np
+from ase import Atoms
+
+from nep_auto.maxvol import compute_gamma_from_projection
+
+
+def _loop_gamma(trajectory, B_list, active_set_inv):
+    """逐结构循环实现（优化前的 compute_gamma 内层逻辑）"""
+    result = []
+    for atoms, B_proj in zip(trajectory, B_list):
+        gamma = np.zeros(len(atoms))
+        symbols = atoms.get_chemical_symbols()
+        for elem, inv_matrix in active_set_inv.items():
+            atom_indices = [i for i, sym in enumerate(symbols) if sym == elem]
+            if len(atom_indices) == 0:
+                continue
+            g = B_proj[atom_indices] @ inv_matrix
+            gamma[atom_indices] = np.max(np.abs(g), axis=1)
+        result.append(gamma)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gamma 计算吞吐量基准测试")
+    parser.add_argument("--frames", type=int, default=2000, help="结构数")
+    parser.add_argument("--atoms", type=int, default=128, help="每个结构的原子数")
+    parser.add_argument("--dim", type=int, default=30, help="B_projection 维度")
+    parser.add_argument(
+        "--elements", type=str, default="Si,O,Ge,Li", help="元素列表（逗号分隔）"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快）")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    elements = args.elements.split(",")
+    trajectory = [
+        Atoms(symbols=list(rng.choice(elements, size=args.atoms)))
+        for _ in range(args.frames)
+    ]
+    B_list = [rng.standard_normal((args.atoms, args.dim)) for _ in trajectory]
+    active_set_inv = {
+        elem: rng.standard_normal((args.dim, args.dim)) for elem in elements
+    }
+    numbers_list = [atoms.numbers for atoms in trajectory]
+    n_total = args.frames * args.atoms
+
+    def _best(fn):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = fn()
+            times.append(time.perf_counter() - start)
+        return min(times), out
+
+    t_loop, g_loop = _best(lambda: _loop_gamma(trajectory, B_list, active_set_inv))
+    t_batch, g_batch = _best(
+        lambda: compute_gamma_from_projection(B_list, numbers_list, active_set_inv)
+    )
+
+    assert all(np.allclose(a, b) for a, b in zip(g_loop, g_batch))
+
+    print(
+        f"frames={args.frames} atoms/frame={args.atoms} dim={args.dim} "
+        f"elements={len(elements)}"
+    )
+    print(f"  loop : {t_loop:8.4f} s  {n_total / t_loop:14.0f} atoms/s")
+    print(f"  batch: {t_batch:8.4f} s  {n_total / t_batch:14.0f} atoms/s")
+    print(f"  speedup: {t_loop / t_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
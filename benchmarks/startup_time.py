@@ -0,0 +1,115 @@
+"""
+命令行工具启动时间基准测试
+
+对 pyproject.toml 中 [project.scripts] 的每个命令，在新的解释器进程中导入其入口
+模块并计时（重复多次取中位数），即执行 `nep-auto-config --help` 等命令时在进入
+main() 之前花费的时间。可选地用 -X importtime 列出导入耗时最多的模块。
+计时前先确认 `import nep_auto.config` 不会加载 numpy（config.py 只依赖 constants.py）。
+
+用法:
+    python benchmarks/startup_time.py --repeat 5 --top 10
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_TIMER = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+_LIGHT_IMPORT_CHECK = (
+    "import sys, nep_auto.config; "
+    "print(sorted(m for m in {modules} if m in sys.modules))"
+)
+
+LIGHT_MODULES = ("numpy",)
+"""import nep_auto.config 之后不应出现在 sys.modules 中的模块"""
+
+
+def check_light_config() -> None:
+    """
+    在新进程中导入 nep_auto.config，确认没有加载 LIGHT_MODULES 中的模块
+
+    异常:
+        AssertionError: 导入 nep_auto.config 时加载了其中的模块
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _LIGHT_IMPORT_CHECK.format(modules=LIGHT_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = result.stdout.strip().splitlines()[-1]
+    assert loaded == "[]", f"import nep_auto.config 加载了 {loaded}"
+
+
+def import_time(module: str) -> float:
+    """在新进程中导入 module，返回导入耗时（秒）"""
+    result = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[int, str]]:
+    """
+    用 -X importtime 导入 module，返回累计耗时最多的 top 个第三方或标准库模块
+    （微秒, 模块名），不含 nep_auto 自身的模块
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)", line)
+        if match and match.group(2).split(".")[0] != "nep_auto":
+            rows.append((int(match.group(1)), match.group(2)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令行工具启动时间基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个命令的重复次数")
+    parser.add_argument(
+        "--top", type=int, default=0, help="列出导入耗时最多的模块数（0 表示不列出）"
+    )
+    args = parser.parse_args()
+
+    with open(ROOT / "pyproject.toml", "rb") as f:
+        scripts = tomllib.load(f)["project"]["scripts"]
+
+    check_light_config()
+    print(f"python {sys.version.split()[0]}  repeat={args.repeat}")
+    for name, target in scripts.items():
+        module = target.split(":")[0]
+        times = [import_time(module) for _ in range(args.repeat)]
+        print(
+            f"  {name:22s} {module:24s} "
+            f"median {statistics.median(times) * 1000:7.1f} ms  "
+            f"min {min(times) * 1000:7.1f} ms"
+        )
+        for cumulative, imported in slowest_imports(module, args.top):
+            print(f"      {cumulative / 1000:7.1f} ms  {imported}")
+
+
+if __name__ == "__main__":
+    main()
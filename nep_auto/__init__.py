@@ -4,76 +4,133 @@ NEP Auto - NEP 主动学习自动化框架
 基于 MaxVol 算法的 NEP 势函数主动学习框架
 """
 
-__version__ = "0.1.0"
-
-# 导出主要接口
-from .config import (
-    Config,
-    GlobalConfig,
-    VaspConfig,
-    NepConfig,
-    GpumdConfig,
-    GpumdCondition,
-    SelectionConfig,
-    load_config,
-    print_config_summary,
-)
+import importlib
 
-from .maxvol import (
-    ActiveSetResult,
-    DescriptorProjectionResult,
-    compute_maxvol,
-    compute_descriptor_projection,
-    compute_gamma,
-    generate_active_set,
-    write_asi_file,
-    read_asi_file,
-    select_active_set,
-    select_extension_structures,
-    filter_high_gamma_structures,
-    read_trajectory,
-    write_trajectory,
-)
+__version__ = "0.1.0"
 
-from .initialize import initialize_workspace, setup_logger
+# 导出主要接口：按所在子模块分组，第一次访问时才导入对应子模块（PEP 562），
+# 只用到配置等轻量接口的命令（如 nep-auto-config）不必加载 SciPy / ASE / PyNEP
+_EXPORTS = {
+    # 配置
+    ".config": (
+        "Config",
+        "GlobalConfig",
+        "VaspConfig",
+        "NepConfig",
+        "GpumdConfig",
+        "GpumdCondition",
+        "SelectionConfig",
+        "load_config",
+        "print_config_summary",
+    ),
+    # 配置选项取值
+    ".constants": (
+        "MAXVOL_METHODS",
+        "CLUSTER_MODES",
+        "STAGE_MODES",
+        "OUTCAR_PARSERS",
+    ),
+    # MaxVol 算法
+    ".maxvol": (
+        "ActiveSetResult",
+        "ActiveSetState",
+        "DescriptorProjectionResult",
+        "compute_maxvol",
+        "rect_maxvol",
+        "compute_descriptor_projection",
+        "compute_gamma",
+        "compute_gamma_from_projection",
+        "generate_active_set",
+        "write_asi_file",
+        "read_asi_file",
+        "asi_binary_path",
+        "write_asi_binary",
+        "read_asi_binary",
+        "convert_asi_text_to_binary",
+        "convert_asi_binary_to_text",
+        "active_set_state_path",
+        "write_active_set_state",
+        "read_active_set_state",
+        "select_active_set",
+        "update_active_set_incremental",
+        "select_extension_structures",
+        "select_extension_from_active_set",
+        "filter_high_gamma_structures",
+        "farthest_point_sample",
+        "apply_fps_filter",
+        "select_within_budget",
+        "read_trajectory",
+        "write_trajectory",
+        "iter_trajectory",
+        "append_trajectory",
+        "stream_trajectory",
+    ),
+    # 描述符缓存
+    ".descriptor_cache": ("DescriptorCache",),
+    # 团簇提取
+    ".cluster": (
+        "extract_clusters",
+        "read_nep_cutoff",
+    ),
+    # 作业目录暂存
+    ".staging": (
+        "Stager",
+        "stage_file",
+    ),
+    # 训练集存储
+    ".train_store": ("TrainStore",),
+    # VASP 结果收集
+    ".harvest": (
+        "HarvestRecord",
+        "harvest_vasp_results",
+        "read_outcar_final",
+    ),
+    # 初始化
+    ".initialize": (
+        "initialize_workspace",
+        "setup_logger",
+    ),
+    # 迭代管理
+    ".iteration": (
+        "ExplorationMonitor",
+        "IterationManager",
+        "TaskManager",
+    ),
+    # 异步编排
+    ".orchestrator": (
+        "AsyncIterationManager",
+        "AsyncTaskManager",
+        "run_campaigns",
+    ),
+    # 基准测试
+    ".bench": (
+        "BENCH_STAGES",
+        "MockNEP",
+        "run_case",
+    ),
+}
 
-from .iteration import IterationManager, TaskManager
+_EXPORT_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
 
+# 主程序入口本身很轻；直接导入，使 nep_auto.main 始终指向该函数而不是同名子模块
 from .main import main
 
 __all__ = [
-    # 版本信息
     "__version__",
-    # 配置
-    "Config",
-    "GlobalConfig",
-    "VaspConfig",
-    "NepConfig",
-    "GpumdConfig",
-    "GpumdCondition",
-    "SelectionConfig",
-    "load_config",
-    "print_config_summary",
-    # MaxVol 算法
-    "ActiveSetResult",
-    "DescriptorProjectionResult",
-    "compute_maxvol",
-    "compute_descriptor_projection",
-    "compute_gamma",
-    "generate_active_set",
-    "write_asi_file",
-    "read_asi_file",
-    "select_active_set",
-    "select_extension_structures",
-    "filter_high_gamma_structures",
-    "read_trajectory",
-    "write_trajectory",
-    # 初始化
-    "initialize_workspace",
-    "setup_logger",
-    # 迭代管理
-    "IterationManager",
-    "TaskManager",
-    # 主程序
+    *_EXPORT_MODULES,
     "main",
 ]
+
+
+def __getattr__(name: str):
+    """按需导入导出的接口，并缓存到模块命名空间"""
+    module = _EXPORT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
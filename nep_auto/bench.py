@@ -0,0 +1,548 @@
+"""
+选择热点路径基准测试模块
+
+用合成的描述符矩阵和模拟 NEP 计算器测量结构筛选各阶段的耗时，
+不需要 GPUMD、PyNEP 或真实势函数：
+- maxvol_core: 单个元素矩阵上的 _maxvol_core（LU 初始化 + 逐次交换）
+- maxvol_<method>: compute_maxvol 的各实现（见 MAXVOL_METHODS）
+- gamma: compute_gamma（模拟计算器给出 B_projection + 读取 ASI + 批量 Gamma）
+- fps: apply_fps_filter（使用预先给出的结构平均描述符）
+- asi_text_write / asi_text_read / asi_binary_write / asi_binary_read: ASI 文件读写
+
+每个用例 (N, D, n_elements) 中 N 为原子环境总数，平均分给 n_elements 种元素，
+D 为 B_projection 维度。每个阶段重复多次取最快一次，报告吞吐量和主进程的峰值常驻内存，
+结果可写成 JSON 并与之前的结果对比，用于发现性能回退。
+
+用法:
+    nep-auto-bench --n 20000 100000 --d 30 50 --n-elements 1 4 --output bench.json
+    nep-auto-bench --compare bench.json
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .constants import MAXVOL_METHODS
+from .maxvol import (
+    _maxvol_core,
+    apply_fps_filter,
+    compute_gamma,
+    compute_maxvol,
+    read_asi_binary,
+    read_asi_file,
+    write_asi_binary,
+    write_asi_file,
+)
+from .parallel import set_calculator_factory
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+BENCH_STAGES = (
+    "maxvol_core",
+    *(f"maxvol_{method}" for method in MAXVOL_METHODS),
+    "gamma",
+    "fps",
+    "asi_text_write",
+    "asi_text_read",
+    "asi_binary_write",
+    "asi_binary_read",
+)
+"""可测量的阶段"""
+
+BENCH_ELEMENTS = ("Si", "O", "Ge", "Li", "Na", "Cl", "Al", "Mg")
+"""合成结构使用的元素（按 n_elements 取前几种）"""
+
+# 合成结构中每帧的原子数（gamma 阶段）
+_ATOMS_PER_FRAME = 64
+
+# 模拟计算器结构平均描述符的维度（fps 阶段）
+_DESCRIPTOR_DIM = 30
+
+
+class MockNEP:
+    """
+    模拟 NEP 计算器（接口与 pynep.calculate.NEP 相同）。
+
+    B_projection 和 descriptor 是原子坐标经固定随机投影后的余弦特征，
+    按元素加不同的相位，结果只依赖结构本身，可重复。
+    """
+
+    def __init__(
+        self,
+        nep_file: str = "",
+        dim: int = 30,
+        descriptor_dim: int = _DESCRIPTOR_DIM,
+    ):
+        """
+        参数:
+            nep_file: 势函数文件路径（不读取，仅为与 NEP 接口一致）
+            dim: B_projection 维度
+            descriptor_dim: descriptor 维度
+        """
+        rng = np.random.default_rng(12345)
+        self.weights = {
+            "B_projection": rng.standard_normal((3, dim)),
+            "descriptor": rng.standard_normal((3, descriptor_dim)),
+        }
+        self.results: dict[str, NDArray[np.float64]] = {}
+
+    def calculate(self, atoms: Atoms, properties: list[str]) -> None:
+        """计算给定属性，结果存入 self.results"""
+        phase = 0.37 * atoms.numbers[:, None]
+        for prop in properties:
+            self.results[prop] = np.cos(atoms.positions @ self.weights[prop] + phase)
+
+
+@dataclass
+class MockNEPFactory:
+    """创建 MockNEP 的工厂（可被 pickle，供 set_calculator_factory 使用）"""
+
+    dim: int
+
+    def __call__(self, nep_file: str) -> MockNEP:
+        return MockNEP(nep_file, dim=self.dim)
+
+
+@dataclass
+class StageResult:
+    """单个阶段的测量结果"""
+
+    case: str
+    stage: str
+    seconds: float
+    items: int
+    unit: str
+    peak_rss_mb: float
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理的 unit 数"""
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+
+def synthetic_descriptors(
+    n_envs: int,
+    dim: int,
+    n_elements: int,
+    seed: int = 0,
+) -> dict[str, NDArray[np.float64]]:
+    """
+    生成按元素分类的合成描述符矩阵。
+
+    行范数跨越几个数量级（与真实描述符相近），n_envs 行平均分给各元素。
+
+    参数:
+        n_envs: 原子环境总数
+        dim: 描述符维度
+        n_elements: 元素种类数（不超过 len(BENCH_ELEMENTS)）
+        seed: 随机种子
+
+    返回:
+        {元素: (n_envs / n_elements, dim) 矩阵}
+
+    异常:
+        ValueError: 每种元素的环境数不大于 dim 或元素种类过多时抛出
+    """
+    if not 1 <= n_elements <= len(BENCH_ELEMENTS):
+        raise ValueError(f"n_elements 应在 1 到 {len(BENCH_ELEMENTS)} 之间")
+    per_element = n_envs // n_elements
+    if per_element <= dim:
+        raise ValueError(f"每种元素的环境数 ({per_element}) 必须大于描述符维度 ({dim})")
+    rng = np.random.default_rng(seed)
+    return {
+        elem: rng.standard_normal((per_element, dim))
+        * np.exp(rng.standard_normal((per_element, 1)))
+        for elem in BENCH_ELEMENTS[:n_elements]
+    }
+
+
+def synthetic_structures(
+    n_atoms: int,
+    n_elements: int,
+    seed: int = 0,
+) -> list[Atoms]:
+    """
+    生成随机坐标的合成结构，每帧 _ATOMS_PER_FRAME 个原子。
+
+    参数:
+        n_atoms: 原子总数（向上取整到整帧）
+        n_elements: 元素种类数
+        seed: 随机种子
+
+    返回:
+        Atoms 对象列表
+    """
+    from ase import Atoms
+
+    rng = np.random.default_rng(seed)
+    elements = BENCH_ELEMENTS[:n_elements]
+    n_frames = -(-n_atoms // _ATOMS_PER_FRAME)
+    cell = np.eye(3) * 10.0
+    return [
+        Atoms(
+            symbols=list(rng.choice(elements, size=_ATOMS_PER_FRAME)),
+            positions=rng.uniform(0.0, 10.0, size=(_ATOMS_PER_FRAME, 3)),
+            cell=cell,
+            pbc=True,
+        )
+        for _ in range(n_frames)
+    ]
+
+
+def peak_rss_mb() -> float:
+    """返回进程的峰值常驻内存 (MB)，优先读取 /proc 中的 VmHWM"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _reset_peak_rss() -> None:
+    """重置峰值常驻内存（Linux 4.0+），不支持时峰值为进程启动以来的最大值"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _time_stage(
+    func: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> tuple[float, float]:
+    """重复执行 func，返回 (最快一次的耗时, 峰值常驻内存 MB)"""
+    best = float("inf")
+    _reset_peak_rss()
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        # The library reports progress with print(); keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best, peak_rss_mb()
+
+
+def run_case(
+    n_envs: int,
+    dim: int,
+    n_elements: int,
+    stages: tuple[str, ...] = BENCH_STAGES,
+    repeat: int = 3,
+    gamma_tol: float = 1.001,
+    batch_size: int | None = None,
+    n_workers: int = 1,
+) -> list[StageResult]:
+    """
+    测量一个 (N, D, n_elements) 用例的各阶段。
+
+    参数:
+        n_envs: 原子环境总数 N
+        dim: 描述符维度 D
+        n_elements: 元素种类数
+        stages: 要测量的阶段（见 BENCH_STAGES）
+        repeat: 每个阶段的重复次数（取最快）
+        gamma_tol: MaxVol 收敛阈值
+        batch_size: compute_maxvol 的批处理大小，None 表示一次性处理
+        n_workers: gamma 阶段计算描述符的工作进程数
+
+    返回:
+        各阶段的测量结果
+
+    异常:
+        ValueError: stages 中有未知阶段时抛出
+    """
+    unknown = set(stages) - set(BENCH_STAGES)
+    if unknown:
+        raise ValueError(
+            f"未知的阶段: {', '.join(sorted(unknown))}"
+            f"（可选: {', '.join(BENCH_STAGES)}）"
+        )
+
+    case = f"N={n_envs},D={dim},elements={n_elements}"
+    descriptors = synthetic_descriptors(n_envs, dim, n_elements)
+    first = next(iter(descriptors.values()))
+    A = np.vstack(list(descriptors.values()))
+    struct_index = np.arange(len(A), dtype=np.int64) // _ATOMS_PER_FRAME
+    rng = np.random.default_rng(1)
+    active_set_inv = {
+        elem: np.linalg.inv(matrix[rng.choice(len(matrix), dim, replace=False)])
+        for elem, matrix in descriptors.items()
+    }
+    n_values = sum(matrix.size for matrix in active_set_inv.values())
+    results: list[StageResult] = []
+
+    def record(
+        stage: str,
+        items: int,
+        unit: str,
+        func: Callable[[], object],
+        setup: Callable[[], object] | None = None,
+    ) -> None:
+        if stage not in stages:
+            return
+        seconds, rss = _time_stage(func, repeat, setup)
+        results.append(StageResult(case, stage, seconds, items, unit, rss))
+
+    record(
+        "maxvol_core",
+        len(first),
+        "envs",
+        lambda: _maxvol_core(first, gamma_tol=gamma_tol, max_iter=100 * dim),
+    )
+    for method in MAXVOL_METHODS:
+        record(
+            f"maxvol_{method}",
+            len(A),
+            "envs",
+            lambda method=method: [
+                compute_maxvol(
+                    matrix,
+                    struct_index[: len(matrix)],
+                    gamma_tol=gamma_tol,
+                    max_iter=100 * dim,
+                    batch_size=batch_size,
+                    method=method,
+                )
+                for matrix in descriptors.values()
+            ],
+        )
+
+    with tempfile.TemporaryDirectory(prefix="nep_auto_bench_") as tmp:
+        tmp = Path(tmp)
+        asi_file = tmp / "active_set.asi"
+        binary_file = tmp / "active_set.asi.bin"
+        write_asi_file(active_set_inv, asi_file, binary_sidecar=True)
+
+        if "gamma" in stages:
+            trajectory = synthetic_structures(n_envs, n_elements)
+            n_atoms = len(trajectory) * _ATOMS_PER_FRAME
+            previous = set_calculator_factory(MockNEPFactory(dim))
+            try:
+                record(
+                    "gamma",
+                    n_atoms,
+                    "atoms",
+                    lambda: compute_gamma(
+                        trajectory,
+                        tmp / "nep.txt",
+                        asi_file,
+                        show_progress=False,
+                        n_workers=n_workers,
+                    ),
+                )
+            finally:
+                set_calculator_factory(previous)
+            del trajectory
+
+        # Structure-averaged descriptors; FPS keeps a tenth of the structures
+        n_structures = max(2, n_envs // _ATOMS_PER_FRAME)
+        mean_descriptors = np.random.default_rng(2).standard_normal(
+            (n_structures, _DESCRIPTOR_DIM)
+        )
+        structures = [None] * n_structures
+        record(
+            "fps",
+            n_structures,
+            "structures",
+            lambda: apply_fps_filter(
+                structures,
+                tmp / "nep.txt",
+                max(1, n_structures // 10),
+                show_progress=False,
+                descriptors=mean_descriptors,
+            ),
+        )
+
+        record(
+            "asi_text_write",
+            n_values,
+            "values",
+            lambda: write_asi_file(active_set_inv, asi_file, binary_sidecar=False),
+        )
+        # Without a sidecar read_asi_file parses the text
+        record(
+            "asi_text_read",
+            n_values,
+            "values",
+            lambda: read_asi_file(asi_file),
+            setup=lambda: binary_file.unlink(missing_ok=True),
+        )
+        record(
+            "asi_binary_write",
+            n_values,
+            "values",
+            lambda: write_asi_binary(active_set_inv, binary_file),
+        )
+        record(
+            "asi_binary_read",
+            n_values,
+            "values",
+            # Copy out of the memory map so the data is actually read
+            lambda: [
+                np.array(matrix) for matrix in read_asi_binary(binary_file).values()
+            ],
+        )
+
+    return results
+
+
+def compare_results(
+    results: list[StageResult],
+    baseline: list[dict],
+    threshold: float = 1.2,
+) -> list[tuple[StageResult, float]]:
+    """
+    与之前保存的结果对比。
+
+    参数:
+        results: 本次测量结果
+        baseline: 之前 JSON 中的 "results" 列表
+        threshold: 耗时比（本次 / 基线）超过该值视为回退
+
+    返回:
+        回退的 (结果, 耗时比) 列表
+    """
+    reference = {(r["case"], r["stage"]): r["seconds"] for r in baseline}
+    regressions = []
+    for result in results:
+        seconds = reference.get((result.case, result.stage))
+        if seconds:
+            ratio = result.seconds / seconds
+            if ratio > threshold:
+                regressions.append((result, ratio))
+    return regressions
+
+
+def _environment() -> dict:
+    """记录影响结果的运行环境"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main() -> None:
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="NEP Auto 结构筛选热点路径基准测试（合成数据，不需要 PyNEP）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""示例:
+  # 默认用例
+  nep-auto-bench
+
+  # 多组 (N, D, n_elements)，保存结果
+  nep-auto-bench --n 20000 100000 --d 30 50 --n-elements 1 4 --output bench.json
+
+  # 与之前的结果对比，耗时增加超过 20% 时返回非零退出码
+  nep-auto-bench --n 20000 100000 --d 30 50 --n-elements 1 4 --compare bench.json
+        """,
+    )
+    parser.add_argument(
+        "--n", type=int, nargs="+", default=[20000], help="原子环境总数 N"
+    )
+    parser.add_argument("--d", type=int, nargs="+", default=[30], help="描述符维度 D")
+    parser.add_argument(
+        "--n-elements", type=int, nargs="+", default=[2], help="元素种类数"
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=BENCH_STAGES,
+        default=list(BENCH_STAGES),
+        help="要测量的阶段（默认全部）",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快）")
+    parser.add_argument("--gamma-tol", type=float, default=1.001, help="收敛阈值")
+    parser.add_argument(
+        "--batch-size", type=int, default=None, help="MaxVol 批处理大小"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="gamma 阶段的工作进程数")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    parser.add_argument(
+        "--compare", type=str, default=None, help="用于对比的之前的结果 JSON 文件"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="判定为回退的耗时比"
+    )
+    args = parser.parse_args()
+
+    results: list[StageResult] = []
+    for n_envs, dim, n_elements in itertools.product(args.n, args.d, args.n_elements):
+        try:
+            case_results = run_case(
+                n_envs,
+                dim,
+                n_elements,
+                stages=tuple(args.stages),
+                repeat=args.repeat,
+                gamma_tol=args.gamma_tol,
+                batch_size=args.batch_size,
+                n_workers=args.workers,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        print(case_results[0].case if case_results else "")
+        for r in case_results:
+            print(
+                f"  {r.stage:18s} {r.seconds:9.4f} s  "
+                f"{r.throughput:14.0f} {r.unit}/s  peak RSS {r.peak_rss_mb:8.1f} MB"
+            )
+        results.extend(case_results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "environment": _environment(),
+                    "results": [
+                        {**asdict(r), "throughput": r.throughput} for r in results
+                    ],
+                },
+                f,
+                indent=2,
+            )
+        print(f"\n结果已保存: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} 个阶段耗时超过基线的 {args.threshold} 倍:")
+            for r, ratio in regressions:
+                print(f"  {r.case} {r.stage}: {ratio:.2f}x")
+            sys.exit(1)
+        print(f"\n✓ 与基线相比没有超过 {args.threshold} 倍的回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+原子环境团簇提取模块
+
+GPUMD 导出的高 Gamma 帧往往只有少数原子处于外推区域。本模块围绕这些原子
+切出小尺寸的子结构送去 DFT 标注，代替整帧计算：
+- 按 nep.txt 的径向截断半径（加缓冲层）确定切割半径
+- 每帧按 gamma 从大到小贪心选择中心原子，已被覆盖的高 Gamma 原子不再重复切割
+- cluster 模式: 非周期团簇，四周加真空层
+- box 模式: 以中心原子为中心的周期性立方盒
+- 中心元素、近邻组成和近邻距离都接近的切割视为重复，只保留一个
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .constants import CLUSTER_MODES
+from .parallel import compute_per_atom_properties
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+
+def read_nep_cutoff(nep_file: str | Path) -> float:
+    """
+    从 nep.txt 读取径向截断半径。
+
+    参数:
+        nep_file: NEP 势函数文件路径
+
+    返回:
+        径向截断半径（Å）
+
+    异常:
+        ValueError: 文件中没有 cutoff 行时抛出
+    """
+    with open(nep_file) as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] == "cutoff":
+                return float(parts[1])
+    raise ValueError(f"nep.txt 中没有 cutoff 行: {nep_file}")
+
+
+def extract_clusters(
+    structures: list[Atoms],
+    nep_file: str | Path,
+    active_set_inv: dict[str, NDArray[np.float64]],
+    gamma_threshold: float,
+    mode: str = "cluster",
+    buffer: float = 2.0,
+    vacuum: float = 6.0,
+    max_per_structure: int = 4,
+    dedup_tol: float = 0.1,
+    n_workers: int = 1,
+) -> list[Atoms]:
+    """
+    围绕高 Gamma 原子从结构中切出子结构。
+
+    切割半径 R = cutoff + buffer。每帧按 gamma 从大到小选择中心原子，
+    与已选中心距离不超过 buffer 的高 Gamma 原子（其截断球已包含在切割范围内）
+    视为已覆盖。切割后原子数不小于原结构的帧保持原样。
+
+    参数:
+        structures: 待标注的结构列表
+        nep_file: NEP 势函数文件路径（用于截断半径和 gamma 计算）
+        active_set_inv: 当前活跃集逆矩阵
+        gamma_threshold: 高 Gamma 原子的阈值
+        mode: 切割方式（见 CLUSTER_MODES）
+        buffer: 截断半径之外的缓冲层厚度（Å）
+        vacuum: cluster 模式下四周的真空层厚度（Å）
+        max_per_structure: 每帧最多切割的子结构数
+        dedup_tol: 判定重复切割的近邻距离容差（Å）
+        n_workers: 并行计算 B_projection 的工作进程数
+
+    返回:
+        切割得到的子结构（以及保持原样的结构）列表
+
+    异常:
+        ValueError: mode 不在 CLUSTER_MODES 中时抛出
+    """
+    from ase.neighborlist import neighbor_list
+
+    from .maxvol import compute_gamma_from_projection
+
+    if mode not in CLUSTER_MODES:
+        raise ValueError(f"未知的切割方式: {mode}（可选: {', '.join(CLUSTER_MODES)}）")
+
+    cutoff = read_nep_cutoff(nep_file)
+    radius = cutoff + buffer
+    # The box mode keeps a cube of half-width R, whose corners lie at sqrt(3) R
+    search_radius = radius * np.sqrt(3) if mode == "box" else radius
+
+    B_list = compute_per_atom_properties(
+        structures, nep_file, show_progress=False, n_workers=n_workers
+    )["B_projection"]
+    gamma_list = compute_gamma_from_projection(
+        B_list, [atoms.numbers for atoms in structures], active_set_inv
+    )
+
+    result: list[Atoms] = []
+    fingerprints: list[tuple[tuple, NDArray[np.float64]]] = []
+    n_cut = n_whole = n_duplicate = 0
+    for index, (atoms, gamma) in enumerate(zip(structures, gamma_list)):
+        i, j, D = neighbor_list("ijD", atoms, search_radius)
+        cuts = []
+        covered = np.zeros(len(atoms), dtype=bool)
+        for center in np.argsort(-gamma, kind="stable"):
+            if gamma[center] <= gamma_threshold or len(cuts) >= max_per_structure:
+                break
+            if covered[center]:
+                continue
+            mask = i == center
+            neighbors, vectors = j[mask], D[mask]
+            distances = np.linalg.norm(vectors, axis=1)
+            covered[center] = True
+            covered[neighbors[distances <= buffer]] = True
+
+            if mode == "box":
+                keep = np.abs(vectors).max(axis=1) < radius
+                neighbors, vectors = neighbors[keep], vectors[keep]
+                distances = distances[keep]
+            cuts.append((center, neighbors, vectors, distances))
+
+        if not cuts or any(len(c[1]) + 1 >= len(atoms) for c in cuts):
+            # No high-gamma atom, or a cut would not be smaller than the frame
+            result.append(atoms)
+            n_whole += 1
+            continue
+
+        for center, neighbors, vectors, distances in cuts:
+            key, fingerprint = _cut_fingerprint(
+                atoms.numbers, center, neighbors, distances, cutoff
+            )
+            if any(
+                key == other_key and np.abs(fingerprint - other).max() < dedup_tol
+                for other_key, other in fingerprints
+            ):
+                n_duplicate += 1
+                continue
+            fingerprints.append((key, fingerprint))
+
+            cut = _build_cut(atoms, center, neighbors, vectors, mode, radius, vacuum)
+            cut.info["cluster_source"] = index
+            cut.info["cluster_center_gamma"] = float(gamma[center])
+            result.append(cut)
+            n_cut += 1
+
+    print(
+        f"团簇提取: {len(structures)} 个结构 → {n_cut} 个子结构 + {n_whole} 个完整结构"
+        f"（跳过 {n_duplicate} 个重复切割，切割半径 {radius:.2f} Å）"
+    )
+    return result
+
+
+def _cut_fingerprint(
+    numbers: NDArray[np.int64],
+    center: int,
+    neighbors: NDArray[np.int64],
+    distances: NDArray[np.float64],
+    cutoff: float,
+) -> tuple[tuple, NDArray[np.float64]]:
+    """
+    切割的指纹：(中心元素, 截断半径内近邻的元素组成) 及排序后的近邻距离。
+    """
+    inside = distances <= cutoff
+    neighbor_numbers = numbers[neighbors[inside]]
+    order = np.lexsort((distances[inside], neighbor_numbers))
+    key = (int(numbers[center]), tuple(np.sort(neighbor_numbers).tolist()))
+    return key, distances[inside][order]
+
+
+def _build_cut(
+    atoms: Atoms,
+    center: int,
+    neighbors: NDArray[np.int64],
+    vectors: NDArray[np.float64],
+    mode: str,
+    radius: float,
+    vacuum: float,
+) -> Atoms:
+    """
+    由中心原子和近邻位移向量构建子结构。
+
+    原子按源结构中元素首次出现的顺序稳定排序，每种元素在 POSCAR 中只占一段，
+    与所有 VASP 任务共用的 POTCAR 顺序一致。
+    """
+    from ase import Atoms
+
+    numbers = np.concatenate([[atoms.numbers[center]], atoms.numbers[neighbors]])
+    positions = np.vstack([np.zeros(3), vectors])
+
+    if mode == "box":
+        cut = Atoms(
+            numbers=numbers,
+            positions=positions + radius,
+            cell=np.eye(3) * 2 * radius,
+            pbc=True,
+        )
+        if len(vectors) == 0:
+            return _sort_species(cut, atoms)
+
+        # Atoms near opposite faces become neighbours across the periodic
+        # boundary; drop the one farther from the centre when they come closer
+        # than the centre's nearest-neighbour distance allows
+        from ase.neighborlist import neighbor_list
+
+        r = np.linalg.norm(positions, axis=1)
+        min_distance = 0.8 * r[1:].min()
+        drop: set[int] = set()
+        for a, b, shift in zip(*neighbor_list("ijS", cut, min_distance)):
+            if a < b and shift.any() and a not in drop and b not in drop:
+                drop.add(int(a) if r[a] > r[b] else int(b))
+        del cut[sorted(drop)]
+        return _sort_species(cut, atoms)
+
+    cut = Atoms(numbers=numbers, positions=positions, pbc=True)
+    cut.center(vacuum=vacuum)
+    return _sort_species(cut, atoms)
+
+
+def _sort_species(cut: Atoms, source: Atoms) -> Atoms:
+    """按源结构中元素首次出现的顺序对子结构的原子做稳定排序"""
+    species, first = np.unique(source.numbers, return_index=True)
+    rank = np.zeros(species.max() + 1, dtype=np.int64)
+    rank[species] = np.argsort(np.argsort(first))
+    return cut[np.argsort(rank[cut.numbers], kind="stable")]
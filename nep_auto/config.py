@@ -7,10 +7,18 @@
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import yaml
 
+from .constants import (
+    CLUSTER_MODES,
+    COMPLETION_BACKENDS,
+    MAXVOL_METHODS,
+    OUTCAR_PARSERS,
+    STAGE_MODES,
+)
+
 
 @dataclass
 class GlobalConfig:
@@ -25,6 +33,15 @@ class GlobalConfig:
     initial_train_data: Path
     submit_command: str
     check_interval: int
+    check_interval_max: int
+    check_backoff: float
+    completion_backend: str
+    scheduler_query_command: str
+    job_id_pattern: str
+    lost_job_grace: int
+    pipelined: bool
+    stage_mode: str
+    stage_workers: int
 
 
 @dataclass
@@ -36,6 +53,9 @@ class VaspConfig:
     kpoints_file: Path
     job_script: str
     timeout: int
+    array_submit_command: str
+    outcar_parser: str
+    harvest_workers: int
 
 
 @dataclass
@@ -66,6 +86,8 @@ class GpumdConfig:
     conditions: List[GpumdCondition]
     job_script: str
     timeout: int
+    max_dump_frames: int
+    cancel_command: str
 
 
 @dataclass
@@ -74,8 +96,23 @@ class SelectionConfig:
 
     gamma_tol: float
     batch_size: int
+    maxvol_method: str
+    maxvol_workers: int
     fps_min_distance: float
     fps_enabled: bool
+    fps_seed_with_train: bool
+    descriptor_cache_dir: Optional[Path]
+    incremental_active_set: bool
+    incremental_rebuild_tol: float
+    n_workers: int
+    candidate_chunk_size: int
+    reuse_active_set: bool
+    extract_clusters: bool
+    cluster_mode: str
+    cluster_buffer: float
+    cluster_vacuum: float
+    cluster_max_per_structure: int
+    cluster_dedup_tol: float
 
 
 @dataclass
@@ -191,8 +228,30 @@ def load_config(config_file: str) -> Config:
         initial_train_data=initial_train_data,
         submit_command=global_raw.get("submit_command", "qsub job.sh"),
         check_interval=global_raw.get("check_interval", 30),
+        check_interval_max=global_raw.get(
+            "check_interval_max", global_raw.get("check_interval", 30)
+        ),
+        check_backoff=global_raw.get("check_backoff", 1.0),
+        completion_backend=global_raw.get("completion_backend", "stat"),
+        scheduler_query_command=global_raw.get("scheduler_query_command", "qstat"),
+        job_id_pattern=global_raw.get("job_id_pattern", r"(\d+)"),
+        lost_job_grace=global_raw.get("lost_job_grace", 0),
+        pipelined=global_raw.get("pipelined", False),
+        stage_mode=global_raw.get("stage_mode", "copy"),
+        stage_workers=global_raw.get("stage_workers", 8),
     )
 
+    if global_config.completion_backend not in COMPLETION_BACKENDS:
+        raise ValueError(
+            f"未知的 completion_backend: {global_config.completion_backend}"
+            f"（可选: {', '.join(COMPLETION_BACKENDS)}）"
+        )
+    if global_config.stage_mode not in STAGE_MODES:
+        raise ValueError(
+            f"未知的 stage_mode: {global_config.stage_mode}"
+            f"（可选: {', '.join(STAGE_MODES)}）"
+        )
+
     # 解析 VASP 配置
     vasp_raw = raw_config.get("vasp", {})
     vasp_config = VaspConfig(
@@ -205,7 +264,15 @@ def load_config(config_file: str) -> Config:
         ),
         job_script=vasp_raw.get("job_script", ""),
         timeout=vasp_raw.get("timeout", 172800),
+        array_submit_command=vasp_raw.get("array_submit_command", ""),
+        outcar_parser=vasp_raw.get("outcar_parser", "fast"),
+        harvest_workers=vasp_raw.get("harvest_workers", 4),
     )
+    if vasp_config.outcar_parser not in OUTCAR_PARSERS:
+        raise ValueError(
+            f"未知的 outcar_parser: {vasp_config.outcar_parser}"
+            f"（可选: {', '.join(OUTCAR_PARSERS)}）"
+        )
 
     # 验证 VASP 输入文件是否存在
     if not vasp_config.incar_file.exists():
@@ -263,17 +330,50 @@ def load_config(config_file: str) -> Config:
         conditions=conditions,
         job_script=gpumd_raw.get("job_script", ""),
         timeout=gpumd_raw.get("timeout", 86400),
+        max_dump_frames=gpumd_raw.get("max_dump_frames", 0),
+        cancel_command=gpumd_raw.get("cancel_command", ""),
     )
 
     # 解析选择配置
     selection_raw = raw_config.get("selection", {})
+    descriptor_cache_dir = selection_raw.get("descriptor_cache_dir")
     selection_config = SelectionConfig(
         gamma_tol=selection_raw.get("gamma_tol", 1.001),
         batch_size=selection_raw.get("batch_size", 10000),
+        maxvol_method=selection_raw.get("maxvol_method", "classic"),
+        maxvol_workers=selection_raw.get("maxvol_workers", 1),
         fps_min_distance=selection_raw.get("fps_min_distance", 0.01),
         fps_enabled=selection_raw.get("fps_enabled", True),
+        fps_seed_with_train=selection_raw.get("fps_seed_with_train", False),
+        descriptor_cache_dir=(
+            _resolve_path(descriptor_cache_dir, work_dir)
+            if descriptor_cache_dir
+            else None
+        ),
+        incremental_active_set=selection_raw.get("incremental_active_set", False),
+        incremental_rebuild_tol=selection_raw.get("incremental_rebuild_tol", 0.1),
+        n_workers=selection_raw.get("n_workers", 1),
+        candidate_chunk_size=selection_raw.get("candidate_chunk_size", 1000),
+        reuse_active_set=selection_raw.get("reuse_active_set", False),
+        extract_clusters=selection_raw.get("extract_clusters", False),
+        cluster_mode=selection_raw.get("cluster_mode", "cluster"),
+        cluster_buffer=selection_raw.get("cluster_buffer", 2.0),
+        cluster_vacuum=selection_raw.get("cluster_vacuum", 6.0),
+        cluster_max_per_structure=selection_raw.get("cluster_max_per_structure", 4),
+        cluster_dedup_tol=selection_raw.get("cluster_dedup_tol", 0.1),
     )
 
+    if selection_config.maxvol_method not in MAXVOL_METHODS:
+        raise ValueError(
+            f"未知的 maxvol_method: {selection_config.maxvol_method}"
+            f"（可选: {', '.join(MAXVOL_METHODS)}）"
+        )
+    if selection_config.cluster_mode not in CLUSTER_MODES:
+        raise ValueError(
+            f"未知的 cluster_mode: {selection_config.cluster_mode}"
+            f"（可选: {', '.join(CLUSTER_MODES)}）"
+        )
+
     return Config(
         global_config=global_config,
         vasp=vasp_config,
@@ -303,11 +403,28 @@ def print_config_summary(config: Config) -> None:
     print(f"  初始 NEP restart: {config.global_config.initial_nep_restart}")
     print(f"  初始训练数据: {config.global_config.initial_train_data}")
     print(f"  任务提交命令: {config.global_config.submit_command}")
+    print(f"  流水线模式: {config.global_config.pipelined}")
+    print(
+        f"  作业完成检测: {config.global_config.completion_backend}"
+        f"（间隔 {config.global_config.check_interval}-"
+        f"{config.global_config.check_interval_max} 秒，"
+        f"倍数 {config.global_config.check_backoff}）"
+    )
+    print(f"  丢失作业判定宽限期: {config.global_config.lost_job_grace} 秒")
+    print(
+        f"  作业目录暂存: {config.global_config.stage_mode}"
+        f"（{config.global_config.stage_workers} 个线程）"
+    )
 
     print("\n[VASP 配置]")
     print(f"  INCAR: {config.vasp.incar_file}")
     print(f"  POTCAR: {config.vasp.potcar_file}")
     print(f"  KPOINTS: {config.vasp.kpoints_file}")
+    print(f"  作业数组提交: {config.vasp.array_submit_command or '未启用'}")
+    print(
+        f"  结果收集: {config.vasp.outcar_parser} 解析器，"
+        f"{config.vasp.harvest_workers} 个进程"
+    )
     print(f"  超时时间: {config.vasp.timeout} 秒")
 
     print("\n[NEP 配置]")
@@ -319,10 +436,32 @@ def print_config_summary(config: Config) -> None:
     for cond in config.gpumd.conditions:
         print(f"    - {cond.id}: {cond.structure_file}")
     print(f"  超时时间: {config.gpumd.timeout} 秒")
+    if config.gpumd.max_dump_frames > 0:
+        print(f"  每个条件的帧数预算: {config.gpumd.max_dump_frames}")
+        print(
+            f"  取消命令: {config.gpumd.cancel_command or '未配置（写入 STOP 文件）'}"
+        )
 
     print("\n[MaxVol 配置]")
     print(f"  Gamma 阈值: {config.selection.gamma_tol}")
     print(f"  批处理大小: {config.selection.batch_size}")
+    print(f"  MaxVol 实现: {config.selection.maxvol_method}")
+    print(f"  按元素并行 MaxVol 进程数: {config.selection.maxvol_workers}")
+    print(f"  描述符缓存: {config.selection.descriptor_cache_dir or '未启用'}")
+    print(f"  增量更新活跃集: {config.selection.incremental_active_set}")
+    print(f"  描述符计算进程数: {config.selection.n_workers}")
+    print(f"  候选结构分块大小: {config.selection.candidate_chunk_size}")
+    print(f"  基于已保存活跃集筛选: {config.selection.reuse_active_set}")
+    print(f"  FPS 二次筛选: {config.selection.fps_enabled}")
+    print(f"  FPS 以训练集为起点: {config.selection.fps_seed_with_train}")
+    if config.selection.extract_clusters:
+        print(
+            f"  团簇提取: {config.selection.cluster_mode} "
+            f"(缓冲层 {config.selection.cluster_buffer} Å, "
+            f"每帧最多 {config.selection.cluster_max_per_structure} 个)"
+        )
+    else:
+        print("  团簇提取: 未启用")
 
     print("=" * 80)
 
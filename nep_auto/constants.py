@@ -0,0 +1,24 @@
+"""
+配置选项取值常量
+
+配置加载（config.py）和各功能模块共用的可选值元组。本模块不依赖任何第三方库，
+config.py 只从这里导入，nep-auto-config 等命令不必加载 NumPy / ASE。
+"""
+
+MAXVOL_METHODS = ("classic", "blocked")
+"""可用的 MaxVol 实现：classic 为逐次秩 1 更新，blocked 为分块秩 k 更新（float32）"""
+
+CLUSTER_MODES = ("cluster", "box")
+"""可用的切割方式：cluster 为加真空层的非周期团簇，box 为周期性立方盒"""
+
+STAGE_MODES = ("copy", "hardlink", "symlink")
+"""可用的共享输入文件放置方式"""
+
+OUTCAR_PARSERS = ("fast", "ase")
+"""可用的 OUTCAR 解析器"""
+
+COMPLETION_BACKENDS = ("stat", "scandir", "inotify", "scheduler")
+"""可用的作业完成检测后端"""
+
+SENTINEL_BACKENDS = ("scandir", "inotify")
+"""需要作业在父目录写入哨兵文件的检测后端"""
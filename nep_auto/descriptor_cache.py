@@ -0,0 +1,227 @@
+"""
+描述符缓存模块
+
+将每个结构的逐原子 NEP 描述符（如 B_projection）持久化到磁盘，
+避免在同一个 nep.txt 下对训练集重复计算。
+
+缓存键:
+    - 模型键: nep.txt 文件内容的 SHA-256，模型变化后旧缓存自动失效
+    - 结构键: numbers / positions / cell / pbc 的 SHA-1
+
+目录结构:
+    <cache_dir>/
+    └── <模型哈希>/
+        └── <属性名>/
+            ├── index.json          # {结构哈希: [分片编号, 起始行, 结束行]}
+            ├── shard_00000.npy     # 多个结构的逐原子数据按行拼接
+            └── ...                 # 分片数超过 max_shards 时合并为一个
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+# Model cache directories are named by the SHA-256 of nep.txt
+_MODEL_DIR_NAME = re.compile(r"[0-9a-f]{64}")
+
+
+def hash_file(file_path: str | Path) -> str:
+    """
+    计算文件内容的 SHA-256 哈希。
+
+    参数:
+        file_path: 文件路径
+
+    返回:
+        十六进制哈希字符串
+    """
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_structure(atoms: Atoms) -> str:
+    """
+    计算结构的哈希（原子序数、坐标、晶胞、周期性）。
+
+    参数:
+        atoms: ASE Atoms 对象
+
+    返回:
+        十六进制哈希字符串
+    """
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(atoms.numbers, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(atoms.positions, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(atoms.cell.array, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(atoms.pbc, dtype=np.bool_).tobytes())
+    return h.hexdigest()
+
+
+class DescriptorCache:
+    """按模型哈希和结构哈希索引的逐原子描述符磁盘缓存"""
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        nep_file: str | Path,
+        prop: str = "B_projection",
+        keep_models: int = 2,
+        max_shards: int = 8,
+    ):
+        """
+        打开（或创建）缓存目录。
+
+        参数:
+            cache_dir: 缓存根目录
+            nep_file: NEP 势函数文件路径，其内容哈希决定缓存子目录
+            prop: 缓存的属性名（如 "B_projection"、"descriptor"）
+            keep_models: 保留最近使用的模型缓存数量，更早的模型缓存会被删除
+            max_shards: 每个属性的分片数上限，超过时 put 将所有分片合并为一个
+        """
+        self.cache_dir = Path(cache_dir)
+        self.model_hash = hash_file(nep_file)
+        self.model_dir = self.cache_dir / self.model_hash
+        self.root = self.model_dir / prop
+        self.max_shards = max(1, max_shards)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # 更新 mtime，用于判断最近使用的模型
+        os.utime(self.model_dir)
+
+        self._prune_stale_models(keep_models)
+
+        self._index_file = self.root / "index.json"
+        self._index: dict[str, list[int]] = {}
+        if self._index_file.exists():
+            with open(self._index_file) as f:
+                self._index = json.load(f)
+
+        self._shards: dict[int, NDArray] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def _prune_stale_models(self, keep_models: int) -> None:
+        """
+        删除除最近 keep_models 个模型之外的缓存目录（模型变化即失效）。
+
+        只考虑名称为 SHA-256 十六进制串的目录，cache_dir 中的其他目录
+        （如 cache_dir 设为工作目录时的 iter_N/）不受影响。
+        """
+        model_dirs = [
+            p
+            for p in self.cache_dir.iterdir()
+            if p.is_dir() and _MODEL_DIR_NAME.fullmatch(p.name)
+        ]
+        model_dirs.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in model_dirs[max(keep_models, 1) :]:
+            if stale != self.model_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def _shard_path(self, shard_id: int) -> Path:
+        return self.root / f"shard_{shard_id:05d}.npy"
+
+    def _load_shard(self, shard_id: int) -> NDArray:
+        if shard_id not in self._shards:
+            self._shards[shard_id] = np.load(self._shard_path(shard_id), mmap_mode="r")
+        return self._shards[shard_id]
+
+    def get(self, keys: list[str]) -> list[NDArray | None]:
+        """
+        批量查询缓存。
+
+        参数:
+            keys: 结构哈希列表
+
+        返回:
+            与 keys 等长的列表，命中时为逐原子数组，未命中为 None
+        """
+        result: list[NDArray | None] = []
+        for key in keys:
+            entry = self._index.get(key)
+            if entry is None:
+                result.append(None)
+                continue
+            shard_id, start, stop = entry
+            result.append(np.array(self._load_shard(shard_id)[start:stop]))
+        return result
+
+    def put(self, items: list[tuple[str, NDArray]]) -> None:
+        """
+        将新计算的结果写入一个新分片，并更新索引。
+
+        参数:
+            items: (结构哈希, 逐原子数组) 列表
+        """
+        items = [(key, arr) for key, arr in items if key not in self._index]
+        if not items:
+            return
+
+        shard_id = max((entry[0] for entry in self._index.values()), default=-1) + 1
+        offset = 0
+        for key, arr in items:
+            self._index[key] = [shard_id, offset, offset + len(arr)]
+            offset += len(arr)
+
+        data = np.vstack([arr for _, arr in items])
+        tmp_shard = self.root / f".shard_{shard_id:05d}.tmp.npy"
+        np.save(tmp_shard, data)
+        os.replace(tmp_shard, self._shard_path(shard_id))
+
+        self._write_index()
+
+        if len({entry[0] for entry in self._index.values()}) > self.max_shards:
+            self._compact()
+
+    def _write_index(self) -> None:
+        tmp_index = self.root / ".index.json.tmp"
+        with open(tmp_index, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_index, self._index_file)
+
+    def _compact(self) -> None:
+        """将所有分片合并为一个新分片（逐结构复制，不整体载入内存），再删除旧分片"""
+        old_ids = sorted({entry[0] for entry in self._index.values()})
+        new_id = old_ids[-1] + 1
+        first = self._load_shard(old_ids[0])
+        n_rows = sum(stop - start for _, start, stop in self._index.values())
+
+        tmp_shard = self.root / f".shard_{new_id:05d}.tmp.npy"
+        merged = np.lib.format.open_memmap(
+            tmp_shard, mode="w+", dtype=first.dtype, shape=(n_rows, *first.shape[1:])
+        )
+        new_index: dict[str, list[int]] = {}
+        offset = 0
+        for key, (shard_id, start, stop) in self._index.items():
+            merged[offset : offset + stop - start] = self._load_shard(shard_id)[
+                start:stop
+            ]
+            new_index[key] = [new_id, offset, offset + stop - start]
+            offset += stop - start
+        merged.flush()
+        del merged
+        os.replace(tmp_shard, self._shard_path(new_id))
+
+        # The index switches to the merged shard before the old ones go away
+        self._index = new_index
+        self._write_index()
+        self._shards.clear()
+        for shard_id in old_ids:
+            self._shard_path(shard_id).unlink(missing_ok=True)
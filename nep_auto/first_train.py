@@ -85,7 +85,7 @@ def first_train(config: Config, logger: logging.Logger) -> None:
     logger.info(f"  创建 nep.in (使用 first_input_content)")
 
     # 写入作业脚本
-    from .iteration import _ensure_done_marker
+    from .watcher import _ensure_done_marker
 
     job_script_file = train_dir / "job.sh"
     with open(job_script_file, "w") as f:
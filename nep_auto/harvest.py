@@ -0,0 +1,252 @@
+"""
+VASP 结果收集模块
+
+DFT 标注完成后从各任务目录读取最后一个离子步（能量、力、应力），
+代替在主进程中逐个用 ase.io.read 完整解析 OUTCAR：
+- 各任务在进程池中并行读取，结果按任务顺序返回
+- fast 解析器只读取 OUTCAR 开头（元素和原子数）和从文件末尾向前扩展的一小段，
+  不逐个离子步解析整个文件；ase 解析器使用 ase.io.read(index=-1)
+- OUTCAR 缺失或解析失败时回退到 vasprun.xml
+- 每个任务返回一条 HarvestRecord（成功时带结构，失败时带原因）
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from .constants import OUTCAR_PARSERS
+from .parallel import run_in_processes
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+# Markers of the OUTCAR sections read by the fast parser
+_ENERGY_MARKER = b"FREE ENERGIE OF THE ION-ELECTRON SYSTEM"
+_POSITION_MARKER = b"POSITION          "
+_CELL_MARKER = b"direct lattice vectors"
+_STRESS_MARKER = b"in kB "
+
+# Bytes kept in front of the cell block when looking for the stress line
+_STRESS_MARGIN = 1 << 14
+
+# The fast parser first reads this many bytes from the end of the OUTCAR and
+# doubles the window until the last ionic step is fully inside it
+_TAIL_BLOCK = 1 << 20
+
+
+@dataclass
+class HarvestRecord:
+    """单个 VASP 任务的收集结果"""
+
+    task_dir: Path
+    atoms: Optional[Atoms] = None
+    source: str = ""
+    error: str = ""
+
+    @property
+    def success(self) -> bool:
+        """是否成功读取到带能量和力的结构"""
+        return self.atoms is not None
+
+
+def harvest_vasp_results(
+    job_dirs: list[Path],
+    parser: str = "fast",
+    n_workers: int = 1,
+) -> list[HarvestRecord]:
+    """
+    并行读取 VASP 任务目录中最后一个离子步的结果。
+
+    参数:
+        job_dirs: 任务目录列表
+        parser: OUTCAR 解析器（见 OUTCAR_PARSERS）
+        n_workers: 工作进程数，<= 1 表示在当前进程中串行读取
+
+    返回:
+        与 job_dirs 一一对应的收集结果
+
+    异常:
+        ValueError: parser 不在 OUTCAR_PARSERS 中时抛出
+    """
+    if parser not in OUTCAR_PARSERS:
+        raise ValueError(
+            f"未知的 OUTCAR 解析器: {parser}（可选: {', '.join(OUTCAR_PARSERS)}）"
+        )
+    tasks = [(Path(job_dir), parser) for job_dir in job_dirs]
+    # Parsing is pure Python; BLAS threads are of no use to the workers
+    return run_in_processes(_harvest_task, tasks, n_workers, blas_threads=1)
+
+
+def _harvest_task(task: tuple[Path, str]) -> HarvestRecord:
+    """读取单个任务目录：先读 OUTCAR，失败时回退到 vasprun.xml"""
+    job_dir, parser = task
+    errors = []
+    for name in ("OUTCAR", "vasprun.xml"):
+        path = job_dir / name
+        if not path.exists():
+            errors.append(f"{name}不存在")
+            continue
+        try:
+            if name == "vasprun.xml":
+                from ase.io import read as ase_read
+
+                atoms = ase_read(str(path), index=-1, format="vasp-xml")
+            elif parser == "fast":
+                atoms = read_outcar_final(path)
+            else:
+                from ase.io import read as ase_read
+
+                atoms = ase_read(str(path), index=-1, format="vasp-out")
+            _validate(atoms)
+        except Exception as e:
+            errors.append(f"读取 {name} 失败: {e}")
+            continue
+        return HarvestRecord(job_dir, atoms=atoms, source=name)
+    return HarvestRecord(job_dir, error="; ".join(errors))
+
+
+def _validate(atoms: Atoms) -> None:
+    """确认结构带有能量和力"""
+    atoms.get_potential_energy()
+    forces = atoms.get_forces()
+    if forces is None or len(forces) == 0:
+        raise ValueError("结构缺少力信息")
+
+
+def read_outcar_final(path: str | Path) -> Atoms:
+    """
+    只读取 OUTCAR 的最后一个完整离子步。
+
+    从文件开头读取元素（POTCAR: 行）和每种元素的原子数（ions per type），
+    再从文件末尾向前读取，直到窗口中包含最后一个离子步的晶胞、坐标和力、
+    应力以及能量。得到的能量、力和应力与 ase.io.read(format="vasp-out") 一致。
+
+    参数:
+        path: OUTCAR 文件路径
+
+    返回:
+        带 SinglePointDFTCalculator（energy、free_energy、forces、stress）的结构
+
+    异常:
+        ValueError: 文件中没有完整的离子步或缺少必要信息时抛出
+    """
+    from ase import Atoms
+    from ase.calculators.singlepoint import SinglePointDFTCalculator
+    from ase.io.vasp_parsers.vasp_outcar_parsers import convert_vasp_outcar_stress
+
+    with open(path, "rb") as f:
+        symbols = _read_outcar_symbols(f)
+        n_atoms = len(symbols)
+
+        size = f.seek(0, os.SEEK_END)
+        block = _TAIL_BLOCK
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            tail = f.read()
+            step = _last_ionic_step(tail, start == 0)
+            if step is not None:
+                break
+            if start == 0:
+                raise ValueError("OUTCAR 中没有完整的离子步")
+            block *= 2
+
+    energy_lines, cell_lines, position_lines, stress_line = step
+    free_energy = float(energy_lines[2].split()[4])
+    energy = float(energy_lines[4].split()[6])
+    cell = np.array([line.split()[:3] for line in cell_lines[1:4]], dtype=float)
+    data = np.array(
+        [line.split()[:6] for line in position_lines[2 : 2 + n_atoms]], dtype=float
+    )
+    if data.shape != (n_atoms, 6):
+        raise ValueError(f"POSITION 块的原子数与头部不一致（应为 {n_atoms}）")
+
+    atoms = Atoms(symbols=symbols, positions=data[:, :3], cell=cell, pbc=True)
+    results = {"energy": energy, "free_energy": free_energy, "forces": data[:, 3:]}
+    if stress_line is not None:
+        results["stress"] = convert_vasp_outcar_stress(
+            [float(x) for x in stress_line.split()[2:]]
+        )
+    atoms.calc = SinglePointDFTCalculator(atoms, **results)
+    atoms.calc.name = "vasp"
+    return atoms
+
+
+def _read_outcar_symbols(f) -> list[str]:
+    """读取 OUTCAR 头部（第一个 Iteration 之前），返回按原子顺序展开的元素列表"""
+    from ase.data import atomic_numbers
+
+    species: list[str] = []
+    counts: list[int] = []
+    for raw in f:
+        line = raw.decode("latin-1")
+        if "POTCAR:" in line:
+            parts = line.split()
+            # "POTCAR:    PAW_PBE Fe_pv 02Aug2007" or the "H  1/r potential" form
+            sym = parts[2] if "1/r potential" not in line else parts[1]
+            sym = "".join(c for c in sym.split("_")[0] if c.isalpha())
+            if sym not in atomic_numbers:
+                raise ValueError(f"无法识别的 POTCAR 元素: {line.strip()}")
+            species.append(sym)
+        elif "ions per type" in line:
+            counts = [int(x) for x in line.split()[4:]]
+        elif "Iteration" in line:
+            break
+
+    # Every species is listed twice in the header
+    species = species[: sum(divmod(len(species), 2))]
+    if not counts or len(counts) != len(species):
+        raise ValueError("OUTCAR 头部缺少元素或 ions per type 信息")
+    return [sym for sym, n in zip(species, counts) for _ in range(n)]
+
+
+def _last_ionic_step(
+    tail: bytes, is_whole_file: bool
+) -> Optional[tuple[list[str], list[str], list[str], Optional[str]]]:
+    """
+    在文件末尾的窗口中定位最后一个完整离子步。
+
+    返回 (能量段, 晶胞段, 坐标和力段, 应力行)，窗口不足以确定时返回 None。
+    """
+    end = tail.rfind(_ENERGY_MARKER)
+    while end != -1:
+        energy_lines = tail[end:].split(b"\n", 5)
+        if len(energy_lines) > 5:
+            break
+        # The last energy block is cut off; use the previous ionic step
+        end = tail.rfind(_ENERGY_MARKER, 0, end)
+    if end == -1:
+        return None
+
+    previous = tail.rfind(_ENERGY_MARKER, 0, end)
+    cell_pos = tail.rfind(_CELL_MARKER, previous + 1, end)
+    position_pos = tail.rfind(_POSITION_MARKER, previous + 1, end)
+    # The stress block precedes the cell block, so the window must also leave
+    # some room before the cell unless it reaches the previous step
+    complete = is_whole_file or previous != -1
+    if not complete and (cell_pos < _STRESS_MARGIN or position_pos == -1):
+        return None
+    if cell_pos == -1 or position_pos == -1:
+        raise ValueError("最后一个离子步缺少晶胞或坐标信息")
+    stress_pos = tail.rfind(_STRESS_MARKER, previous + 1, cell_pos)
+
+    def lines(pos: int, n: int) -> list[str]:
+        return tail[pos:].split(b"\n", n)[:n]
+
+    # The position block length is only known after the header is read, so
+    # keep everything up to the energy marker
+    position_lines = tail[position_pos:end].decode("latin-1").split("\n")
+    stress_line = None
+    if stress_pos != -1:
+        stress_line = lines(stress_pos, 1)[0].decode("latin-1")
+    return (
+        [line.decode("latin-1") for line in energy_lines[:5]],
+        [line.decode("latin-1") for line in lines(cell_pos, 4)],
+        position_lines,
+        stress_line,
+    )
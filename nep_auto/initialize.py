@@ -12,39 +12,25 @@ import logging
 from pathlib import Path
 
 from .config import Config, load_config
-from .maxvol import select_active_set, read_trajectory, write_trajectory, write_asi_file
+from .constants import SENTINEL_BACKENDS
+from .maxvol import select_active_set, write_trajectory, write_asi_file
+from .staging import stage_file
+from .train_store import TrainStore
+from .watcher import _ensure_done_marker
 
 
-def _ensure_done_marker(job_script: str) -> str:
-    """
-    确保作业脚本末尾有 touch DONE 命令
-
-    参数:
-        job_script: 原始作业脚本内容
-
-    返回:
-        添加了 DONE 标记的脚本
-    """
-    script = job_script.rstrip()
-
-    # 检查是否已经有 touch DONE
-    if "touch DONE" not in script and "touch ./DONE" not in script:
-        script += "\n\n# 自动添加：标记任务完成\ntouch DONE\n"
-
-    return script
-
-
-def setup_logger(log_file: Path) -> logging.Logger:
+def setup_logger(log_file: Path, name: str = "nep_auto") -> logging.Logger:
     """
     设置日志记录器
 
     参数:
         log_file: 日志文件路径
+        name: 日志记录器名称（同一进程运行多个任务时各自使用不同名称）
 
     返回:
         配置好的 logger
     """
-    logger = logging.getLogger("nep_auto")
+    logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
     # 文件处理器
@@ -73,7 +59,7 @@ def initialize_workspace(config: Config, logger: logging.Logger) -> None:
     初始化工作空间
 
     第 0 步 (Iteration 1)：
-    1. 复制初始 nep.txt 和 train.xyz 到工作目录
+    1. 复制初始 nep.txt 到工作目录，初始 train.xyz 导入 train_store
     2. 使用 select_active_set() 生成活跃集
     3. 创建 GPUMD 探索任务目录
 
@@ -116,15 +102,18 @@ def initialize_workspace(config: Config, logger: logging.Logger) -> None:
         f"  复制 NEP restart: {config.global_config.initial_nep_restart} -> {nep_restart_dst}"
     )
 
-    # 复制 train.xyz
-    train_dst = iter0_dir / "train.xyz"
-    shutil.copy2(config.global_config.initial_train_data, train_dst)
-    logger.info(
-        f"  复制训练数据: {config.global_config.initial_train_data} -> {train_dst}"
-    )
+    # 初始训练集作为 train_store 的第 0 个分片
+    train_store = TrainStore(work_dir / "train_store")
+    if train_store.is_empty():
+        train_store.import_file(0, config.global_config.initial_train_data)
+        logger.info(
+            f"  导入训练数据: {config.global_config.initial_train_data} -> {train_store.root}"
+        )
+    else:
+        logger.warning(f"  {train_store.root} 中已有训练数据，不重新导入初始训练集")
 
     # 统计训练数据
-    train_structures = read_trajectory(str(train_dst))
+    train_structures = train_store.read(upto=0)
     logger.info(f"  训练集包含 {len(train_structures)} 个结构")
 
     # =========================================================================
@@ -194,6 +183,11 @@ def initialize_workspace(config: Config, logger: logging.Logger) -> None:
             nep_file=str(nep_dst),
             gamma_tol=config.selection.gamma_tol,
             batch_size=config.selection.batch_size,
+            method=config.selection.maxvol_method,
+            cache_dir=config.selection.descriptor_cache_dir,
+            n_workers=config.selection.n_workers,
+            element_workers=config.selection.maxvol_workers,
+            state_output_path=iter0_dir / "active_set.npz",
         )
 
         logger.info("  活跃集生成成功")
@@ -238,17 +232,17 @@ def initialize_workspace(config: Config, logger: logging.Logger) -> None:
 
         # 复制结构文件
         structure_dst = cond_dir / "model.xyz"
-        shutil.copy2(cond.structure_file, structure_dst)
+        stage_file(cond.structure_file, structure_dst, config.global_config.stage_mode)
         logger.info(f"    复制结构文件: {cond.structure_file.name}")
 
         # 复制 NEP 模型
         nep_gpumd = cond_dir / "nep.txt"
-        shutil.copy2(nep_dst, nep_gpumd)
+        stage_file(nep_dst, nep_gpumd, config.global_config.stage_mode)
         logger.info("    复制 NEP 模型")
 
         # 复制活跃集
         asi_gpumd = cond_dir / "active_set.asi"
-        shutil.copy2(asi_file, asi_gpumd)
+        stage_file(asi_file, asi_gpumd, config.global_config.stage_mode)
         logger.info("    复制活跃集文件")
 
         # 写入 run.in
@@ -260,7 +254,13 @@ def initialize_workspace(config: Config, logger: logging.Logger) -> None:
         # 写入作业脚本（自动添加 DONE 标记）
         job_script_file = cond_dir / "job.sh"
         with open(job_script_file, "w") as f:
-            f.write(_ensure_done_marker(config.gpumd.job_script))
+            f.write(
+                _ensure_done_marker(
+                    config.gpumd.job_script,
+                    sentinel=config.global_config.completion_backend
+                    in SENTINEL_BACKENDS,
+                )
+            )
         logger.info("    创建作业脚本（已自动添加 DONE 标记）")
 
     # =========================================================================
@@ -12,40 +12,49 @@
 import shutil
 import subprocess
 import time
-import random
 import logging
+import re
+from bisect import bisect_right
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from ase import Atoms
 
-from .config import Config
+from .cluster import extract_clusters
+from .config import Config, GpumdCondition
+from .constants import SENTINEL_BACKENDS
+from .descriptor_cache import hash_file
+from .harvest import harvest_vasp_results
+from .staging import Stager
+from .train_store import TrainStore
 from .maxvol import (
+    ActiveSetState,
+    active_set_state_path,
+    iter_trajectory,
     select_active_set,
+    select_extension_from_active_set,
     select_extension_structures,
+    stream_trajectory,
+    update_active_set_incremental,
+    read_active_set_state,
     read_trajectory,
     write_trajectory,
+    read_asi_file,
     write_asi_file,
+    select_within_budget,
+)
+from .watcher import (
+    JOB_ID_FILE,
+    SchedulerWatcher,
+    _ensure_done_marker,
+    create_watcher,
+    done_sentinel_name,
+    parse_job_id,
+    query_active_job_ids,
 )
 
-
-def _ensure_done_marker(job_script: str) -> str:
-    """
-    确保作业脚本末尾有 touch DONE 命令
-
-    参数:
-        job_script: 原始作业脚本内容
-
-    返回:
-        添加了 DONE 标记的脚本
-    """
-    script = job_script.rstrip()
-
-    # 检查是否已经有 touch DONE
-    if "touch DONE" not in script and "touch ./DONE" not in script:
-        script += "\n\n# 自动添加：标记任务完成\ntouch DONE\n"
-
-    return script
+# 作业数组脚本中保留的调度系统指令前缀
+_DIRECTIVE_PREFIXES = ("#PBS", "#SBATCH", "#$", "#BSUB")
 
 
 class TaskManager:
@@ -63,6 +72,32 @@ class TaskManager:
         self.logger = logger
         self.submit_command = config.global_config.submit_command
         self.check_interval = config.global_config.check_interval
+        self.check_interval_max = config.global_config.check_interval_max
+        self.check_backoff = config.global_config.check_backoff
+        self.completion_backend = config.global_config.completion_backend
+        self.scheduler_query_command = config.global_config.scheduler_query_command
+        self.job_id_pattern = config.global_config.job_id_pattern
+        self.lost_job_grace = config.global_config.lost_job_grace
+        # 作业目录 -> 调度系统作业 ID（从提交命令输出中解析，并写入 <job_dir>/JOB_ID）
+        self.job_ids: dict = {}
+
+    def _record_job_id(self, job_dirs: List[Path], output: str) -> None:
+        """从提交命令输出中解析作业 ID，记录到内存并写入各作业目录的 JOB_ID 文件"""
+        job_id = parse_job_id(output, self.job_id_pattern)
+        if job_id is None:
+            return
+        for job_dir in job_dirs:
+            self.job_ids[job_dir] = job_id
+            (job_dir / JOB_ID_FILE).write_text(job_id + "\n")
+
+    def _load_job_ids(self, job_dirs: List[Path]) -> None:
+        """从 JOB_ID 文件恢复作业 ID（程序重启后继续等待时使用）"""
+        for job_dir in job_dirs:
+            id_file = job_dir / JOB_ID_FILE
+            if job_dir not in self.job_ids and id_file.exists():
+                job_id = id_file.read_text().strip()
+                if job_id:
+                    self.job_ids[job_dir] = job_id
 
     def submit_job(self, job_dir: Path) -> bool:
         """
@@ -84,22 +119,184 @@ class TaskManager:
                 text=True,
             )
 
+            return self._handle_submit_result(
+                job_dir, result.returncode, result.stdout, result.stderr
+            )
+
+        except Exception as e:
+            self.logger.error(f"  提交作业时发生异常: {e}")
+            return False
+
+    def _handle_submit_result(
+        self, job_dir: Path, returncode: int, stdout: str, stderr: str
+    ) -> bool:
+        """记录提交命令的结果和作业 ID，返回是否提交成功"""
+        if returncode == 0:
+            self.logger.info(f"  作业已提交: {job_dir}")
+            if stdout.strip():
+                self.logger.info(f"    输出: {stdout.strip()}")
+            self._record_job_id([job_dir], stdout)
+            return True
+        else:
+            self.logger.error(f"  作业提交失败: {job_dir}")
+            self.logger.error(f"    错误: {stderr}")
+            return False
+
+    def submit_job_array(
+        self,
+        job_dirs: List[Path],
+        submit_dir: Path,
+        job_script: str,
+        array_submit_command: str,
+    ) -> bool:
+        """
+        以作业数组的形式一次提交多个作业
+
+        在 submit_dir 下写入 task_list.txt（每行一个作业目录）和 job_array.sh，
+        数组中第 i 个子任务进入 task_list.txt 第 i + 1 行的目录执行该目录下的 job.sh。
+
+        参数:
+            job_dirs: 作业目录列表（每个目录下已有 job.sh）
+            submit_dir: 执行提交命令的目录
+            job_script: 原始作业脚本（用于提取调度系统指令）
+            array_submit_command: 数组提交命令，{count} 和 {last} 分别替换为
+                子任务数和最后一个子任务编号（如 "sbatch --array=0-{last} job_array.sh"）
+
+        返回:
+            是否提交成功
+        """
+        task_list = submit_dir / "task_list.txt"
+        task_list.write_text("".join(f"{job_dir.resolve()}\n" for job_dir in job_dirs))
+        (submit_dir / "job_array.sh").write_text(
+            _make_array_script(job_script, task_list.resolve())
+        )
+        command = array_submit_command.format(
+            count=len(job_dirs), last=len(job_dirs) - 1
+        )
+
+        try:
+            result = subprocess.run(
+                command,
+                shell=True,
+                cwd=submit_dir,
+                capture_output=True,
+                text=True,
+            )
+
             if result.returncode == 0:
-                self.logger.info(f"  作业已提交: {job_dir}")
+                self.logger.info(f"  作业数组已提交: {len(job_dirs)} 个子任务")
                 if result.stdout.strip():
                     self.logger.info(f"    输出: {result.stdout.strip()}")
+                self._record_job_id(job_dirs, result.stdout)
                 return True
             else:
-                self.logger.error(f"  作业提交失败: {job_dir}")
+                self.logger.error(f"  作业数组提交失败: {command}")
                 self.logger.error(f"    错误: {result.stderr}")
                 return False
 
         except Exception as e:
-            self.logger.error(f"  提交作业时发生异常: {e}")
+            self.logger.error(f"  提交作业数组时发生异常: {e}")
             return False
 
+    def cancel_job(self, job_dir: Path) -> bool:
+        """
+        用 gpumd.cancel_command 取消作业
+
+        参数:
+            job_dir: 作业目录
+
+        返回:
+            是否已执行取消命令（未配置命令、作业 ID 未知或命令失败时返回 False）
+        """
+        job_id = self.job_ids.get(job_dir)
+        if not self.config.gpumd.cancel_command or job_id is None:
+            return False
+        command = self.config.gpumd.cancel_command.format(job_id=job_id)
+        try:
+            result = subprocess.run(
+                command, shell=True, cwd=job_dir, capture_output=True, text=True
+            )
+        except Exception as e:
+            self.logger.error(f"  取消作业时发生异常: {e}")
+            return False
+        if result.returncode != 0:
+            self.logger.error(f"  取消作业失败: {command}")
+            self.logger.error(f"    错误: {result.stderr}")
+            return False
+        return True
+
+    def _find_lost_jobs(
+        self,
+        pending_jobs: List[Path],
+        active: Optional[set],
+        left_queue_since: dict,
+    ) -> List[Path]:
+        """
+        找出已离开调度队列超过 lost_job_grace 秒仍没有 DONE 的作业
+
+        参数:
+            pending_jobs: 未完成的作业目录
+            active: 队列中的作业 ID 集合，None 表示查询失败
+            left_queue_since: 作业目录 -> 首次发现离开队列的时间（原地更新）
+
+        返回:
+            判定为丢失（失败或被终止）的作业目录
+        """
+        if active is None:
+            return []
+
+        now = time.time()
+        lost = []
+        for job_dir in pending_jobs:
+            job_id = self.job_ids.get(job_dir)
+            if job_id is None or job_id in active:
+                left_queue_since.pop(job_dir, None)
+                continue
+            since = left_queue_since.setdefault(job_dir, now)
+            # 宽限期内等待共享文件系统同步 DONE 文件
+            if now - since >= self.lost_job_grace and not (job_dir / "DONE").exists():
+                lost.append(job_dir)
+        return lost
+
+    def iter_completed(
+        self,
+        job_dirs: List[Path],
+        timeout: Optional[int] = None,
+        monitor: Optional["ExplorationMonitor"] = None,
+    ) -> Iterator[Tuple[Path, bool]]:
+        """
+        按完成顺序逐个返回结束的作业
+
+        检测方式由 global.completion_backend 决定，轮询间隔从 check_interval 开始
+        按 check_backoff 倍数增长（最大 check_interval_max），有作业完成时重置。
+        已知作业 ID 时，离开调度队列超过 lost_job_grace 秒仍没有 DONE 的作业视为失败。
+
+        参数:
+            job_dirs: 作业目录列表
+            timeout: 超时时间（秒），None 表示无限等待
+            monitor: 每次轮询前检查未完成作业的 GPUMD 探索监控，None 表示不监控
+
+        返回:
+            (作业目录, 是否成功) 生成器，成功表示检测到 DONE 文件
+
+        异常:
+            TimeoutError: 超时仍有作业未结束时抛出
+        """
+        tracker = CompletionTracker(self, job_dirs, timeout, monitor)
+        try:
+            while tracker.pending:
+                yield from tracker.poll()
+                if tracker.pending:
+                    tracker.watcher.wait(tracker.pending, tracker.next_sleep())
+        finally:
+            tracker.close()
+
     def wait_for_completion(
-        self, job_dirs: List[Path], timeout: Optional[int] = None
+        self,
+        job_dirs: List[Path],
+        timeout: Optional[int] = None,
+        allow_failures: bool = False,
+        monitor: Optional["ExplorationMonitor"] = None,
     ) -> bool:
         """
         等待所有作业完成（通过检测 DONE 文件）
@@ -107,41 +304,351 @@ class TaskManager:
         参数:
             job_dirs: 作业目录列表
             timeout: 超时时间（秒），None 表示无限等待
+            allow_failures: 为 True 时失败的作业不中断等待，
+                由调用方根据输出文件处理（如 VASP 任务）
+            monitor: GPUMD 探索监控（见 ExplorationMonitor），None 表示不监控
 
         返回:
-            是否所有作业都成功完成
+            是否所有作业都成功完成（allow_failures 为 True 时只要没有超时即返回 True）
         """
-        start_time = time.time()
-        pending_jobs = list(job_dirs)
+        self.logger.info(f"等待 {len(job_dirs)} 个作业完成...")
 
-        self.logger.info(f"等待 {len(pending_jobs)} 个作业完成...")
+        n_failed = 0
+        try:
+            for job_dir, success in self.iter_completed(
+                job_dirs, timeout=timeout, monitor=monitor
+            ):
+                self._log_finished(job_dir, success)
+                if not success:
+                    n_failed += 1
+                    if not allow_failures:
+                        return False
+        except TimeoutError as e:
+            self.logger.warning(str(e))
+            return False
 
-        while pending_jobs:
-            # 检查超时
-            if timeout and (time.time() - start_time) > timeout:
-                self.logger.warning(
-                    f"等待超时（{timeout} 秒），剩余 {len(pending_jobs)} 个作业"
-                )
-                return False
+        self._log_all_finished(n_failed)
+        return True
+
+    def _log_finished(self, job_dir: Path, success: bool) -> None:
+        """记录单个作业的结束状态"""
+        if success:
+            self.logger.info(f"  作业完成: {job_dir.name}")
+        else:
+            self.logger.error(
+                f"  作业失败: {job_dir.name}"
+                f"（作业 {self.job_ids[job_dir]} 已离开队列但没有 DONE 文件）"
+            )
 
-            # 检查每个作业的 DONE 文件
-            completed = []
-            for job_dir in pending_jobs:
-                done_file = job_dir / "DONE"
-                if done_file.exists():
-                    completed.append(job_dir)
-                    self.logger.info(f"  作业完成: {job_dir.name}")
+    def _log_all_finished(self, n_failed: int) -> None:
+        """记录一组作业全部结束"""
+        if n_failed:
+            self.logger.warning(f"所有作业已结束，其中 {n_failed} 个失败")
+        else:
+            self.logger.info("所有作业已完成")
 
-            # 移除已完成的作业
-            for job_dir in completed:
-                pending_jobs.remove(job_dir)
 
-            # 如果还有未完成的作业，等待一段时间后再检查
-            if pending_jobs:
-                time.sleep(self.check_interval)
+class CompletionTracker:
+    """
+    一组作业的完成状态跟踪（同步和异步等待共用的轮询逻辑）
 
-        self.logger.info("所有作业已完成")
-        return True
+    每次 poll() 检查一次完成和丢失的作业，next_sleep() 给出下一次轮询前的等待时间。
+    """
+
+    def __init__(
+        self,
+        task_manager: "TaskManager",
+        job_dirs: List[Path],
+        timeout: Optional[float] = None,
+        monitor: Optional["ExplorationMonitor"] = None,
+    ):
+        """
+        参数:
+            task_manager: 提供配置和作业 ID 的任务管理器
+            job_dirs: 作业目录列表
+            timeout: 超时时间（秒），None 表示无限等待
+            monitor: GPUMD 探索监控，None 表示不监控
+        """
+        self.task_manager = task_manager
+        self.monitor = monitor
+        self.pending = list(job_dirs)
+        self.timeout = timeout
+        self.start_time = time.time()
+        task_manager._load_job_ids(self.pending)
+        self.watcher = create_watcher(
+            task_manager.completion_backend,
+            job_ids=task_manager.job_ids,
+            scheduler_query_command=task_manager.scheduler_query_command,
+        )
+        self.interval = task_manager.check_interval
+        self._left_queue_since: dict = {}
+
+    def poll(self) -> List[Tuple[Path, bool]]:
+        """
+        检查一次作业状态，并从 pending 中移除已结束的作业
+
+        返回:
+            本次结束的 (作业目录, 是否成功) 列表
+
+        异常:
+            TimeoutError: 超时仍有作业未结束时抛出
+        """
+        tm = self.task_manager
+        if self.timeout and (time.time() - self.start_time) > self.timeout:
+            raise TimeoutError(
+                f"等待超时（{self.timeout} 秒），剩余 {len(self.pending)} 个作业"
+            )
+
+        # 探索监控：达到帧数预算的作业提前结束（写入 DONE）
+        if self.monitor is not None:
+            self.monitor.poll(self.pending)
+
+        # 检查作业完成状态
+        completed = self.watcher.poll(self.pending)
+        completed_set = set(completed)
+        remaining = [j for j in self.pending if j not in completed_set]
+
+        # 检查已离开队列但没有 DONE 的作业
+        lost = []
+        if tm.lost_job_grace > 0 and any(j in tm.job_ids for j in remaining):
+            if isinstance(self.watcher, SchedulerWatcher):
+                active = self.watcher.active_job_ids
+            else:
+                active = query_active_job_ids(tm.scheduler_query_command)
+            lost = tm._find_lost_jobs(remaining, active, self._left_queue_since)
+
+        finished = completed_set | set(lost)
+        self.pending = [j for j in self.pending if j not in finished]
+        if completed:
+            self.interval = tm.check_interval
+        return [(j, True) for j in completed] + [(j, False) for j in lost]
+
+    def next_sleep(self) -> float:
+        """返回下一次轮询前的等待时间，并按退避倍数增长轮询间隔"""
+        tm = self.task_manager
+        sleep_time = self.interval
+        if self.timeout:
+            remaining = self.timeout - (time.time() - self.start_time)
+            sleep_time = max(0, min(sleep_time, remaining))
+        self.interval = min(self.interval * tm.check_backoff, tm.check_interval_max)
+        return sleep_time
+
+    def close(self) -> None:
+        """释放检测后端资源"""
+        self.watcher.close()
+
+
+STOP_FILE = "STOP"
+"""未配置 gpumd.cancel_command 时写入作业目录的停止信号文件，由作业脚本检测后结束 GPUMD"""
+
+GAMMA_HISTOGRAM_EDGES = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+"""探索监控中每帧最大 gamma 直方图的分箱边界"""
+
+_PROPERTIES_RE = re.compile(rb"Properties=(\S+)", re.IGNORECASE)
+
+
+class DumpStats:
+    """单个 GPUMD 条件的 extrapolation_dump.xyz 增量统计"""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计（文件被重写时调用）"""
+        self.offset = 0
+        """已解析到的文件字节位置（只包含完整的帧）"""
+        self.n_frames = 0
+        self.max_gamma = 0.0
+        self.histogram = [0] * (len(GAMMA_HISTOGRAM_EDGES) + 1)
+        """每帧最大 gamma 的直方图（第 k 箱为 [edges[k-1], edges[k])）"""
+
+    def add(self, gamma: Optional[float]) -> None:
+        """记录一帧（gamma 为该帧的最大 gamma，dump 中没有 gamma 列时为 None）"""
+        self.n_frames += 1
+        if gamma is not None:
+            self.max_gamma = max(self.max_gamma, gamma)
+            self.histogram[bisect_right(GAMMA_HISTOGRAM_EDGES, gamma)] += 1
+
+    def summary(self) -> str:
+        """统计摘要（帧数、最大 gamma、直方图）"""
+        labels = ["<1"] + [
+            f"{lo:g}-{hi:g}"
+            for lo, hi in zip(GAMMA_HISTOGRAM_EDGES, GAMMA_HISTOGRAM_EDGES[1:])
+        ]
+        labels.append(f">={GAMMA_HISTOGRAM_EDGES[-1]:g}")
+        bins = " ".join(
+            f"[{label}]={count}"
+            for label, count in zip(labels, self.histogram)
+            if count
+        )
+        if not bins:
+            return f"{self.n_frames} 帧（dump 中没有 gamma 列）"
+        return f"{self.n_frames} 帧, 最大 gamma {self.max_gamma:.2f}, {bins}"
+
+
+class ExplorationMonitor:
+    """
+    GPUMD 探索监控：增量读取各条件的 extrapolation_dump.xyz，
+    某个条件的帧数达到 gpumd.max_dump_frames 后提前结束该作业。
+
+    结束方式：配置了 gpumd.cancel_command 且已知作业 ID 时取消作业并写入 DONE
+    （探索视为正常完成）；否则在作业目录写入 STOP 文件，由作业脚本自行结束 GPUMD。
+    """
+
+    def __init__(
+        self,
+        task_manager: TaskManager,
+        max_frames: int,
+        dump_name: str = "extrapolation_dump.xyz",
+    ):
+        """
+        参数:
+            task_manager: 任务管理器（用于取消作业和记录日志）
+            max_frames: 每个条件的帧数预算
+            dump_name: 作业目录中 GPUMD 输出的高 Gamma 结构文件名
+        """
+        self.task_manager = task_manager
+        self.max_frames = max_frames
+        self.dump_name = dump_name
+        self.stats: dict = {}
+        self.stopped: set = set()
+
+    def poll(self, pending: List[Path]) -> None:
+        """
+        读取未完成作业新写入的帧，达到帧数预算的作业提前结束
+
+        参数:
+            pending: 未完成的作业目录
+        """
+        for job_dir in pending:
+            if job_dir in self.stopped:
+                continue
+            stats = self.stats.setdefault(job_dir, DumpStats())
+            self._read_new_frames(job_dir / self.dump_name, stats)
+            if stats.n_frames >= self.max_frames:
+                self._stop(job_dir, stats)
+
+    def log_summary(self) -> None:
+        """记录各条件的 gamma 统计"""
+        logger = self.task_manager.logger
+        for job_dir, stats in self.stats.items():
+            stopped = "（提前结束）" if job_dir in self.stopped else ""
+            logger.info(f"  {job_dir.name}: {stats.summary()}{stopped}")
+
+    def _stop(self, job_dir: Path, stats: DumpStats) -> None:
+        """提前结束一个作业"""
+        tm = self.task_manager
+        self.stopped.add(job_dir)
+        tm.logger.info(
+            f"  {job_dir.name}: 已收集 {stats.n_frames} 帧高 Gamma 结构"
+            f"（预算 {self.max_frames}），提前结束探索"
+        )
+        tm.logger.info(f"    {stats.summary()}")
+        if tm.cancel_job(job_dir):
+            # 被取消的作业不会写入 DONE，由监控代为标记完成
+            (job_dir / "DONE").touch()
+            (job_dir.parent / done_sentinel_name(job_dir)).touch()
+            tm.logger.info(f"    已取消作业 {tm.job_ids[job_dir]}")
+        else:
+            (job_dir / STOP_FILE).touch()
+            tm.logger.info(f"    已写入停止信号: {job_dir / STOP_FILE}")
+
+    @staticmethod
+    def _read_new_frames(dump_file: Path, stats: DumpStats) -> None:
+        """从上次解析的位置读取完整的新帧（末尾未写完的帧留到下次）"""
+        try:
+            size = dump_file.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < stats.offset:
+            # 文件被重写，重新统计
+            stats.reset()
+        if size == stats.offset:
+            return
+
+        with open(dump_file, "rb") as f:
+            f.seek(stats.offset)
+            data = f.read(size - stats.offset)
+
+        # The last element is the (possibly empty) unterminated tail
+        lines = data.split(b"\n")
+        n_complete = len(lines) - 1
+        pos = consumed = 0
+        while pos < n_complete:
+            if not lines[pos].strip():
+                consumed += len(lines[pos]) + 1
+                pos += 1
+                continue
+            try:
+                n_atoms = int(lines[pos])
+            except ValueError:
+                break
+            end = pos + 2 + n_atoms
+            if end > n_complete:
+                break
+            stats.add(_frame_max_gamma(lines[pos + 1], lines[pos + 2 : end]))
+            consumed += sum(len(line) + 1 for line in lines[pos:end])
+            pos = end
+        stats.offset += consumed
+
+
+def _frame_max_gamma(comment: bytes, atom_lines: List[bytes]) -> Optional[float]:
+    """
+    从 extxyz 帧中取最大 gamma
+
+    参数:
+        comment: 帧的注释行（含 Properties=...）
+        atom_lines: 原子行
+
+    返回:
+        最大 gamma，Properties 中没有 gamma 列时返回 None
+    """
+    match = _PROPERTIES_RE.search(comment)
+    if match is None or not atom_lines:
+        return None
+    fields = match.group(1).decode().split(":")
+    column = 0
+    for name, _, count in zip(fields[::3], fields[1::3], fields[2::3]):
+        if name.lower() == "gamma":
+            return max(float(line.split()[column]) for line in atom_lines)
+        column += int(count)
+    return None
+
+
+def _make_array_script(job_script: str, task_list: Path) -> str:
+    """
+    生成作业数组脚本
+
+    保留原作业脚本开头的调度系统指令（#PBS / #SBATCH 等），
+    子任务根据数组编号进入 task_list 中对应的目录，执行该目录下的 job.sh。
+
+    参数:
+        job_script: 原始作业脚本内容
+        task_list: 作业目录列表文件（每行一个绝对路径）
+
+    返回:
+        作业数组脚本内容
+    """
+    header = []
+    for line in job_script.strip().splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#!") or stripped.startswith(_DIRECTIVE_PREFIXES):
+            header.append(line)
+        elif stripped and not stripped.startswith("#"):
+            break
+    if not header or not header[0].startswith("#!"):
+        header.insert(0, "#!/bin/bash")
+
+    body = f"""
+# 自动生成：作业数组，每个子任务运行 task_list.txt 中对应目录的 job.sh
+TASK_ID=${{SLURM_ARRAY_TASK_ID:-${{PBS_ARRAY_INDEX:-${{PBS_ARRAYID:-0}}}}}}
+TASK_DIR=$(sed -n "$((TASK_ID + 1))p" "{task_list}")
+cd "$TASK_DIR" || exit 1
+# job.sh 中的 cd $PBS_O_WORKDIR 等应进入子任务目录
+export PBS_O_WORKDIR="$TASK_DIR" SLURM_SUBMIT_DIR="$TASK_DIR"
+bash job.sh
+"""
+    return "\n".join(header) + "\n" + body
 
 
 class IterationManager:
@@ -159,6 +666,12 @@ class IterationManager:
         self.logger = logger
         self.work_dir = config.global_config.work_dir
         self.task_manager = TaskManager(config, logger)
+        self.stager = Stager(
+            config.global_config.stage_mode, config.global_config.stage_workers
+        )
+        self.train_store = TrainStore(self.work_dir / "train_store")
+        # scandir / inotify 后端需要作业脚本在父目录写入哨兵文件
+        self.job_sentinel = config.global_config.completion_backend in SENTINEL_BACKENDS
 
     def run_gpumd(self, iter_num: int) -> bool:
         """
@@ -175,13 +688,54 @@ class IterationManager:
         self.logger.info("=" * 80)
 
         iter_dir = self.work_dir / f"iter_{iter_num}"
-        gpumd_dir = iter_dir / "gpumd"
 
         # 检查是否已经运行过
         if (iter_dir / "large_gamma.xyz").exists():
             self.logger.info("GPUMD 探索已完成，跳过此步骤")
             return True
 
+        job_dirs = self._prepare_gpumd(iter_num)
+        if job_dirs is None:
+            return False
+
+        # 提交所有作业
+        self.logger.info(f"提交 {len(job_dirs)} 个 GPUMD 作业...")
+        for job_dir in job_dirs:
+            if not self.task_manager.submit_job(job_dir):
+                return False
+
+        # 等待完成（启用探索监控时达到帧数预算的条件提前结束）
+        monitor = self._create_monitor()
+        if not self.task_manager.wait_for_completion(
+            job_dirs, timeout=self.config.gpumd.timeout, monitor=monitor
+        ):
+            return False
+        if monitor is not None:
+            monitor.log_summary()
+
+        # 合并所有 extrapolation_dump.xyz
+        self._merge_large_gamma(iter_dir, job_dirs)
+        return True
+
+    def _create_monitor(self) -> Optional[ExplorationMonitor]:
+        """gpumd.max_dump_frames > 0 时创建 GPUMD 探索监控"""
+        if self.config.gpumd.max_dump_frames <= 0:
+            return None
+        return ExplorationMonitor(self.task_manager, self.config.gpumd.max_dump_frames)
+
+    def _prepare_gpumd(self, iter_num: int) -> Optional[List[Path]]:
+        """
+        准备 GPUMD 探索目录（不存在时创建），返回各条件的作业目录
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            作业目录列表，失败时返回 None
+        """
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+        gpumd_dir = iter_dir / "gpumd"
+
         # 如果GPUMD目录不存在，尝试准备它
         if not gpumd_dir.exists():
             self.logger.info("GPUMD 目录不存在，准备创建...")
@@ -193,17 +747,20 @@ class IterationManager:
                 if not prev_iter_dir.exists():
                     self.logger.error(f"上一轮目录不存在: {prev_iter_dir}")
                     self.logger.error("请确保从 iter_1 开始或使用 --start-iter 1")
-                    return False
+                    return None
 
-                # 复制必要文件
-                for filename in ["nep.txt", "active_set.asi", "train.xyz"]:
+                # 复制必要文件（训练集在 train_store 中，不复制）
+                for filename in ["nep.txt", "active_set.asi"]:
                     src = prev_iter_dir / filename
                     if src.exists():
-                        shutil.copy2(src, iter_dir / filename)
+                        self.stager.stage(src, iter_dir / filename)
                         self.logger.info(f"  复制: {filename}")
                     else:
                         self.logger.error(f"  文件不存在: {src}")
-                        return False
+                        return None
+
+                # 活跃集状态和二进制 ASI（可选）
+                self._stage_active_set_state(prev_iter_dir, iter_dir)
 
             elif iter_num == 1:
                 # iter_1 从用户提供的初始文件获取
@@ -217,26 +774,34 @@ class IterationManager:
                     self.logger.info(f"  复制初始 NEP 模型: {nep_src.name}")
                 else:
                     self.logger.error(f"  初始 NEP 模型不存在: {nep_src}")
-                    return False
+                    return None
 
-                # 复制初始 train.xyz
+                # 初始训练集作为 train_store 的第 0 个分片
+                # （已导入时保留，之后标注的分片不受影响）
                 train_src = Path(self.config.global_config.initial_train_data)
-                if train_src.exists():
-                    shutil.copy2(train_src, iter_dir / "train.xyz")
-                    self.logger.info(f"  复制初始训练数据: {train_src.name}")
+                if not self.train_store.is_empty():
+                    self.logger.info("  train_store 中已有训练数据，不重新导入")
+                elif train_src.exists():
+                    self.train_store.import_file(0, train_src)
+                    self.logger.info(f"  导入初始训练数据: {train_src.name}")
                 else:
                     self.logger.error(f"  初始训练数据不存在: {train_src}")
-                    return False
+                    return None
 
                 # 生成活跃集
                 self.logger.info("  从初始数据生成活跃集...")
                 try:
-                    train_structures = read_trajectory(str(iter_dir / "train.xyz"))
+                    train_structures = self.train_store.read(upto=0)
                     active_set_result, _ = select_active_set(
                         trajectory=train_structures,
                         nep_file=str(iter_dir / "nep.txt"),
                         gamma_tol=self.config.selection.gamma_tol,
                         batch_size=self.config.selection.batch_size,
+                        method=self.config.selection.maxvol_method,
+                        cache_dir=self.config.selection.descriptor_cache_dir,
+                        n_workers=self.config.selection.n_workers,
+                        element_workers=self.config.selection.maxvol_workers,
+                        state_output_path=iter_dir / "active_set.npz",
                     )
                     write_asi_file(
                         active_set_result.inverse_dict,
@@ -248,37 +813,14 @@ class IterationManager:
                     self.logger.info(f"  活跃集包含 {total} 个环境")
                 except Exception as e:
                     self.logger.error(f"  生成活跃集失败: {e}")
-                    return False
+                    return None
 
             else:
                 self.logger.error("iter_num 必须 >= 1")
-                return False
+                return None
 
             # 创建 GPUMD 目录结构
-            gpumd_dir.mkdir(parents=True, exist_ok=True)
-
-            # 为每个条件创建目录
-            for cond in self.config.gpumd.conditions:
-                cond_dir = gpumd_dir / cond.id
-                cond_dir.mkdir(parents=True, exist_ok=True)
-                self.logger.info(f"  创建条件目录: {cond.id}")
-
-                # 复制结构文件
-                structure_dst = cond_dir / "model.xyz"
-                shutil.copy2(cond.structure_file, structure_dst)
-
-                # 复制 NEP 和活跃集
-                shutil.copy2(iter_dir / "nep.txt", cond_dir / "nep.txt")
-                shutil.copy2(iter_dir / "active_set.asi", cond_dir / "active_set.asi")
-
-                # 写入 run.in
-                with open(cond_dir / "run.in", "w") as f:
-                    f.write(cond.run_in_content)
-
-                # 写入作业脚本（自动添加 DONE 标记）
-                with open(cond_dir / "job.sh", "w") as f:
-                    f.write(_ensure_done_marker(self.config.gpumd.job_script))
-
+            self._create_condition_dirs(iter_dir, gpumd_dir)
             self.logger.info("GPUMD 目录准备完成")
 
         # 收集所有条件目录
@@ -287,47 +829,147 @@ class IterationManager:
             cond_dir = gpumd_dir / cond.id
             if not cond_dir.exists():
                 self.logger.error(f"条件目录不存在: {cond_dir}")
-                return False
+                return None
             job_dirs.append(cond_dir)
 
-        # 提交所有作业
-        self.logger.info(f"提交 {len(job_dirs)} 个 GPUMD 作业...")
-        for job_dir in job_dirs:
-            if not self.task_manager.submit_job(job_dir):
-                return False
+        return job_dirs
 
-        # 等待完成
-        if not self.task_manager.wait_for_completion(
-            job_dirs, timeout=self.config.gpumd.timeout
-        ):
-            return False
+    def _create_condition_dirs(self, iter_dir: Path, gpumd_dir: Path) -> None:
+        """
+        为每个 GPUMD 条件创建作业目录
 
-        # 合并所有 extrapolation_dump.xyz
+        model.xyz、nep.txt 和 active_set.asi 按 global.stage_mode 暂存，
+        各条件目录在线程池中并行创建。
+
+        参数:
+            iter_dir: 迭代目录（提供 nep.txt 和 active_set.asi）
+            gpumd_dir: GPUMD 根目录
+        """
+        job_script = _ensure_done_marker(
+            self.config.gpumd.job_script, sentinel=self.job_sentinel
+        )
+
+        def create(cond: GpumdCondition) -> None:
+            cond_dir = gpumd_dir / cond.id
+            cond_dir.mkdir(parents=True, exist_ok=True)
+
+            # 结构文件、NEP 和活跃集
+            self.stager.stage(cond.structure_file, cond_dir / "model.xyz")
+            self.stager.stage(iter_dir / "nep.txt", cond_dir / "nep.txt")
+            self.stager.stage(iter_dir / "active_set.asi", cond_dir / "active_set.asi")
+
+            # 写入 run.in
+            with open(cond_dir / "run.in", "w") as f:
+                f.write(cond.run_in_content)
+
+            # 写入作业脚本（自动添加 DONE 标记）
+            with open(cond_dir / "job.sh", "w") as f:
+                f.write(job_script)
+
+        gpumd_dir.mkdir(parents=True, exist_ok=True)
+        self.stager.run(create, self.config.gpumd.conditions)
+        self.logger.info(
+            f"  创建 {len(self.config.gpumd.conditions)} 个条件目录: "
+            f"{self.stager.summary()}"
+        )
+
+    def _stage_active_set_state(self, src_dir: Path, dst_dir: Path) -> None:
+        """
+        将活跃集状态和二进制 ASI（存在时）带到下一轮目录
+
+        active_set.npz 会被原地重写，始终复制；二进制 ASI 以替换方式写入，按策略暂存。
+        """
+        for filename in ["active_set.npz", "active_set.asi.bin"]:
+            src = src_dir / filename
+            if src.exists():
+                self.stager.stage(
+                    src,
+                    dst_dir / filename,
+                    mode="copy" if filename == "active_set.npz" else None,
+                )
+
+    def _ensure_train_store(self, iter_num: int) -> None:
+        """
+        train_store 为空时导入第 iter_num 轮之前的训练集
+
+        依次尝试旧版工作目录中的 iter_N/train.xyz、（第 1 轮）初始训练集和
+        iter_{N-1}/train.xyz，导入为第 N-1 轮的分片。
+
+        参数:
+            iter_num: 当前迭代编号
+
+        异常:
+            FileNotFoundError: 找不到可导入的训练集时抛出
+        """
+        if not self.train_store.is_empty():
+            return
+
+        candidates = [self.work_dir / f"iter_{iter_num}" / "train.xyz"]
+        if iter_num == 1:
+            candidates.append(Path(self.config.global_config.initial_train_data))
+        else:
+            candidates.append(self.work_dir / f"iter_{iter_num - 1}" / "train.xyz")
+
+        for source in candidates:
+            if source.exists():
+                n = self.train_store.import_file(iter_num - 1, source)
+                self.logger.info(f"导入训练集到 train_store: {source}（{n} 个结构）")
+                return
+        raise FileNotFoundError(
+            f"train_store 为空且找不到可导入的训练集: {', '.join(map(str, candidates))}"
+        )
+
+    def _read_train_set(self, iter_num: int, labelled: bool = False) -> List[Atoms]:
+        """
+        读取第 iter_num 轮的训练集
+
+        参数:
+            iter_num: 当前迭代编号
+            labelled: True 时包含本轮 DFT 标注的结构，False 时为本轮标注之前的训练集
+
+        返回:
+            训练集结构列表
+        """
+        self._ensure_train_store(iter_num)
+        return self.train_store.read(upto=iter_num if labelled else iter_num - 1)
+
+    def _merge_large_gamma(self, iter_dir: Path, job_dirs: List[Path]) -> int:
+        """
+        流式合并各条件的 extrapolation_dump.xyz 到 large_gamma.xyz
+
+        参数:
+            iter_dir: 迭代目录
+            job_dirs: GPUMD 作业目录列表
+
+        返回:
+            合并的结构数
+        """
         self.logger.info("\n合并高 Gamma 结构...")
         large_gamma_file = iter_dir / "large_gamma.xyz"
 
-        all_structures = []
-        for job_dir in job_dirs:
-            dump_file = job_dir / "extrapolation_dump.xyz"
-            if dump_file.exists():
-                try:
-                    structures = read_trajectory(str(dump_file))
-                    all_structures.extend(structures)
-                    self.logger.info(f"  {job_dir.name}: {len(structures)} 个结构")
-                except Exception as e:
-                    self.logger.warning(f"  读取 {dump_file} 失败: {e}")
+        # 流式追加到临时文件，完成后再重命名
+        # （large_gamma.xyz 存在即表示本步骤已完成）
+        tmp_file = iter_dir / ".large_gamma.xyz.tmp"
+        tmp_file.unlink(missing_ok=True)
+        tmp_file.touch()
+        counts = stream_trajectory(
+            [job_dir / "extrapolation_dump.xyz" for job_dir in job_dirs],
+            tmp_file,
+            chunk_size=self.config.selection.candidate_chunk_size,
+        )
+        for job_dir, count in zip(job_dirs, counts):
+            self.logger.info(f"  {job_dir.name}: {count} 个结构")
+        tmp_file.replace(large_gamma_file)
 
         # 保存合并结果
-        if all_structures:
-            write_trajectory(all_structures, str(large_gamma_file))
-            self.logger.info(f"总共收集到 {len(all_structures)} 个高 Gamma 结构")
+        n_total = sum(counts)
+        if n_total > 0:
+            self.logger.info(f"总共收集到 {n_total} 个高 Gamma 结构")
             self.logger.info(f"保存到: {large_gamma_file}")
         else:
-            # 创建空文件
-            large_gamma_file.touch()
             self.logger.info("未收集到高 Gamma 结构（训练可能已收敛）")
 
-        return True
+        return n_total
 
     def select_structures(self, iter_num: int) -> List[Atoms]:
         """
@@ -344,7 +986,6 @@ class IterationManager:
         self.logger.info("=" * 80)
 
         iter_dir = self.work_dir / f"iter_{iter_num}"
-        train_file = iter_dir / "train.xyz"
         large_gamma_file = iter_dir / "large_gamma.xyz"
         nep_file = iter_dir / "nep.txt"
 
@@ -358,49 +999,205 @@ class IterationManager:
             self.logger.info("large_gamma.xyz 为空，没有新结构需要标注")
             return []
 
-        # 读取文件
-        train_structures = read_trajectory(str(train_file))
-        candidate_structures = read_trajectory(str(large_gamma_file))
+        # 读取本轮标注之前的训练集
+        train_structures = self._read_train_set(iter_num)
+        # 候选结构流式读取，逐块参与 MaxVol，不整体载入内存
+        candidate_structures = iter_trajectory(large_gamma_file)
+
+        self.logger.info(f"训练集结构数: {len(train_structures)}")
+
+        return self._select_candidates(
+            train_structures,
+            candidate_structures,
+            nep_file,
+            max_count=self.config.global_config.max_structures_per_iteration,
+        )
+
+    def _select_candidates(
+        self,
+        train_structures: List[Atoms],
+        candidate_structures: Iterable[Atoms],
+        nep_file: Path,
+        max_count: int,
+        selected_before: Optional[List[Atoms]] = None,
+    ) -> List[Atoms]:
+        """
+        MaxVol 选择候选结构，超过 max_count 时用 FPS 或按预算贪心选择截断
 
-        self.logger.info(f"训练集结构数: {len(train_structures)}")
-        self.logger.info(f"候选结构数: {len(candidate_structures)}")
+        启用团簇提取时先切割团簇，再对子结构应用 max_count，
+        返回的结构数（即 VASP 任务数）不超过 max_count。
+
+        参数:
+            train_structures: 当前训练集
+            candidate_structures: 候选结构（列表或生成器）
+            nep_file: NEP 势函数文件路径
+            max_count: 最多返回的结构数
+            selected_before: 本轮已选中的结构，视为训练集的一部分
 
-        # 执行 MaxVol 选择
+        返回:
+            选中的结构列表
+        """
+        # 执行 MaxVol 选择（启用 FPS 时同一次 NEP 计算同时得到平均描述符）
         self.logger.info("\n执行 MaxVol 选择...")
-        selected = select_extension_structures(
-            train_trajectory=train_structures,
-            candidate_trajectory=candidate_structures,
-            nep_file=str(nep_file),
-            gamma_tol=self.config.selection.gamma_tol,
-            batch_size=self.config.selection.batch_size,
-        )
+        fps_enabled = self.config.selection.fps_enabled
+        selected_before = selected_before or []
+        state = None
+        if self.config.selection.reuse_active_set:
+            state = self._load_active_set_state(nep_file)
+
+        if state is not None:
+            result = select_extension_from_active_set(
+                candidate_trajectory=candidate_structures,
+                nep_file=str(nep_file),
+                state=state,
+                reference_trajectory=selected_before,
+                gamma_tol=self.config.selection.gamma_tol,
+                batch_size=self.config.selection.batch_size,
+                method=self.config.selection.maxvol_method,
+                n_workers=self.config.selection.n_workers,
+                chunk_size=self.config.selection.candidate_chunk_size,
+                with_descriptors=fps_enabled,
+            )
+        else:
+            result = select_extension_structures(
+                train_trajectory=train_structures + selected_before,
+                candidate_trajectory=candidate_structures,
+                nep_file=str(nep_file),
+                gamma_tol=self.config.selection.gamma_tol,
+                batch_size=self.config.selection.batch_size,
+                method=self.config.selection.maxvol_method,
+                cache_dir=self.config.selection.descriptor_cache_dir,
+                n_workers=self.config.selection.n_workers,
+                element_workers=self.config.selection.maxvol_workers,
+                chunk_size=self.config.selection.candidate_chunk_size,
+                with_descriptors=fps_enabled,
+            )
+        selected, descriptors = result if fps_enabled else (result, None)
 
         self.logger.info(f"MaxVol 选中 {len(selected)} 个结构")
 
-        # FPS 二次筛选（可选）
-        max_structures = self.config.global_config.max_structures_per_iteration
+        # 先切割团簇再按预算截断：每个结构可能切出多个子结构，预算按最终提交的结构数计
+        if self.config.selection.extract_clusters and selected:
+            clusters = self._extract_clusters(selected, nep_file)
+            if clusters is not selected:
+                # 平均描述符属于原结构，FPS 需要为子结构重新计算
+                selected, descriptors = clusters, None
 
-        if self.config.selection.fps_enabled and len(selected) > max_structures:
+        # FPS 二次筛选（可选）
+        if fps_enabled and len(selected) > max_count:
             self.logger.info("\n启用 FPS 二次筛选...")
-            from .maxvol import apply_fps_filter
+            from .maxvol import apply_fps_filter, compute_descriptor_projection
+
+            reference_descriptors = None
+            if self.config.selection.fps_seed_with_train:
+                # 训练集（及本轮已选结构）的平均描述符作为 FPS 起点
+                reference_descriptors = compute_descriptor_projection(
+                    train_structures + selected_before,
+                    str(nep_file),
+                    show_progress=False,
+                    cache_dir=self.config.selection.descriptor_cache_dir,
+                    require_tall=False,
+                    n_workers=self.config.selection.n_workers,
+                    with_descriptors=True,
+                ).mean_descriptors
 
             selected = apply_fps_filter(
                 structures=selected,
                 nep_file=str(nep_file),
-                max_count=max_structures,
-                initial_min_distance=self.config.selection.fps_min_distance,
+                max_count=max_count,
+                min_distance=self.config.selection.fps_min_distance,
                 show_progress=False,  # 不显示进度条，避免日志混乱
+                n_workers=self.config.selection.n_workers,
+                descriptors=descriptors,
+                reference_descriptors=reference_descriptors,
             )
             self.logger.info(f"FPS 筛选后: {len(selected)} 个结构")
-        elif len(selected) > max_structures:
-            # 传统方式：随机丢弃
-            self.logger.info(f"限制为 {max_structures} 个结构（随机选择）")
-            random.seed(42)  # 保证可重复性
-            random.shuffle(selected)
-            selected = selected[:max_structures]
+        elif len(selected) > max_count:
+            # 按最大 gamma 和新环境覆盖贪心填满预算
+            asi_file = nep_file.parent / "active_set.asi"
+            if asi_file.exists():
+                self.logger.info(f"按预算选择 {max_count} 个结构（gamma + 新环境覆盖）")
+                selected = select_within_budget(
+                    selected,
+                    str(nep_file),
+                    read_asi_file(asi_file),
+                    max_count,
+                    gamma_tol=self.config.selection.gamma_tol,
+                    reference_trajectory=selected_before,
+                    cache_dir=self.config.selection.descriptor_cache_dir,
+                    n_workers=self.config.selection.n_workers,
+                )
+            else:
+                self.logger.warning(
+                    f"活跃集文件不存在: {asi_file}，保留 MaxVol 选出的前 {max_count} 个结构"
+                )
+                selected = selected[:max_count]
 
+        self.logger.info(f"最终选中 {len(selected)} 个结构（预算 {max_count}）")
         return selected
 
+    def _extract_clusters(self, structures: List[Atoms], nep_file: Path) -> List[Atoms]:
+        """
+        围绕高 Gamma 原子切出子结构，减小 DFT 计算的晶胞
+
+        参数:
+            structures: 筛选出的结构
+            nep_file: 当前 NEP 势函数文件路径（同目录下需有 active_set.asi）
+
+        返回:
+            切割后的结构列表（活跃集文件不存在时原样返回）
+        """
+        asi_file = nep_file.parent / "active_set.asi"
+        if not asi_file.exists():
+            self.logger.warning(f"活跃集文件不存在: {asi_file}，跳过团簇提取")
+            return structures
+
+        selection = self.config.selection
+        self.logger.info("\n提取高 Gamma 原子环境团簇...")
+        clusters = extract_clusters(
+            structures,
+            nep_file,
+            read_asi_file(asi_file),
+            gamma_threshold=selection.gamma_tol,
+            mode=selection.cluster_mode,
+            buffer=selection.cluster_buffer,
+            vacuum=selection.cluster_vacuum,
+            max_per_structure=selection.cluster_max_per_structure,
+            dedup_tol=selection.cluster_dedup_tol,
+            n_workers=selection.n_workers,
+        )
+        n_before = sum(len(atoms) for atoms in structures)
+        n_after = sum(len(atoms) for atoms in clusters)
+        self.logger.info(
+            f"团簇提取: {len(structures)} → {len(clusters)} 个结构，"
+            f"原子总数 {n_before} → {n_after}"
+        )
+        return clusters
+
+    def _load_active_set_state(self, nep_file: Path) -> Optional[ActiveSetState]:
+        """
+        读取与 nep_file 同目录的活跃集状态，缺失或与模型不一致时返回 None
+
+        参数:
+            nep_file: 当前 NEP 势函数文件路径
+
+        返回:
+            活跃集状态，不可用时返回 None（调用方回退到合并训练集计算）
+        """
+        state_file = active_set_state_path(nep_file.parent / "active_set.asi")
+        try:
+            state = read_active_set_state(state_file)
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(
+                f"无法读取活跃集状态 {state_file}（{e}），改为合并训练集计算"
+            )
+            return None
+        if state.model_hash != hash_file(nep_file):
+            self.logger.warning("活跃集状态与当前模型不一致，改为合并训练集计算")
+            return None
+        self.logger.info(f"基于已保存的活跃集筛选: {state_file}")
+        return state
+
     def run_vasp(self, iter_num: int, structures: List[Atoms]) -> bool:
         """
         运行 VASP DFT 计算
@@ -424,77 +1221,127 @@ class IterationManager:
         vasp_dir = iter_dir / "vasp"
         vasp_dir.mkdir(parents=True, exist_ok=True)
 
-        # 为每个结构创建计算目录
-        job_dirs = []
-        for i, structure in enumerate(structures):
-            task_dir = vasp_dir / f"task_{i:04d}"
-            task_dir.mkdir(parents=True, exist_ok=True)
-
-            # 写入 POSCAR
-            from ase.io import write as ase_write
-
-            ase_write(str(task_dir / "POSCAR"), structure, format="vasp")
-
-            # 复制输入文件
-            shutil.copy2(self.config.vasp.incar_file, task_dir / "INCAR")
-            shutil.copy2(self.config.vasp.potcar_file, task_dir / "POTCAR")
-            shutil.copy2(self.config.vasp.kpoints_file, task_dir / "KPOINTS")
-
-            # 写入作业脚本（自动添加 DONE 标记）
-            with open(task_dir / "job.sh", "w") as f:
-                f.write(_ensure_done_marker(self.config.vasp.job_script))
-
-            job_dirs.append(task_dir)
-
+        job_dirs = self._create_vasp_tasks(vasp_dir, structures)
         self.logger.info(f"创建了 {len(job_dirs)} 个 VASP 计算任务")
 
-        # 提交所有作业
+        # 提交所有作业（配置了 array_submit_command 时以作业数组一次提交）
         self.logger.info("\n提交 VASP 作业...")
-        for job_dir in job_dirs:
-            if not self.task_manager.submit_job(job_dir):
-                return False
+        if not self._submit_vasp_tasks(job_dirs, vasp_dir):
+            return False
 
-        # 等待完成
+        # 等待完成（失败的任务没有 OUTCAR，在下面的结果收集中统计）
         if not self.task_manager.wait_for_completion(
-            job_dirs, timeout=self.config.vasp.timeout
+            job_dirs, timeout=self.config.vasp.timeout, allow_failures=True
         ):
             return False
 
         # 收集结果并追加到训练集
-        self.logger.info("\n收集 DFT 计算结果...")
-        train_file = iter_dir / "train.xyz"
-        new_structures = []
-        failed_tasks = []  # 记录失败的任务
+        return self._collect_vasp_results(iter_num, job_dirs)
 
-        for i, job_dir in enumerate(job_dirs):
-            outcar_file = job_dir / "OUTCAR"
+    def _create_vasp_tasks(
+        self, vasp_dir: Path, structures: List[Atoms], start_index: int = 0
+    ) -> List[Path]:
+        """
+        为每个结构创建 VASP 计算目录
 
-            if not outcar_file.exists():
-                self.logger.warning(f"  任务 {i}: OUTCAR 文件不存在: {job_dir.name}")
-                failed_tasks.append((i, job_dir.name, "OUTCAR不存在"))
-                continue
+        参数:
+            vasp_dir: VASP 计算根目录
+            structures: 待计算的结构列表
+            start_index: 第一个任务的编号（task_XXXX）
 
-            try:
-                from ase.io import read as ase_read
+        返回:
+            任务目录列表
+        """
+        from ase.io import write as ase_write
+
+        job_script = _ensure_done_marker(
+            self.config.vasp.job_script, sentinel=self.job_sentinel
+        )
+        job_dirs = [
+            vasp_dir / f"task_{i:04d}"
+            for i in range(start_index, start_index + len(structures))
+        ]
+
+        def create(task: Tuple[Path, Atoms]) -> None:
+            task_dir, structure = task
+            task_dir.mkdir(parents=True, exist_ok=True)
 
-                structure = ase_read(str(outcar_file), format="vasp-out")
+            # 写入 POSCAR
+            ase_write(str(task_dir / "POSCAR"), structure, format="vasp")
 
-                # 验证结构是否包含必要的信息
-                if not hasattr(structure, "get_potential_energy"):
-                    raise ValueError("结构缺少能量信息")
+            # 暂存共享输入文件
+            self.stager.stage(self.config.vasp.incar_file, task_dir / "INCAR")
+            self.stager.stage(self.config.vasp.potcar_file, task_dir / "POTCAR")
+            self.stager.stage(self.config.vasp.kpoints_file, task_dir / "KPOINTS")
+
+            # 写入作业脚本（自动添加 DONE 标记）
+            with open(task_dir / "job.sh", "w") as f:
+                f.write(job_script)
 
-                # 尝试获取能量和力，确保数据完整
-                _ = structure.get_potential_energy()
-                forces = structure.get_forces()
+        # 为每个结构创建计算目录（线程池并行写入）
+        self.stager.run(create, list(zip(job_dirs, structures)))
+        self.logger.info(f"  {self.stager.summary()}")
 
-                if forces is None or len(forces) == 0:
-                    raise ValueError("结构缺少力信息")
+        return job_dirs
 
-                new_structures.append(structure)
+    def _submit_vasp_tasks(self, job_dirs: List[Path], vasp_dir: Path) -> bool:
+        """
+        提交 VASP 任务（配置了 array_submit_command 时以作业数组一次提交）
 
-            except Exception as e:
-                self.logger.warning(f"  任务 {i}: 读取 {outcar_file.name} 失败: {e}")
-                failed_tasks.append((i, job_dir.name, str(e)))
+        参数:
+            job_dirs: 任务目录列表
+            vasp_dir: VASP 计算根目录（作业数组的提交目录）
+
+        返回:
+            是否提交成功
+        """
+        if self.config.vasp.array_submit_command and len(job_dirs) > 1:
+            vasp_dir.mkdir(parents=True, exist_ok=True)
+            if not self.task_manager.submit_job_array(
+                job_dirs,
+                vasp_dir,
+                self.config.vasp.job_script,
+                self.config.vasp.array_submit_command,
+            ):
+                return False
+        else:
+            for job_dir in job_dirs:
+                if not self.task_manager.submit_job(job_dir):
+                    return False
+
+        return True
+
+    def _collect_vasp_results(self, iter_num: int, job_dirs: List[Path]) -> bool:
+        """
+        收集 VASP 计算结果，写入训练集中本轮的分片
+
+        参数:
+            iter_num: 当前迭代编号
+            job_dirs: 任务目录列表
+
+        返回:
+            是否至少成功收集到一个结构
+        """
+        self.logger.info("\n收集 DFT 计算结果...")
+        start = time.perf_counter()
+        records = harvest_vasp_results(
+            job_dirs,
+            parser=self.config.vasp.outcar_parser,
+            n_workers=self.config.vasp.harvest_workers,
+        )
+        new_structures = [r.atoms for r in records if r.success]
+        failed_tasks = []  # 记录失败的任务
+        for i, record in enumerate(records):
+            if not record.success:
+                self.logger.warning(
+                    f"  任务 {i}: {record.task_dir.name}: {record.error}"
+                )
+                failed_tasks.append((i, record.task_dir.name, record.error))
+        n_fallback = sum(r.source == "vasprun.xml" for r in records)
+        self.logger.info(
+            f"  读取 {len(records)} 个任务耗时 {time.perf_counter() - start:.2f} 秒"
+            + (f"（{n_fallback} 个回退到 vasprun.xml）" if n_fallback else "")
+        )
 
         # 统计结果
         total_tasks = len(job_dirs)
@@ -512,17 +1359,225 @@ class IterationManager:
                 self.logger.info(f"  - {task_name}: {reason}")
 
         if new_structures:
-            # 追加到训练集
-            existing = read_trajectory(str(train_file))
-            all_structures = existing + new_structures
-            write_trajectory(all_structures, str(train_file))
+            # 只写入本轮新增的结构，不重写已有训练集
+            self._ensure_train_store(iter_num)
+            self.train_store.write_shard(iter_num, new_structures)
             self.logger.info(f"\n成功标注 {len(new_structures)} 个结构")
-            self.logger.info(f"训练集更新为 {len(all_structures)} 个结构")
+            self.logger.info(
+                f"训练集更新为 {self.train_store.count(upto=iter_num)} 个结构"
+            )
             return True
         else:
             self.logger.error("未成功收集到任何 DFT 结果")
             return False
 
+    def run_pipelined(self, iter_num: int) -> Optional[List[Atoms]]:
+        """
+        流水线运行 GPUMD 探索、结构筛选和 VASP 标注（步骤 1-3）
+
+        每个 GPUMD 条件完成后立即对其 extrapolation_dump.xyz 执行筛选并提交 VASP 任务，
+        不等待其他条件。每个条件的配额为剩余预算在未完成条件间的均分，
+        已选结构视为训练集的一部分参与后续条件的 MaxVol，
+        因此所有条件合计不超过 max_structures_per_iteration。
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            选中并已完成标注的结构列表（空列表表示收敛），失败时返回 None
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(
+            f"步骤 1-3: GPUMD 探索 / 结构筛选 / VASP 标注（流水线，迭代 {iter_num}）"
+        )
+        self.logger.info("=" * 80)
+
+        result = self._resume_pipelined(iter_num)
+        if result is None:
+            result = self._explore_and_submit(iter_num)
+        if result is None:
+            return None
+        selected_all, vasp_jobs = result
+        if not selected_all:
+            return []
+
+        if not self.task_manager.wait_for_completion(
+            vasp_jobs, timeout=self.config.vasp.timeout, allow_failures=True
+        ):
+            return None
+        if not self._collect_vasp_results(iter_num, vasp_jobs):
+            return None
+        return selected_all
+
+    def _resume_pipelined(
+        self, iter_num: int
+    ) -> Optional[Tuple[List[Atoms], List[Path]]]:
+        """
+        读取流水线模式中已完成的探索和筛选结果（断点续跑）
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            (已选中的结构, VASP 任务目录)，探索和筛选尚未完成时返回 None
+        """
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+        to_add_file = iter_dir / "to_add.xyz"
+
+        # large_gamma.xyz 在 to_add.xyz 之后写入，存在即表示探索和筛选已完成
+        if not (iter_dir / "large_gamma.xyz").exists():
+            return None
+        if not to_add_file.exists():
+            self.logger.info("GPUMD 探索已完成，未选中新结构")
+            return [], []
+        self.logger.info("GPUMD 探索和结构筛选已完成，继续等待 VASP 任务")
+        return (
+            read_trajectory(str(to_add_file)),
+            sorted((iter_dir / "vasp").glob("task_*")),
+        )
+
+    def _explore_and_submit(
+        self, iter_num: int
+    ) -> Optional[Tuple[List[Atoms], List[Path]]]:
+        """
+        提交 GPUMD 作业，按完成顺序逐个条件筛选结构并提交 VASP 任务
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            (所有选中的结构, 所有 VASP 任务目录)，失败时返回 None
+        """
+        job_dirs = self._prepare_gpumd(iter_num)
+        if job_dirs is None:
+            return None
+
+        self.logger.info(f"提交 {len(job_dirs)} 个 GPUMD 作业...")
+        for job_dir in job_dirs:
+            if not self.task_manager.submit_job(job_dir):
+                return None
+
+        train_structures = self._read_train_set(iter_num)
+        self.logger.info(f"训练集结构数: {len(train_structures)}")
+
+        selected_all: List[Atoms] = []
+        vasp_jobs: List[Path] = []
+        n_waiting = len(job_dirs)
+
+        self.logger.info(f"等待 {len(job_dirs)} 个 GPUMD 作业，逐个处理完成的条件...")
+        monitor = self._create_monitor()
+        try:
+            for cond_dir, success in self.task_manager.iter_completed(
+                job_dirs, timeout=self.config.gpumd.timeout, monitor=monitor
+            ):
+                n_waiting -= 1
+                if not self._process_condition(
+                    iter_num,
+                    cond_dir,
+                    success,
+                    n_waiting,
+                    train_structures,
+                    selected_all,
+                    vasp_jobs,
+                ):
+                    return None
+        except TimeoutError as e:
+            self.logger.warning(str(e))
+            return None
+
+        self._finish_exploration(iter_num, job_dirs, selected_all)
+        return selected_all, vasp_jobs
+
+    def _process_condition(
+        self,
+        iter_num: int,
+        cond_dir: Path,
+        success: bool,
+        n_waiting: int,
+        train_structures: List[Atoms],
+        selected_all: List[Atoms],
+        vasp_jobs: List[Path],
+    ) -> bool:
+        """
+        处理一个完成的 GPUMD 条件：筛选结构并创建、提交 VASP 任务
+
+        参数:
+            iter_num: 当前迭代编号
+            cond_dir: 条件目录
+            success: 作业是否成功
+            n_waiting: 尚未完成的条件数（不含本条件）
+            train_structures: 训练集结构
+            selected_all: 之前条件已选中的结构，本条件选中的结构追加到其中
+            vasp_jobs: 已提交的 VASP 任务目录，本条件的任务追加到其中
+
+        返回:
+            是否成功（作业失败或提交失败时返回 False）
+        """
+        if not success:
+            self.logger.error(
+                f"  作业失败: {cond_dir.name}（已离开队列但没有 DONE 文件）"
+            )
+            return False
+        self.logger.info(f"\n  作业完成: {cond_dir.name}")
+
+        dump_file = cond_dir / "extrapolation_dump.xyz"
+        if not dump_file.exists() or dump_file.stat().st_size == 0:
+            self.logger.info(f"  {cond_dir.name}: 没有高 Gamma 结构")
+            return True
+
+        # 剩余预算在尚未处理的条件之间均分
+        budget = self.config.global_config.max_structures_per_iteration
+        quota = -(-(budget - len(selected_all)) // (n_waiting + 1))
+        if quota <= 0:
+            self.logger.info(f"  {cond_dir.name}: 本轮结构预算已用完，跳过")
+            return True
+
+        # 已选结构视为训练集的一部分，避免不同条件选出冗余结构
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+        selected = self._select_candidates(
+            train_structures,
+            iter_trajectory(dump_file),
+            iter_dir / "nep.txt",
+            max_count=quota,
+            selected_before=selected_all,
+        )
+        if not selected:
+            return True
+
+        # 每个条件的作业数组使用独立的提交目录，避免覆盖 task_list.txt
+        vasp_dir = iter_dir / "vasp"
+        submit_dir = vasp_dir / f"submit_{cond_dir.name}"
+        new_jobs = self._create_vasp_tasks(
+            vasp_dir, selected, start_index=len(selected_all)
+        )
+        if not self._submit_vasp_tasks(new_jobs, submit_dir):
+            return False
+        selected_all.extend(selected)
+        vasp_jobs.extend(new_jobs)
+        self.logger.info(
+            f"  {cond_dir.name}: 提交 {len(new_jobs)} 个 VASP 任务"
+            f"（累计 {len(selected_all)}/{budget}）"
+        )
+        return True
+
+    def _finish_exploration(
+        self, iter_num: int, job_dirs: List[Path], selected_all: List[Atoms]
+    ) -> None:
+        """
+        流水线探索结束后的合并：保存所有条件的待标注结构，
+        再写入 large_gamma.xyz 作为完成标记
+
+        参数:
+            iter_num: 当前迭代编号
+            job_dirs: GPUMD 条件目录列表
+            selected_all: 所有条件选中的结构
+        """
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+        if selected_all:
+            write_trajectory(selected_all, str(iter_dir / "to_add.xyz"))
+            self.logger.info(f"\n保存待标注结构: {iter_dir / 'to_add.xyz'}")
+        self._merge_large_gamma(iter_dir, job_dirs)
+
     def run_nep(self, iter_num: int) -> bool:
         """
         运行 NEP 训练
@@ -537,12 +1592,38 @@ class IterationManager:
         self.logger.info(f"步骤 4: NEP 训练（迭代 {iter_num}）")
         self.logger.info("=" * 80)
 
+        nep_dir = self._prepare_nep(iter_num)
+        if nep_dir is None:
+            return False
+
+        # 提交作业
+        if not self.task_manager.submit_job(nep_dir):
+            return False
+
+        # 等待完成
+        if not self.task_manager.wait_for_completion(
+            [nep_dir], timeout=self.config.nep.timeout
+        ):
+            return False
+
+        return self._finish_nep(iter_num, nep_dir)
+
+    def _prepare_nep(self, iter_num: int) -> Optional[Path]:
+        """
+        准备 NEP 训练目录（训练集、模型、nep.in、作业脚本）
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            NEP 训练目录，失败时返回 None
+        """
         iter_dir = self.work_dir / f"iter_{iter_num}"
         nep_dir = iter_dir / "nep_train"
         nep_dir.mkdir(parents=True, exist_ok=True)
 
-        # 复制训练数据
-        train_file = iter_dir / "train.xyz"
+        # 训练数据：由 train_store 的分片拼接生成
+        self._ensure_train_store(iter_num)
         train_xyz_dst = nep_dir / "train.xyz"
 
         # 训练集修剪（可选）
@@ -561,15 +1642,11 @@ class IterationManager:
                 self.logger.error(
                     f"  NEP 模型不存在，无法计算描述符维度: {nep_for_check}"
                 )
-                return False
+                return None
 
             # 从 NEP 文件读取描述符维度
             try:
-                from .maxvol import (
-                    prune_training_set_maxvol,
-                    read_trajectory,
-                    write_trajectory,
-                )
+                from .maxvol import prune_training_set_maxvol
 
                 # 读取 nep.txt 获取描述符维度
                 with open(nep_for_check) as f:
@@ -580,11 +1657,11 @@ class IterationManager:
 
                     temp_calc = NEP(str(nep_for_check))
                     # 计算一个小结构的描述符来获取维度
-                    test_structures = read_trajectory(str(train_file))
-                    if len(test_structures) > 0:
-                        test_desc = temp_calc.get_property(
-                            "descriptor", test_structures[0]
-                        )
+                    test_structure = next(
+                        self.train_store.iter_structures(upto=iter_num), None
+                    )
+                    if test_structure is not None:
+                        test_desc = temp_calc.get_property("descriptor", test_structure)
                         descriptor_dim = test_desc.shape[1]
                         self.logger.info(f"  描述符维度: {descriptor_dim}")
 
@@ -597,17 +1674,20 @@ class IterationManager:
                             f"(维度 {descriptor_dim} × {self.config.nep.max_structures_factor})"
                         )
 
-                        # 读取训练集
-                        train_structures = read_trajectory(str(train_file))
-                        self.logger.info(f"  当前训练集大小: {len(train_structures)}")
+                        # 只有需要修剪时才读取整个训练集
+                        n_train = self.train_store.count(upto=iter_num)
+                        self.logger.info(f"  当前训练集大小: {n_train}")
 
-                        if len(train_structures) > max_structures:
+                        if n_train > max_structures:
                             # 执行修剪
+                            train_structures = self.train_store.read(upto=iter_num)
                             pruned_structures = prune_training_set_maxvol(
                                 structures=train_structures,
                                 nep_file=str(nep_for_check),
                                 max_structures=max_structures,
                                 show_progress=False,
+                                n_workers=self.config.selection.n_workers,
+                                method=self.config.selection.maxvol_method,
                             )
 
                             # 保存修剪后的训练集
@@ -616,20 +1696,21 @@ class IterationManager:
                                 f"  ✓ 训练集已修剪: {len(train_structures)} → {len(pruned_structures)}"
                             )
                         else:
-                            # 不需要修剪，直接复制
-                            shutil.copy2(train_file, train_xyz_dst)
+                            # 不需要修剪，直接拼接
+                            self.train_store.materialize(train_xyz_dst, upto=iter_num)
                             self.logger.info("  训练集大小适中，无需修剪")
                     else:
                         # 训练集为空
-                        shutil.copy2(train_file, train_xyz_dst)
+                        self.train_store.materialize(train_xyz_dst, upto=iter_num)
 
             except Exception as e:
-                self.logger.warning("  训练集修剪失败: {e}")
-                self.logger.warning("  回退到直接复制模式")
-                shutil.copy2(train_file, train_xyz_dst)
+                self.logger.warning(f"  训练集修剪失败: {e}")
+                self.logger.warning("  回退到直接拼接模式")
+                self.train_store.materialize(train_xyz_dst, upto=iter_num)
         else:
-            # 未启用修剪，直接复制
-            shutil.copy2(train_file, train_xyz_dst)
+            # 未启用修剪，直接拼接分片
+            n_train = self.train_store.materialize(train_xyz_dst, upto=iter_num)
+            self.logger.info(f"  生成训练集: {train_xyz_dst}（{n_train} 个结构）")
 
         # 复制 nep.txt 和 nep.restart（用于继续训练）
         # iter_1: 从用户提供的初始文件
@@ -644,14 +1725,14 @@ class IterationManager:
                 self.logger.info("  复制初始 nep.txt")
             else:
                 self.logger.error(f"  初始 nep.txt 不存在: {nep_src}")
-                return False
+                return None
 
             if restart_src.exists():
                 shutil.copy2(restart_src, nep_dir / "nep.restart")
                 self.logger.info("  复制初始 nep.restart")
             else:
                 self.logger.error(f"  初始 nep.restart 不存在: {restart_src}")
-                return False
+                return None
 
         else:
             # 后续轮次：从上一轮复制
@@ -663,7 +1744,7 @@ class IterationManager:
                 self.logger.info("  复制上一轮的 nep.txt")
             else:
                 self.logger.error(f"  上一轮的 nep.txt 不存在: {nep_src}")
-                return False
+                return None
 
             restart_src = prev_iter_dir / "nep.restart"
             if restart_src.exists():
@@ -679,33 +1760,43 @@ class IterationManager:
 
         # 写入作业脚本（自动添加 DONE 标记）
         with open(nep_dir / "job.sh", "w") as f:
-            f.write(_ensure_done_marker(self.config.nep.job_script))
+            f.write(
+                _ensure_done_marker(
+                    self.config.nep.job_script, sentinel=self.job_sentinel
+                )
+            )
 
         self.logger.info(f"NEP 训练目录: {nep_dir}")
 
-        # 提交作业
-        if not self.task_manager.submit_job(nep_dir):
-            return False
+        return nep_dir
 
-        # 等待完成
-        if not self.task_manager.wait_for_completion(
-            [nep_dir], timeout=self.config.nep.timeout
-        ):
-            return False
+    def _finish_nep(self, iter_num: int, nep_dir: Path) -> bool:
+        """
+        将训练得到的 nep.txt 和 nep.restart 复制到迭代目录
+
+        参数:
+            iter_num: 当前迭代编号
+            nep_dir: NEP 训练目录
+
+        返回:
+            是否成功
+        """
+        iter_dir = self.work_dir / f"iter_{iter_num}"
 
         # 复制训练结果到迭代目录
         nep_txt = nep_dir / "nep.txt"
         nep_restart = nep_dir / "nep.restart"
 
+        # 以替换方式写入：迭代目录的 nep.txt 可能与其他目录共享 inode
         if nep_txt.exists():
-            shutil.copy2(nep_txt, iter_dir / "nep.txt")
+            self.stager.stage(nep_txt, iter_dir / "nep.txt", mode="copy")
             self.logger.info("  复制训练后的 nep.txt")
         else:
             self.logger.error("NEP 训练失败：未生成 nep.txt")
             return False
 
         if nep_restart.exists():
-            shutil.copy2(nep_restart, iter_dir / "nep.restart")
+            self.stager.stage(nep_restart, iter_dir / "nep.restart", mode="copy")
             self.logger.info("  复制训练后的 nep.restart")
         else:
             self.logger.warning("未生成 nep.restart（可能训练未收敛或不需要）")
@@ -728,21 +1819,44 @@ class IterationManager:
         self.logger.info("=" * 80)
 
         iter_dir = self.work_dir / f"iter_{iter_num}"
-        train_file = iter_dir / "train.xyz"
         nep_file = iter_dir / "nep.txt"
 
-        # 读取训练集
-        train_structures = read_trajectory(str(train_file))
+        # 读取训练集（包含本轮标注的结构）
+        train_structures = self._read_train_set(iter_num, labelled=True)
         self.logger.info(f"训练集包含 {len(train_structures)} 个结构")
 
+        asi_file = iter_dir / "active_set.asi"
+        state_file = active_set_state_path(asi_file)
+
         # 生成活跃集
         try:
-            active_set_result, selected_structures = select_active_set(
-                trajectory=train_structures,
-                nep_file=str(nep_file),
-                gamma_tol=self.config.selection.gamma_tol,
-                batch_size=self.config.selection.batch_size,
-            )
+            if self.config.selection.incremental_active_set:
+                active_set_result, rebuilt = update_active_set_incremental(
+                    trajectory=train_structures,
+                    nep_file=str(nep_file),
+                    state_file=state_file,
+                    asi_output_path=asi_file,
+                    gamma_tol=self.config.selection.gamma_tol,
+                    batch_size=self.config.selection.batch_size,
+                    method=self.config.selection.maxvol_method,
+                    cache_dir=self.config.selection.descriptor_cache_dir,
+                    n_workers=self.config.selection.n_workers,
+                    element_workers=self.config.selection.maxvol_workers,
+                    rebuild_tol=self.config.selection.incremental_rebuild_tol,
+                )
+                self.logger.info("活跃集已完整重建" if rebuilt else "活跃集已增量更新")
+            else:
+                active_set_result, _ = select_active_set(
+                    trajectory=train_structures,
+                    nep_file=str(nep_file),
+                    gamma_tol=self.config.selection.gamma_tol,
+                    batch_size=self.config.selection.batch_size,
+                    method=self.config.selection.maxvol_method,
+                    cache_dir=self.config.selection.descriptor_cache_dir,
+                    n_workers=self.config.selection.n_workers,
+                    element_workers=self.config.selection.maxvol_workers,
+                    state_output_path=state_file,
+                )
 
             # 统计
             total_envs = sum(
@@ -753,7 +1867,6 @@ class IterationManager:
                 self.logger.info(f"  元素 {element}: {len(inv_matrix)} 个活跃环境")
 
             # 保存活跃集
-            asi_file = iter_dir / "active_set.asi"
             write_asi_file(active_set_result.inverse_dict, str(asi_file))
             self.logger.info(f"保存活跃集文件: {asi_file}")
 
@@ -781,41 +1894,24 @@ class IterationManager:
         next_iter_dir = self.work_dir / f"iter_{iter_num + 1}"
         next_iter_dir.mkdir(parents=True, exist_ok=True)
 
-        # 复制文件到下一轮
-        shutil.copy2(curr_iter_dir / "train.xyz", next_iter_dir / "train.xyz")
-        shutil.copy2(curr_iter_dir / "nep.txt", next_iter_dir / "nep.txt")
-        shutil.copy2(curr_iter_dir / "active_set.asi", next_iter_dir / "active_set.asi")
+        # 复制文件到下一轮（训练集在 train_store 中，不复制）
+        self.stager.stage(curr_iter_dir / "nep.txt", next_iter_dir / "nep.txt")
+        self.stager.stage(
+            curr_iter_dir / "active_set.asi", next_iter_dir / "active_set.asi"
+        )
+
+        # 活跃集状态和二进制 ASI（如果存在）
+        self._stage_active_set_state(curr_iter_dir, next_iter_dir)
 
         # 复制 nep.restart（如果存在）
         nep_restart = curr_iter_dir / "nep.restart"
         if nep_restart.exists():
-            shutil.copy2(nep_restart, next_iter_dir / "nep.restart")
+            self.stager.stage(nep_restart, next_iter_dir / "nep.restart")
             self.logger.info("  复制 nep.restart 到下一轮")
 
-        # 创建 GPUMD 目录
+        # 创建 GPUMD 目录和各条件目录
         next_gpumd_dir = next_iter_dir / "gpumd"
-        next_gpumd_dir.mkdir(parents=True, exist_ok=True)
-
-        # 为每个条件创建目录
-        for cond in self.config.gpumd.conditions:
-            cond_dir = next_gpumd_dir / cond.id
-            cond_dir.mkdir(parents=True, exist_ok=True)
-
-            # 复制结构文件
-            structure_dst = cond_dir / "model.xyz"
-            shutil.copy2(cond.structure_file, structure_dst)
-
-            # 复制 NEP 和活跃集
-            shutil.copy2(next_iter_dir / "nep.txt", cond_dir / "nep.txt")
-            shutil.copy2(next_iter_dir / "active_set.asi", cond_dir / "active_set.asi")
-
-            # 写入 run.in
-            with open(cond_dir / "run.in", "w") as f:
-                f.write(cond.run_in_content)
-
-            # 写入作业脚本（自动添加 DONE 标记）
-            with open(cond_dir / "job.sh", "w") as f:
-                f.write(_ensure_done_marker(self.config.gpumd.job_script))
+        self._create_condition_dirs(next_iter_dir, next_gpumd_dir)
 
         self.logger.info(f"准备完成: {next_gpumd_dir}")
         return True
@@ -834,13 +1930,21 @@ class IterationManager:
         self.logger.info(f"开始迭代 {iter_num}")
         self.logger.info("=" * 80)
 
-        # 步骤 1: GPUMD 探索
-        if not self.run_gpumd(iter_num):
-            self.logger.error("GPUMD 探索失败")
-            return False
+        pipelined = self.config.global_config.pipelined
+        if pipelined:
+            # 步骤 1-3: 按 GPUMD 条件流水线执行探索、筛选和标注
+            selected = self.run_pipelined(iter_num)
+            if selected is None:
+                self.logger.error("GPUMD 探索 / VASP 标注失败")
+                return False
+        else:
+            # 步骤 1: GPUMD 探索
+            if not self.run_gpumd(iter_num):
+                self.logger.error("GPUMD 探索失败")
+                return False
 
-        # 步骤 2: 结构筛选
-        selected = self.select_structures(iter_num)
+            # 步骤 2: 结构筛选
+            selected = self.select_structures(iter_num)
 
         # 检查是否收敛
         if len(selected) == 0:
@@ -849,16 +1953,17 @@ class IterationManager:
             self.logger.info("=" * 80)
             return False
 
-        # 保存待标注结构
-        iter_dir = self.work_dir / f"iter_{iter_num}"
-        to_add_file = iter_dir / "to_add.xyz"
-        write_trajectory(selected, str(to_add_file))
-        self.logger.info(f"保存待标注结构: {to_add_file}")
+        if not pipelined:
+            # 保存待标注结构
+            iter_dir = self.work_dir / f"iter_{iter_num}"
+            to_add_file = iter_dir / "to_add.xyz"
+            write_trajectory(selected, str(to_add_file))
+            self.logger.info(f"保存待标注结构: {to_add_file}")
 
-        # 步骤 3: VASP DFT 标注
-        if not self.run_vasp(iter_num, selected):
-            self.logger.error("VASP 标注失败")
-            return False
+            # 步骤 3: VASP DFT 标注
+            if not self.run_vasp(iter_num, selected):
+                self.logger.error("VASP 标注失败")
+                return False
 
         # 步骤 4: NEP 训练
         if not self.run_nep(iter_num):
@@ -7,12 +7,47 @@
 3. 直到收敛或达到最大迭代次数
 """
 
+import logging
 import sys
 from pathlib import Path
 
-from .config import load_config, print_config_summary
-from .initialize import setup_logger, initialize_workspace
-from .iteration import IterationManager
+from .config import Config, load_config, print_config_summary
+
+
+def log_convergence_status(config: Config, logger: logging.Logger) -> None:
+    """
+    达到最大迭代次数时报告最后一轮的收敛状态
+
+    参数:
+        config: 配置对象
+        logger: 日志记录器
+    """
+    max_iterations = config.global_config.max_iterations
+    logger.info("\n" + "=" * 80)
+    logger.info(f"达到最大迭代次数 ({max_iterations})")
+
+    # 检查最后一轮的收敛状态
+    final_iter_dir = config.global_config.work_dir / f"iter_{max_iterations}"
+    large_gamma_file = final_iter_dir / "large_gamma.xyz"
+
+    if large_gamma_file.exists():
+        from .maxvol import iter_trajectory
+
+        # 只计数，不整体载入内存
+        n_large_gamma = sum(1 for _ in iter_trajectory(large_gamma_file))
+
+        if n_large_gamma == 0:
+            logger.info("✅ 模型已收敛：所有结构 gamma ≤ 收敛阈值")
+            logger.info(f"   最终 NEP 模型: {final_iter_dir / 'nep.txt'}")
+        else:
+            logger.warning("⚠️  模型未完全收敛")
+            logger.warning(f"   仍有 {n_large_gamma} 个高 gamma 结构")
+            logger.warning("   建议解决方案：")
+            logger.warning("   1. 增加 max_iterations 继续训练")
+            logger.warning("   2. 或调整 gamma_high 阈值降低选择标准")
+            logger.warning("   3. 或检查是否需要扩大探索空间")
+
+    logger.info("=" * 80)
 
 
 def main() -> None:
@@ -31,11 +66,19 @@ def main() -> None:
   # 从指定迭代继续运行
   nep-auto-main config.yaml --start-iter 5
 
+  # 同一进程并发运行多个任务（每个配置文件使用独立的 work_dir）
+  nep-auto-main si/config.yaml sio2/config.yaml
+
   # 仅初始化
   nep-auto-init config.yaml
         """,
     )
-    parser.add_argument("config", type=str, help="配置文件路径")
+    parser.add_argument(
+        "config",
+        type=str,
+        nargs="+",
+        help="配置文件路径（多个配置文件时使用 asyncio 并发运行）",
+    )
     parser.add_argument(
         "--start-iter",
         type=int,
@@ -44,12 +87,24 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    config_file = args.config
     start_iter = args.start_iter
 
-    if not Path(config_file).exists():
-        print(f"错误: 配置文件不存在: {config_file}")
-        sys.exit(1)
+    for config_file in args.config:
+        if not Path(config_file).exists():
+            print(f"错误: 配置文件不存在: {config_file}")
+            sys.exit(1)
+
+    if len(args.config) > 1:
+        import asyncio
+
+        from .orchestrator import run_campaigns
+
+        results = asyncio.run(run_campaigns(args.config, start_iter))
+        for config_file, ok in zip(args.config, results):
+            print(f"{config_file}: {'完成' if ok else '失败'}")
+        sys.exit(0 if all(results) else 1)
+
+    config_file = args.config[0]
     # 加载配置
     print("=" * 80)
     print("NEP 主动学习框架")
@@ -65,6 +120,10 @@ def main() -> None:
     # 打印配置摘要
     print_config_summary(config)
 
+    # 迭代依赖 ASE / PyNEP，解析完参数、加载完配置后再导入，--help 和参数错误时不必加载
+    from .initialize import setup_logger, initialize_workspace
+    from .iteration import IterationManager
+
     # 设置日志
     logger = setup_logger(config.global_config.log_file)
 
@@ -124,30 +183,7 @@ def main() -> None:
 
     else:
         # 达到最大迭代次数
-        logger.info("\n" + "=" * 80)
-        logger.info(f"达到最大迭代次数 ({max_iterations})")
-
-        # 检查最后一轮的收敛状态
-        final_iter_dir = config.global_config.work_dir / f"iter_{max_iterations}"
-        large_gamma_file = final_iter_dir / "large_gamma.xyz"
-
-        if large_gamma_file.exists():
-            from .iteration import read_trajectory
-
-            large_gamma_structs = read_trajectory(str(large_gamma_file))
-
-            if len(large_gamma_structs) == 0:
-                logger.info("✅ 模型已收敛：所有结构 gamma ≤ 收敛阈值")
-                logger.info(f"   最终 NEP 模型: {final_iter_dir / 'nep.txt'}")
-            else:
-                logger.warning("⚠️  模型未完全收敛")
-                logger.warning(f"   仍有 {len(large_gamma_structs)} 个高 gamma 结构")
-                logger.warning("   建议解决方案：")
-                logger.warning("   1. 增加 max_iterations 继续训练")
-                logger.warning("   2. 或调整 gamma_high 阈值降低选择标准")
-                logger.warning("   3. 或检查是否需要扩大探索空间")
-
-        logger.info("=" * 80)
+        log_convergence_status(config, logger)
 
     logger.info("\n主动学习流程完成！")
 
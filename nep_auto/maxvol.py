@@ -19,28 +19,28 @@ MaxVol 算法模块
 
 from __future__ import annotations
 
+import json
+import os
+
 import numpy as np
 from numpy.typing import NDArray
-from scipy.linalg import lu, solve_triangular
-from typing import Literal
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Literal
+from dataclasses import dataclass, field
 from pathlib import Path
-from tqdm import tqdm
 
-# 尝试导入 ASE 和 PyNEP
-try:
+from .constants import MAXVOL_METHODS
+from .descriptor_cache import DescriptorCache, hash_file, hash_structure
+from .parallel import (
+    compute_per_atom_properties,
+    mean_descriptors,
+    require_calculator,
+    run_in_processes,
+)
+
+# SciPy、ASE 和 PyNEP 在用到时才导入，只需要常量或配置的命令（如 nep-auto-config）
+# 不必加载整个科学计算栈
+if TYPE_CHECKING:
     from ase import Atoms
-    from ase.io import read as ase_read, write as ase_write
-except ImportError:
-    Atoms = None
-
-try:
-    from pynep.calculate import NEP
-    from pynep.io import load_nep, dump_nep
-    from pynep.select import FarthestPointSample
-except ImportError:
-    NEP = None
-    FarthestPointSample = None
 
 
 # =============================================================================
@@ -61,6 +61,12 @@ class ActiveSetResult:
     active_set_dict: dict[str, NDArray[np.float64]]
     """按元素类型分类的活跃集矩阵 {元素符号: 描述符矩阵}"""
 
+    structure_index_dict: dict[str, NDArray[np.int64]] = field(default_factory=dict)
+    """活跃集每一行所属的结构索引 {元素符号: 索引数组}"""
+
+    atom_index_dict: dict[str, NDArray[np.int64]] = field(default_factory=dict)
+    """活跃集每一行在所属结构中的原子索引 {元素符号: 索引数组}"""
+
 
 @dataclass
 class DescriptorProjectionResult:
@@ -72,6 +78,38 @@ class DescriptorProjectionResult:
     structure_index_dict: dict[str, NDArray[np.int64]]
     """按元素类型分类的结构索引 {元素符号: 原子所属结构索引数组}"""
 
+    atom_index_dict: dict[str, NDArray[np.int64]] = field(default_factory=dict)
+    """按元素类型分类的原子索引 {元素符号: 原子在所属结构中的索引数组}"""
+
+    descriptor_dict: dict[str, NDArray[np.float64]] = field(default_factory=dict)
+    """按元素类型分类的逐原子描述符 {元素符号: (N_atoms, D_desc) 矩阵}，行顺序同 projection_dict"""
+
+    mean_descriptors: NDArray[np.float64] | None = None
+    """每个结构的平均描述符 (N_structures, D_desc)，供 FPS 使用"""
+
+
+@dataclass
+class ActiveSetState:
+    """持久化的活跃集状态（与 active_set.asi 一同保存，用于增量更新）"""
+
+    active_set_dict: dict[str, NDArray[np.float64]]
+    """按元素类型分类的活跃集矩阵（由 model_hash 对应的模型计算）"""
+
+    structure_index_dict: dict[str, NDArray[np.int64]]
+    """活跃集每一行所属的结构在训练集中的索引"""
+
+    atom_index_dict: dict[str, NDArray[np.int64]]
+    """活跃集每一行在所属结构中的原子索引"""
+
+    model_hash: str
+    """生成活跃集时所用 nep.txt 的内容哈希"""
+
+    n_structures: int
+    """生成活跃集时训练集的结构数（之后追加的结构视为新结构）"""
+
+    structure_hashes: list[str] = field(default_factory=list)
+    """生成活跃集时训练集每个结构的哈希（hash_structure），用于发现训练集被改写"""
+
 
 # =============================================================================
 # Core MaxVol Algorithm (CPU Version)
@@ -82,6 +120,7 @@ def _maxvol_core(
     A: NDArray[np.float64],
     gamma_tol: float = 1.001,
     max_iter: int = 1000,
+    initial_indices: NDArray[np.int64] | None = None,
 ) -> NDArray[np.int64]:
     """
     MaxVol 核心算法：从高矩阵中选择最大体积子矩阵。
@@ -95,27 +134,37 @@ def _maxvol_core(
             - 等于 1.0 时会迭代直到完全收敛
             - 大于 1.0 时算法更快但精度略低（推荐 1.01 - 1.1）
         max_iter: 允许的最大迭代次数
+        initial_indices: 初始选中行（热启动），None 表示使用 LU 分解初始化。
+            用于增量更新：以已有活跃集为起点，只对新增行执行交换
 
     返回:
         被选中行的索引数组，长度为 r
 
     异常:
         ValueError: 当输入矩阵不是高矩阵时抛出
+        numpy.linalg.LinAlgError: 热启动的初始子矩阵奇异时抛出
     """
     n, r = A.shape
 
     if n <= r:
         raise ValueError(f"输入矩阵必须是高矩阵 (n > r)，当前: n={n}, r={r}")
 
-    # LU decomposition for initialization
-    P, L, U = lu(A, check_finite=False)
-    selected_indices = P[:, :r].argmax(axis=0)
+    if initial_indices is not None:
+        # Warm start: B = A @ A[I]^(-1)
+        selected_indices = np.array(initial_indices, dtype=np.int64)
+        B = np.linalg.solve(A[selected_indices].T, A.T).T
+    else:
+        from scipy.linalg import lu, solve_triangular
 
-    # Compute coefficient matrix B = A @ A[I]^(-1)
-    Q = solve_triangular(U, A.T, trans=1, check_finite=False)
-    B = solve_triangular(
-        L[:r, :], Q, trans=1, check_finite=False, unit_diagonal=True, lower=True
-    ).T
+        # LU decomposition for initialization (A = L[p] @ U; avoids an n x n P)
+        p, L, U = lu(A, check_finite=False, p_indices=True)
+        selected_indices = np.argsort(p)[:r]
+
+        # Compute coefficient matrix B = A @ A[I]^(-1)
+        Q = solve_triangular(U, A.T, trans=1, check_finite=False)
+        B = solve_triangular(
+            L[:r, :], Q, trans=1, check_finite=False, unit_diagonal=True, lower=True
+        ).T
 
     # Iterative optimization
     for _ in range(max_iter):
@@ -140,6 +189,255 @@ def _maxvol_core(
     return selected_indices
 
 
+def _maxvol_core_blocked(
+    A: NDArray[np.float64],
+    gamma_tol: float = 1.001,
+    max_iter: int = 1000,
+    initial_indices: NDArray[np.int64] | None = None,
+    block_size: int = 32,
+    dtype: type = np.float32,
+    row_chunk: int = 65536,
+) -> NDArray[np.int64]:
+    """
+    分块 MaxVol：每轮同时执行多个互不冲突的行交换（秩 k 更新）。
+
+    与 _maxvol_core 相比：
+    - 维护每行的最大 |B| 及其列号，候选交换直接从行最大值中选取，
+      不再每次交换都扫描整个系数矩阵
+    - 每轮从行最大值最大的若干行中贪心选出列互不相同、且使子矩阵体积
+      每次至少增大 gamma_tol 倍的一组交换，一次 GEMM 完成更新
+    - 系数矩阵按 dtype（默认 float32）存储和更新，按行分块以保持缓存局部性；
+      收敛后在 float64 下重新计算系数矩阵校验，未收敛则以 float64 继续
+
+    参数:
+        A: 输入的高矩阵，形状为 (n, r)，要求 n > r
+        gamma_tol: 收敛精度参数，应 >= 1.0
+        max_iter: 允许的最大交换次数
+        initial_indices: 初始选中行（热启动），None 表示使用 LU 分解初始化
+        block_size: 每轮最多同时执行的交换数
+        dtype: 系数矩阵的工作精度（np.float32 或 np.float64）
+        row_chunk: 分块更新时每块的行数
+
+    返回:
+        被选中行的索引数组，长度为 r
+
+    异常:
+        ValueError: 当输入矩阵不是高矩阵时抛出
+        numpy.linalg.LinAlgError: 初始子矩阵奇异时抛出
+    """
+    n, r = A.shape
+
+    if n <= r:
+        raise ValueError(f"输入矩阵必须是高矩阵 (n > r)，当前: n={n}, r={r}")
+
+    if initial_indices is not None:
+        selected_indices = np.array(initial_indices, dtype=np.int64)
+    else:
+        from scipy.linalg import lu
+
+        p, _, _ = lu(A, check_finite=False, p_indices=True)
+        selected_indices = np.argsort(p)[:r]
+
+    work_dtype = np.dtype(dtype)
+    n_swaps = 0
+    while True:
+        B = _maxvol_coefficients(A, selected_indices, work_dtype, row_chunk)
+        if n_swaps > 0 and np.abs(B).max() <= gamma_tol:
+            break
+        n_swaps += _blocked_swaps(
+            B, selected_indices, gamma_tol, max_iter - n_swaps, block_size, row_chunk
+        )
+        if work_dtype == np.float64 or n_swaps == 0 or n_swaps >= max_iter:
+            break
+        # Re-verify in float64: float32 round-off may hide a few remaining swaps
+        work_dtype = np.dtype(np.float64)
+
+    return selected_indices
+
+
+def _maxvol_coefficients(
+    A: NDArray[np.float64],
+    selected_indices: NDArray[np.int64],
+    dtype: np.dtype,
+    row_chunk: int,
+) -> NDArray:
+    """按行分块计算系数矩阵 B = A @ A[I]^(-1)，以 dtype 存储"""
+    inv_matrix = np.linalg.inv(A[selected_indices])
+    B = np.empty(A.shape, dtype=dtype)
+    for start in range(0, len(A), row_chunk):
+        B[start : start + row_chunk] = A[start : start + row_chunk] @ inv_matrix
+    return B
+
+
+def _blocked_swaps(
+    B: NDArray,
+    selected_indices: NDArray[np.int64],
+    gamma_tol: float,
+    max_swaps: int,
+    block_size: int,
+    row_chunk: int,
+) -> int:
+    """
+    在系数矩阵 B 上执行分块交换直到收敛，原地更新 B 和 selected_indices。
+
+    一组交换 (行 R → 列 J) 的更新为
+        B' = B - B[:, J] @ B[R, J]^(-1) @ (B[R, :] - I[J, :])
+    其中 |det(B[R, J])| 即子矩阵体积的增大倍数。
+
+    返回:
+        执行的交换次数
+    """
+    n, r = B.shape
+    row_max = np.empty(n, dtype=np.float64)
+    row_arg = np.empty(n, dtype=np.int64)
+
+    def _track(start: int, stop: int) -> None:
+        block = np.abs(B[start:stop])
+        row_arg[start:stop] = block.argmax(axis=1)
+        row_max[start:stop] = block[np.arange(stop - start), row_arg[start:stop]]
+
+    for start in range(0, n, row_chunk):
+        _track(start, min(start + row_chunk, n))
+    # Selected rows are unit vectors; never swap them again
+    row_max[selected_indices] = 0.0
+
+    n_swaps = 0
+    n_candidates = min(n, 4 * block_size)
+    while n_swaps < max_swaps:
+        top = np.argpartition(row_max, n - n_candidates)[n - n_candidates :]
+        top = top[np.argsort(row_max[top])[::-1]]
+        if row_max[top[0]] <= gamma_tol:
+            break
+
+        # Greedily pick swaps in distinct columns that keep growing the volume
+        rows: list[int] = []
+        cols: list[int] = []
+        volume = 1.0
+        k_max = min(block_size, max_swaps - n_swaps)
+        for i in top:
+            if row_max[i] <= gamma_tol or len(rows) >= k_max:
+                break
+            j = int(row_arg[i])
+            if j in cols:
+                continue
+            trial = abs(
+                np.linalg.det(B[np.ix_(rows + [i], cols + [j])].astype(np.float64))
+            )
+            if trial > volume * gamma_tol:
+                rows.append(int(i))
+                cols.append(j)
+                volume = trial
+
+        R = np.array(rows)
+        J = np.array(cols)
+        W = B[R].astype(np.float64)
+        W[np.arange(len(R)), J] -= 1.0
+        C = np.linalg.solve(B[np.ix_(R, J)].astype(np.float64), W).astype(B.dtype)
+
+        for start in range(0, n, row_chunk):
+            stop = min(start + row_chunk, n)
+            B[start:stop] -= B[start:stop, J] @ C
+            _track(start, stop)
+
+        selected_indices[J] = R
+        row_max[selected_indices] = 0.0
+        n_swaps += len(R)
+
+    return n_swaps
+
+
+def rect_maxvol(
+    A: NDArray[np.float64],
+    k: int,
+    gamma_tol: float = 1.001,
+    max_iter: int = 1000,
+    method: str = "classic",
+) -> NDArray[np.int64]:
+    """
+    矩形 MaxVol：从 (n, r) 矩阵中选择 k 行，贪心最大化子矩阵体积。
+
+    - k <= r: 对 A^T 做列主元 QR，取前 k 个主元（逐行最大化剩余投影长度）
+    - k > r: 先用方阵 MaxVol 选出 r 行，再逐行加入使 det(A_I^T A_I)
+      增长最大的行（增长倍数为 1 + ||A_i A_I^+||^2）
+
+    参数:
+        A: 输入矩阵，形状为 (n, r)
+        k: 需要选择的行数（超过 n 时返回全部行）
+        gamma_tol: 方阵 MaxVol 的收敛阈值
+        max_iter: 方阵 MaxVol 的最大迭代次数
+        method: 方阵部分使用的 MaxVol 实现（见 MAXVOL_METHODS）
+
+    返回:
+        被选中行的索引数组（按加入顺序，前 min(k, r) 行构成方阵部分）
+    """
+    n, r = A.shape
+    if k >= n:
+        return np.arange(n, dtype=np.int64)
+    if k <= r:
+        from scipy.linalg import qr
+
+        _, piv = qr(A.T, mode="r", pivoting=True, check_finite=False)
+        return np.asarray(piv[:k], dtype=np.int64)
+
+    maxvol_core = _maxvol_core_blocked if method == "blocked" else _maxvol_core
+    selected = maxvol_core(A, gamma_tol, max_iter)
+    added, _ = _rect_maxvol_extend(A, selected, k - r)
+    return np.concatenate([selected, added])
+
+
+class _RowLeverage:
+    """
+    各行相对已选行张成空间的杠杆值 l_i = a_i (A_J^T A_J)^-1 a_i^T。
+
+    加入第 j 行后 det(A_J^T A_J) 增长 1 + l_j 倍，(A_J^T A_J)^-1 和所有杠杆值
+    按 Sherman–Morrison 更新：每步 O(n·r) 计算，只保存 r × r 的逆 Gram 矩阵和
+    长度为 n 的杠杆值，不随已选行数增长。已选行的杠杆值为 -inf。
+    """
+
+    def __init__(self, A: NDArray[np.float64], selected: NDArray[np.int64]):
+        """
+        参数:
+            A: 矩阵 (n, r)，支持 np.memmap
+            selected: 已选行索引（方阵 MaxVol 结果，A[selected] 可逆）
+        """
+        self.A = A
+        pinv = _compute_pinv(A[selected])
+        self.gram_inv = pinv @ pinv.T
+        self.lengths = np.einsum("ij,ij->i", A @ self.gram_inv, A)
+        self.lengths[selected] = -np.inf
+
+    def add(self, i: int) -> float:
+        """加入第 i 行，返回体积平方增长倍数 1 + l_i"""
+        growth = 1.0 + self.lengths[i]
+        u = self.gram_inv @ self.A[i]
+        v = self.A @ u
+        self.gram_inv -= np.outer(u, u) / growth
+        self.lengths -= v * v / growth
+        self.lengths[i] = -np.inf
+        return growth
+
+
+def _rect_maxvol_extend(
+    A: NDArray[np.float64],
+    selected: NDArray[np.int64],
+    n_add: int,
+) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """
+    在方阵 MaxVol 结果基础上贪心追加 n_add 行，每步加入体积增长最大的行。
+
+    返回:
+        (按加入顺序排列的新增行索引, 对应的体积平方增长倍数)
+    """
+    n_add = min(n_add, len(A) - len(selected))
+    leverage = _RowLeverage(A, selected)
+    added = np.empty(n_add, dtype=np.int64)
+    gains = np.empty(n_add)
+    for step in range(n_add):
+        added[step] = int(leverage.lengths.argmax())
+        gains[step] = leverage.add(added[step])
+    return added, gains
+
+
 def _compute_pinv(matrix: NDArray[np.float64]) -> NDArray[np.float64]:
     """
     计算矩阵的伪逆。
@@ -166,86 +464,166 @@ def compute_maxvol(
     gamma_tol: float = 1.001,
     max_iter: int = 1000,
     batch_size: int | None = None,
+    method: str = "classic",
     n_refinement: int = 10,
+    init_selected: NDArray[np.int64] | None = None,
 ) -> tuple[NDArray[np.float64], NDArray[np.int64]]:
     """
     执行 MaxVol 算法，支持批量处理和迭代细化。
 
     对于大规模数据，使用批量处理策略：
-    1. 将数据分成多个批次
+    1. 将数据按行分成多个连续批次
     2. 每个批次与之前的结果合并后执行 MaxVol
-    3. 最后进行多轮细化确保收敛
+    3. 最后进行多轮细化：逐批计算全部行的 gamma，将超过阈值的行换入活跃集
+
+    批处理模式下 A 只按行切片读取，可以是内存映射数组
+    （如 np.load(path, mmap_mode="r")），峰值内存约为 batch_size × D。
 
     参数:
-        A: 描述符矩阵，形状为 (N, D)
+        A: 描述符矩阵，形状为 (N, D)，支持 np.memmap
         struct_index: 每个环境对应的结构索引
         gamma_tol: MaxVol 收敛阈值
         max_iter: 单次 MaxVol 的最大迭代次数
         batch_size: 批处理大小,None 表示一次性处理
+        method: MaxVol 实现（见 MAXVOL_METHODS）
         n_refinement: 批处理后的细化迭代次数
+        init_selected: 初始活跃集在 A 中的行索引（增量模式）。
+            给定时以这些行为起点，只将其余行通过交换迭代筛入活跃集
 
     返回:
         (选中的描述符矩阵, 选中的结构索引)
     """
+    if method == "classic":
+        maxvol_core = _maxvol_core
+    elif method == "blocked":
+        maxvol_core = _maxvol_core_blocked
+    else:
+        raise ValueError(
+            f"未知的 MaxVol 实现: {method}（可选: {', '.join(MAXVOL_METHODS)}）"
+        )
+
     # Single batch mode
-    if batch_size is None:
-        selected = _maxvol_core(A, gamma_tol, max_iter)
+    if batch_size is None and init_selected is None:
+        A = np.asarray(A, dtype=np.float64)
+        selected = maxvol_core(A, gamma_tol, max_iter)
         return A[selected], struct_index[selected]
 
-    # Multi-batch mode
-    n_batches = int(np.ceil(len(A) / batch_size))
-    batch_splits = np.array_split(np.arange(len(A)), n_batches)
+    n_rows = len(A)
+    chunk = batch_size or n_rows
 
     # Stage 1: Cumulative MaxVol
     A_selected: NDArray[np.float64] | None = None
     index_selected: NDArray[np.int64] | None = None
+    initial_mask: NDArray[np.bool_] | None = None
+
+    if init_selected is not None:
+        # Incremental mode: start from the previous active set
+        A_selected = np.asarray(A[init_selected], dtype=np.float64)
+        index_selected = struct_index[init_selected]
+        initial_mask = np.zeros(n_rows, dtype=bool)
+        initial_mask[init_selected] = True
+        if initial_mask.all():
+            return A_selected, index_selected
+
+    # Batches are contiguous row ranges so that memory-mapped matrices are
+    # read sequentially; rows of the initial active set are skipped
+    n_batches = int(np.ceil(n_rows / chunk))
+    for i, start in enumerate(range(0, n_rows, chunk)):
+        stop = min(start + chunk, n_rows)
+        A_batch = np.asarray(A[start:stop], dtype=np.float64)
+        index_batch = struct_index[start:stop]
+        if initial_mask is not None:
+            keep = ~initial_mask[start:stop]
+            A_batch, index_batch = A_batch[keep], index_batch[keep]
+            if len(A_batch) == 0:
+                continue
 
-    for i, batch_indices in enumerate(batch_splits):
-        if A_selected is None:
-            # First batch
-            A_joint = A[batch_indices]
-            index_joint = struct_index[batch_indices]
-        else:
-            # Subsequent batches: merge with selected
-            A_joint = np.vstack([A_selected, A[batch_indices]])
-            index_joint = np.hstack([index_selected, struct_index[batch_indices]])
-
-        selected = _maxvol_core(A_joint, gamma_tol, max_iter)
-        prev_len = 0 if A_selected is None else len(A_selected)
-        A_selected = A_joint[selected]
-        index_selected = index_joint[selected]
-        n_added = (selected >= prev_len).sum()
+        A_selected, index_selected, n_added = _maxvol_merge(
+            maxvol_core,
+            A_selected,
+            index_selected,
+            A_batch,
+            index_batch,
+            gamma_tol,
+            max_iter,
+            warm_start=init_selected is not None,
+        )
         print(f"Batch {i + 1}/{n_batches}: added {n_added} environments")
 
-    # Stage 2: Refinement
+    # Stage 2: Refinement over all rows, chunk by chunk
     assert A_selected is not None and index_selected is not None
 
     for ii in range(n_refinement):
         inv_matrix = _compute_pinv(A_selected)
-        gamma_matrix = np.abs(A_selected @ inv_matrix)
-        large_gamma_mask = gamma_matrix > gamma_tol
-        max_gamma = np.max(gamma_matrix)
+        exceed_rows: list[NDArray[np.int64]] = []
+        max_gamma = 0.0
+        for start in range(0, n_rows, chunk):
+            stop = min(start + chunk, n_rows)
+            gamma = np.abs(np.asarray(A[start:stop], dtype=np.float64) @ inv_matrix)
+            gamma = gamma.max(axis=1)
+            max_gamma = max(max_gamma, float(gamma.max()))
+            exceed_rows.append(start + np.flatnonzero(gamma > gamma_tol))
+        rows = np.concatenate(exceed_rows)
 
         print(
-            f"Refinement {ii + 1}: {large_gamma_mask.sum()} envs exceed threshold, max gamma = {max_gamma:.4f}"
+            f"Refinement {ii + 1}: {len(rows)} envs exceed threshold, max gamma = {max_gamma:.4f}"
         )
 
         if max_gamma < gamma_tol:
             print("Refinement done")
             break
 
-        # Add environments exceeding threshold to candidates
-        A_joint = np.vstack([A_selected, A[large_gamma_mask.any(axis=1)]])
-        index_joint = np.hstack(
-            [index_selected, struct_index[large_gamma_mask.any(axis=1)]]
-        )
-        selected = _maxvol_core(A_joint, gamma_tol, max_iter)
-        A_selected = A_joint[selected]
-        index_selected = index_joint[selected]
+        # Swap in environments exceeding the threshold, at most chunk rows at a time
+        for start in range(0, len(rows), chunk):
+            batch_rows = rows[start : start + chunk]
+            A_selected, index_selected, _ = _maxvol_merge(
+                maxvol_core,
+                A_selected,
+                index_selected,
+                np.asarray(A[batch_rows], dtype=np.float64),
+                struct_index[batch_rows],
+                gamma_tol,
+                max_iter,
+                warm_start=False,
+            )
 
     return A_selected, index_selected
 
 
+def _maxvol_merge(
+    maxvol_core,
+    A_selected: NDArray[np.float64] | None,
+    index_selected: NDArray[np.int64] | None,
+    A_batch: NDArray[np.float64],
+    index_batch: NDArray[np.int64],
+    gamma_tol: float,
+    max_iter: int,
+    warm_start: bool,
+) -> tuple[NDArray[np.float64], NDArray[np.int64], int]:
+    """
+    将一批候选行与当前活跃集合并后执行一次 MaxVol。
+
+    返回:
+        (新的活跃集矩阵, 对应的结构索引, 从本批次加入的行数)
+    """
+    if A_selected is None:
+        # First batch
+        A_joint = A_batch
+        index_joint = index_batch
+        prev_len = 0
+    else:
+        # Subsequent batches: merge with selected
+        A_joint = np.vstack([A_selected, A_batch])
+        index_joint = np.hstack([index_selected, index_batch])
+        prev_len = len(A_selected)
+
+    # Warm start from the current active set in incremental mode
+    initial = np.arange(prev_len) if warm_start and prev_len else None
+    selected = maxvol_core(A_joint, gamma_tol, max_iter, initial_indices=initial)
+    n_added = int((selected >= prev_len).sum())
+    return A_joint[selected], index_joint[selected], n_added
+
+
 # =============================================================================
 # Descriptor Computation
 # =============================================================================
@@ -255,29 +633,41 @@ def compute_descriptor_projection(
     trajectory: list[Atoms],
     nep_file: str | Path,
     show_progress: bool = True,
+    cache_dir: str | Path | None = None,
+    require_tall: bool = True,
+    n_workers: int = 1,
+    with_descriptors: bool = False,
 ) -> DescriptorProjectionResult:
     """
     计算轨迹中所有原子的 NEP 描述符投影 (B_projection)。
 
     描述符投影是 NEP 势函数中每个原子局部环境的低维表示，
-    用于评估模型的外推程度。
+    用于评估模型的外推程度。with_descriptors 为 True 时在同一次计算器调用中
+    同时得到逐原子描述符和结构平均描述符，MaxVol 和 FPS 共用一次 NEP 计算。
 
     参数:
         trajectory: ASE Atoms 对象列表
         nep_file: NEP 势函数文件路径 (nep.txt)
         show_progress: 是否显示进度条
+        cache_dir: 描述符缓存目录，None 表示不使用缓存。
+            缓存按 nep.txt 内容和结构哈希索引，只计算新增或变化的结构
+        require_tall: 是否要求每种元素的原子环境数大于描述符维度。
+            增量更新只投影部分结构时可关闭该检查
+        n_workers: 并行计算的工作进程数，<= 1 表示串行
+        with_descriptors: 是否同时计算逐原子描述符和结构平均描述符
 
     返回:
         描述符投影结果，包含按元素分类的投影矩阵和结构索引
+        （with_descriptors 为 True 时还包含描述符）
 
     异常:
         ImportError: 当 PyNEP 未安装时抛出
     """
-    if NEP is None:
-        raise ImportError("请先安装 PyNEP: pip install pynep")
+    from ase.data import atomic_numbers
+
+    require_calculator()
 
     nep_file = Path(nep_file)
-    calc = NEP(str(nep_file))
 
     # Parse element list from NEP file
     with open(nep_file) as f:
@@ -287,39 +677,84 @@ def compute_descriptor_projection(
         elements = parts[2 : 2 + n_types]  # Format: nep4 N_types elem1 elem2 ... elemN
     print(f"Elements in NEP potential: {elements}")
 
-    # Initialize storage
-    projection_dict: dict[str, list[NDArray]] = {elem: [] for elem in elements}
-    struct_index_dict: dict[str, list[int]] = {elem: [] for elem in elements}
+    properties = (
+        ("B_projection", "descriptor") if with_descriptors else ("B_projection",)
+    )
 
-    # Iterate over trajectory
-    iterator = (
-        tqdm(
-            enumerate(trajectory), total=len(trajectory), desc="Computing B_projection"
+    # Look up cached properties
+    caches = {}
+    results: dict[str, list[NDArray | None]] = {
+        prop: [None] * len(trajectory) for prop in properties
+    }
+    if cache_dir is not None:
+        keys = [hash_structure(atoms) for atoms in trajectory]
+        for prop in properties:
+            caches[prop] = DescriptorCache(cache_dir, nep_file, prop=prop)
+            results[prop] = caches[prop].get(keys)
+        n_hit = sum(
+            all(results[prop][i] is not None for prop in properties)
+            for i in range(len(trajectory))
         )
-        if show_progress
-        else enumerate(trajectory)
-    )
+        print(f"Descriptor cache: {n_hit} hits, {len(trajectory) - n_hit} misses")
 
-    for struct_idx, atoms in iterator:
-        calc.calculate(atoms, ["B_projection"])
-        B_proj = calc.results["B_projection"]
+    # Compute missing structures in one calculator pass (optionally in a process pool)
+    missing = [
+        i
+        for i in range(len(trajectory))
+        if any(results[prop][i] is None for prop in properties)
+    ]
+    if missing:
+        computed = compute_per_atom_properties(
+            [trajectory[i] for i in missing],
+            nep_file,
+            properties=properties,
+            n_workers=n_workers,
+            show_progress=show_progress,
+            desc="Computing " + " + ".join(properties),
+        )
+        for prop in properties:
+            for i, value in zip(missing, computed[prop]):
+                results[prop][i] = value
+            if prop in caches:
+                caches[prop].put([(keys[i], results[prop][i]) for i in missing])
+    B_list = results["B_projection"]
+
+    # Assemble contiguous per-element arrays
+    n_atoms = np.array([len(atoms) for atoms in trajectory], dtype=np.int64)
+    numbers = np.concatenate(
+        [atoms.numbers for atoms in trajectory] + [np.empty(0, dtype=np.int64)]
+    )
+    all_proj = np.vstack(B_list) if B_list else np.empty((0, 0))
+    all_struct = np.repeat(np.arange(len(trajectory), dtype=np.int64), n_atoms)
+    all_atom = np.arange(n_atoms.sum(), dtype=np.int64) - np.repeat(
+        np.cumsum(n_atoms) - n_atoms, n_atoms
+    )
 
-        for atom_proj, symbol in zip(B_proj, atoms.get_chemical_symbols()):
-            projection_dict[symbol].append(atom_proj)
-            struct_index_dict[symbol].append(struct_idx)
+    all_desc = None
+    mean_desc = None
+    if with_descriptors:
+        D_list = results["descriptor"]
+        all_desc = np.vstack(D_list) if D_list else np.empty((0, 0))
+        mean_desc = np.array([np.mean(D, axis=0) for D in D_list])
 
-    # Convert to NumPy arrays
     projection_dict_arr = {}
     struct_index_dict_arr = {}
+    atom_index_dict_arr = {}
+    descriptor_dict_arr = {}
     print("Descriptor matrix shapes:")
     for elem in elements:
-        if len(projection_dict[elem]) > 0:
-            projection_dict_arr[elem] = np.vstack(projection_dict[elem])
-            struct_index_dict_arr[elem] = np.array(
-                struct_index_dict[elem], dtype=np.int64
-            )
+        mask = numbers == atomic_numbers[elem]
+        if mask.any():
+            projection_dict_arr[elem] = all_proj[mask]
+            struct_index_dict_arr[elem] = all_struct[mask]
+            atom_index_dict_arr[elem] = all_atom[mask]
+            if all_desc is not None:
+                descriptor_dict_arr[elem] = all_desc[mask]
             print(f"  {elem}: {projection_dict_arr[elem].shape}")
 
+            if not require_tall:
+                continue
+
             # Verify the matrix is tall (overdetermined system)
             # MaxVol 算法是按元素类型分别进行的，所以每个元素都需要满足超定条件
             n, d = projection_dict_arr[elem].shape
@@ -348,6 +783,9 @@ def compute_descriptor_projection(
     return DescriptorProjectionResult(
         projection_dict=projection_dict_arr,
         structure_index_dict=struct_index_dict_arr,
+        atom_index_dict=atom_index_dict_arr,
+        descriptor_dict=descriptor_dict_arr,
+        mean_descriptors=mean_desc,
     )
 
 
@@ -356,6 +794,7 @@ def compute_gamma(
     nep_file: str | Path,
     asi_file: str | Path,
     show_progress: bool = True,
+    n_workers: int = 1,
 ) -> list[Atoms]:
     """
     计算轨迹中每个原子的 Gamma 值（外推等级）。
@@ -372,39 +811,72 @@ def compute_gamma(
         nep_file: NEP 势函数文件路径
         asi_file: Active Set Inverse 文件路径
         show_progress: 是否显示进度条
+        n_workers: 并行计算的工作进程数，<= 1 表示串行
 
     返回:
         更新后的轨迹（原地修改，同时返回引用）
     """
-    if NEP is None:
-        raise ImportError("请先安装 PyNEP: pip install pynep")
+    require_calculator()
 
-    calc = NEP(str(nep_file))
     active_set_inv = read_asi_file(asi_file)
 
-    iterator = tqdm(trajectory, desc="Computing gamma") if show_progress else trajectory
+    # Compute descriptor projection (optionally in a process pool)
+    B_list = compute_per_atom_properties(
+        trajectory,
+        nep_file,
+        properties=("B_projection",),
+        n_workers=n_workers,
+        show_progress=show_progress,
+        desc="Computing gamma",
+    )["B_projection"]
+
+    # Batched gamma: one GEMM per element over all frames
+    gamma_list = compute_gamma_from_projection(
+        B_list, [atoms.numbers for atoms in trajectory], active_set_inv
+    )
+    for atoms, gamma in zip(trajectory, gamma_list):
+        atoms.arrays["gamma"] = gamma
 
-    for atoms in iterator:
-        # Initialize gamma array
-        atoms.arrays["gamma"] = np.zeros(len(atoms))
+    return trajectory
 
-        # Compute descriptor projection
-        calc.calculate(atoms, ["B_projection"])
-        B_proj = calc.results["B_projection"]
 
-        # Compute gamma by element
-        symbols = atoms.get_chemical_symbols()
-        for elem, inv_matrix in active_set_inv.items():
-            atom_indices = [i for i, sym in enumerate(symbols) if sym == elem]
-            if len(atom_indices) == 0:
-                continue
+def compute_gamma_from_projection(
+    B_list: list[NDArray[np.float64]],
+    numbers_list: list[NDArray[np.int64]],
+    active_set_inv: dict[str, NDArray[np.float64]],
+) -> list[NDArray[np.float64]]:
+    """
+    由逐结构的 B_projection 批量计算每个原子的 Gamma 值。
 
-            # gamma = |B @ A^(-1)|_max (max per atom)
-            g = B_proj[atom_indices] @ inv_matrix
-            g = np.max(np.abs(g), axis=1)
-            atoms.arrays["gamma"][atom_indices] = g
+    将所有结构的 B_projection 按元素堆叠成一个矩阵，每种元素只做一次
+    矩阵乘法 |B @ A^(-1)|，再按 atoms.numbers 把逐原子最大值分散回各结构。
 
-    return trajectory
+    参数:
+        B_list: 每个结构的 B_projection，形状 (n_atoms, D)
+        numbers_list: 每个结构的原子序数数组 (atoms.numbers)
+        active_set_inv: 按元素分类的活跃集逆矩阵
+
+    返回:
+        每个结构的逐原子 Gamma 数组列表（元素不在活跃集中的原子为 0）
+    """
+    if len(B_list) == 0:
+        return []
+
+    from ase.data import atomic_numbers
+
+    n_atoms = np.array([len(numbers) for numbers in numbers_list], dtype=np.int64)
+    numbers = np.concatenate(numbers_list)
+    B_all = np.vstack(B_list)
+    gamma = np.zeros(len(numbers))
+
+    for elem, inv_matrix in active_set_inv.items():
+        mask = numbers == atomic_numbers[elem]
+        if not mask.any():
+            continue
+        # gamma = |B @ A^(-1)|_max (max per atom)
+        gamma[mask] = np.abs(B_all[mask] @ inv_matrix).max(axis=1)
+
+    return np.split(gamma, np.cumsum(n_atoms)[:-1])
 
 
 # =============================================================================
@@ -416,8 +888,12 @@ def generate_active_set(
     descriptor_result: DescriptorProjectionResult,
     gamma_tol: float = 1.001,
     batch_size: int = 10000,
+    method: str = "classic",
     write_asi: bool = True,
     asi_output_path: str | Path = "active_set.asi",
+    init_rows: dict[str, NDArray[np.int64]] | None = None,
+    structure_budget: int | None = None,
+    element_workers: int = 1,
 ) -> ActiveSetResult:
     """
     使用 MaxVol 算法从描述符投影中生成活跃集。
@@ -429,34 +905,64 @@ def generate_active_set(
         descriptor_result: 描述符投影计算结果
         gamma_tol: MaxVol 收敛阈值
         batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
         write_asi: 是否将结果写入 ASI 文件
         asi_output_path: ASI 文件输出路径
+        init_rows: 各元素初始活跃集在投影矩阵中的行索引（增量模式），
+            None 表示从头计算
+        structure_budget: 目标结构数。方阵活跃集涉及的结构数不足时，
+            用矩形 MaxVol 逐个追加结构直到达到该值（可选结构不足时给出警告）；
+            None 表示只保留方阵活跃集涉及的结构
+        element_workers: 按元素并行执行 MaxVol 的进程数，<= 1 表示串行。
+            各元素的 MaxVol 和逆矩阵计算相互独立，结果按元素顺序合并
 
     返回:
-        活跃集结果
+        活跃集结果（逆矩阵始终只由方阵活跃集构成）
     """
     print("Running MaxVol algorithm...")
     active_set_dict: dict[str, NDArray] = {}
+    structure_index_dict: dict[str, NDArray] = {}
+    atom_index_dict: dict[str, NDArray] = {}
+    inverse_dict: dict[str, NDArray] = {}
     all_struct_indices: list[int] = []
-
-    for elem, B_proj in descriptor_result.projection_dict.items():
-        print(f"\nProcessing element: {elem}")
-        A_selected, index_selected = compute_maxvol(
-            B_proj,
-            descriptor_result.structure_index_dict[elem],
-            gamma_tol=gamma_tol,
-            batch_size=batch_size,
+    rows_dict: dict[str, NDArray[np.int64]] = {}
+
+    elements = list(descriptor_result.projection_dict)
+    tasks = [
+        (
+            elem,
+            descriptor_result.projection_dict[elem],
+            gamma_tol,
+            batch_size,
+            method,
+            None if init_rows is None else init_rows.get(elem),
         )
+        for elem in elements
+    ]
+    if element_workers > 1 and len(tasks) > 1:
+        print(f"Running MaxVol for {len(tasks)} elements in parallel")
+    results = run_in_processes(_element_active_set, tasks, element_workers)
+
+    for elem, (A_selected, rows_selected, inverse) in zip(elements, results):
+        index_selected = descriptor_result.structure_index_dict[elem][rows_selected]
+        rows_dict[elem] = rows_selected
         active_set_dict[elem] = A_selected
+        inverse_dict[elem] = inverse
+        structure_index_dict[elem] = index_selected
+        if elem in descriptor_result.atom_index_dict:
+            atom_index_dict[elem] = descriptor_result.atom_index_dict[elem][
+                rows_selected
+            ]
         all_struct_indices.extend(index_selected.tolist())
-        print(f"Active set shape: {A_selected.shape}")
+        print(f"Active set shape of {elem}: {A_selected.shape}")
 
     # Deduplicate and sort structure indices
     structure_indices = sorted(set(all_struct_indices))
 
-    # Compute inverse matrices
-    print("\nComputing active set inverse...")
-    inverse_dict = {elem: _compute_pinv(A) for elem, A in active_set_dict.items()}
+    if structure_budget is not None and len(structure_indices) < structure_budget:
+        structure_indices = _extend_structure_budget(
+            descriptor_result, rows_dict, structure_indices, structure_budget
+        )
 
     # Save ASI file
     if write_asi:
@@ -467,6 +973,8 @@ def generate_active_set(
         inverse_dict=inverse_dict,
         structure_indices=structure_indices,
         active_set_dict=active_set_dict,
+        structure_index_dict=structure_index_dict,
+        atom_index_dict=atom_index_dict,
     )
 
 
@@ -475,14 +983,113 @@ def generate_active_set(
 # =============================================================================
 
 
+ASI_BINARY_MAGIC = b"NEPASI01"
+"""二进制 ASI 文件的魔数"""
+
+_ASI_BINARY_ALIGN = 64
+
+
+def _element_active_set(
+    task: tuple,
+) -> tuple[NDArray[np.float64], NDArray[np.int64], NDArray[np.float64]]:
+    """
+    计算单个元素的活跃集及其逆矩阵（可在工作进程中执行）。
+
+    参数:
+        task: (元素符号, B 投影矩阵, gamma_tol, batch_size, method, 初始行索引)
+
+    返回:
+        (活跃集矩阵, 活跃集在投影矩阵中的行索引, 逆矩阵)
+    """
+    elem, B_proj, gamma_tol, batch_size, method, init_selected = task
+    print(f"\nProcessing element: {elem}")
+    # Track row ids so that both structure and atom indices can be recovered
+    A_selected, rows_selected = compute_maxvol(
+        B_proj,
+        np.arange(len(B_proj), dtype=np.int64),
+        gamma_tol=gamma_tol,
+        batch_size=batch_size,
+        method=method,
+        init_selected=init_selected,
+    )
+    return A_selected, rows_selected, _compute_pinv(A_selected)
+
+
+def _extend_structure_budget(
+    descriptor_result: DescriptorProjectionResult,
+    rows_dict: dict[str, NDArray[np.int64]],
+    structure_indices: list[int],
+    structure_budget: int,
+) -> list[int]:
+    """
+    用矩形 MaxVol 为活跃集追加结构，直到结构数达到 structure_budget。
+
+    在结构级别贪心：每步在所有元素中选择体积增长最大的原子环境，加入其所属结构，
+    并把该结构的所有原子环境从候选中排除，因此每步恰好新增一个结构。
+    候选耗尽时提前结束并给出警告。
+
+    返回:
+        排序后的结构索引列表
+    """
+    selected = set(structure_indices)
+    trackers: dict[str, tuple[_RowLeverage, NDArray[np.int64]]] = {}
+    for elem, B_proj in descriptor_result.projection_dict.items():
+        rows_selected = rows_dict[elem]
+        if len(B_proj) <= len(rows_selected):
+            continue
+        struct_ids = descriptor_result.structure_index_dict[elem]
+        leverage = _RowLeverage(B_proj, rows_selected)
+        leverage.lengths[np.isin(struct_ids, list(selected))] = -np.inf
+        trackers[elem] = (leverage, struct_ids)
+
+    while len(selected) < structure_budget:
+        best_elem, best_row, best_length = None, -1, -np.inf
+        for elem, (leverage, _) in trackers.items():
+            row = int(leverage.lengths.argmax())
+            if leverage.lengths[row] > best_length:
+                best_elem, best_row, best_length = elem, row, leverage.lengths[row]
+        if best_elem is None:
+            break
+
+        leverage, struct_ids = trackers[best_elem]
+        struct_id = int(struct_ids[best_row])
+        leverage.add(best_row)
+        selected.add(struct_id)
+        for other, other_ids in trackers.values():
+            other.lengths[other_ids == struct_id] = -np.inf
+
+    print(f"Extended active set structures: {len(structure_indices)} → {len(selected)}")
+    if len(selected) < structure_budget:
+        print(
+            f"警告: 只有 {len(selected)} 个结构可选，"
+            f"未达到 structure_budget ({structure_budget})"
+        )
+    return sorted(selected)
+
+
+def asi_binary_path(asi_file: str | Path) -> Path:
+    """
+    返回与 ASI 文本文件配套的二进制副本路径 (active_set.asi → active_set.asi.bin)。
+
+    参数:
+        asi_file: ASI 文本文件路径
+
+    返回:
+        二进制 ASI 文件路径
+    """
+    asi_file = Path(asi_file)
+    return asi_file.with_name(asi_file.name + ".bin")
+
+
 def write_asi_file(
     active_set_inv: dict[str, NDArray[np.float64]],
     file_path: str | Path = "active_set.asi",
+    binary_sidecar: bool = True,
 ) -> None:
     """
     将活跃集逆矩阵保存到 ASI 文件。
 
-    ASI (Active Set Inverse) 文件格式:
+    ASI (Active Set Inverse) 文件格式（GPUMD 兼容）:
     ```
     元素符号 行数 列数
     矩阵元素1
@@ -490,44 +1097,289 @@ def write_asi_file(
     ...
     ```
 
+    文件先写入临时文件再原子替换，GPUMD 不会读到写了一半的文件。
+
     参数:
         active_set_inv: 按元素分类的逆矩阵字典
         file_path: 输出文件路径
+        binary_sidecar: 是否同时写入二进制副本 (<file_path>.bin)，
+            read_asi_file 会优先读取不旧于文本文件的二进制副本
     """
-    with open(file_path, "w") as f:
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(tmp_path, "w") as f:
         for elem, matrix in active_set_inv.items():
             f.write(f"{elem} {matrix.shape[0]} {matrix.shape[1]}\n")
-            for val in matrix.flatten():
-                f.write(f"{val}\n")
+            np.savetxt(f, np.asarray(matrix).reshape(-1, 1), fmt="%.17g")
+    os.replace(tmp_path, file_path)
+
+    if binary_sidecar:
+        write_asi_binary(active_set_inv, asi_binary_path(file_path))
+    else:
+        # A stale sidecar could tie on coarse mtime resolution
+        asi_binary_path(file_path).unlink(missing_ok=True)
 
 
 def read_asi_file(file_path: str | Path) -> dict[str, NDArray[np.float64]]:
     """
     从 ASI 文件读取活跃集逆矩阵。
 
+    如果存在不旧于文本文件的二进制副本 (<file_path>.bin)，则直接内存映射读取。
+
     参数:
         file_path: ASI 文件路径
 
     返回:
         按元素分类的逆矩阵字典
     """
+    file_path = Path(file_path)
+    binary_path = asi_binary_path(file_path)
+    if (
+        binary_path.exists()
+        and binary_path.stat().st_mtime_ns >= file_path.stat().st_mtime_ns
+    ):
+        return read_asi_binary(binary_path)
+
+    return _read_asi_text(file_path)
+
+
+def _read_asi_text(file_path: str | Path) -> dict[str, NDArray[np.float64]]:
+    """解析 GPUMD 文本格式的 ASI 文件（每行一个值，整体按空白切分后批量转换）"""
     result: dict[str, NDArray] = {}
 
     with open(file_path, "r") as f:
-        while True:
-            line1 = f.readline()
-            if not line1:
-                break
+        tokens = f.read().split()
+
+    pos = 0
+    while pos < len(tokens):
+        elem, rows, cols = tokens[pos], int(tokens[pos + 1]), int(tokens[pos + 2])
+        pos += 3
+        data = np.array(tokens[pos : pos + rows * cols], dtype=np.float64)
+        result[elem] = data.reshape((rows, cols))
+        pos += rows * cols
+
+    return result
+
+
+def write_asi_binary(
+    active_set_inv: dict[str, NDArray[np.float64]],
+    file_path: str | Path,
+) -> None:
+    """
+    将活跃集逆矩阵保存为二进制 ASI 文件。
+
+    二进制格式:
+    ```
+    魔数 "NEPASI01"                    8 字节
+    头部长度 (uint64, 小端)             8 字节
+    头部 JSON [{"element", "rows", "cols", "offset"}, ...]
+    各元素矩阵的 float64 (小端, C 顺序) 数据块，按 64 字节对齐
+    ```
+
+    参数:
+        active_set_inv: 按元素分类的逆矩阵字典
+        file_path: 输出文件路径
+    """
+    file_path = Path(file_path)
+    blocks = [
+        (elem, np.ascontiguousarray(matrix, dtype="<f8"))
+        for elem, matrix in active_set_inv.items()
+    ]
+
+    # Header size depends on the offsets, so fix it up to a stable length
+    header_len = 0
+    while True:
+        offset = _round_up(16 + header_len, _ASI_BINARY_ALIGN)
+        entries = []
+        for elem, matrix in blocks:
+            entries.append(
+                {
+                    "element": elem,
+                    "rows": matrix.shape[0],
+                    "cols": matrix.shape[1],
+                    "offset": offset,
+                }
+            )
+            offset = _round_up(offset + matrix.nbytes, _ASI_BINARY_ALIGN)
+        header = json.dumps(entries).encode()
+        if len(header) <= header_len:
+            header = header.ljust(header_len)
+            break
+        header_len = len(header)
 
-            parts = line1.split()
-            elem, rows, cols = parts[0], int(parts[1]), int(parts[2])
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(ASI_BINARY_MAGIC)
+        f.write(np.uint64(header_len).astype("<u8").tobytes())
+        f.write(header)
+        for entry, (_, matrix) in zip(entries, blocks):
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(matrix.tobytes())
+    os.replace(tmp_path, file_path)
 
-            data = [float(f.readline()) for _ in range(rows * cols)]
-            result[elem] = np.array(data).reshape((rows, cols))
 
+def read_asi_binary(
+    file_path: str | Path,
+    mmap: bool = True,
+) -> dict[str, NDArray[np.float64]]:
+    """
+    读取二进制 ASI 文件。
+
+    参数:
+        file_path: 二进制 ASI 文件路径
+        mmap: 是否使用内存映射（只读），否则一次性读入内存
+
+    返回:
+        按元素分类的逆矩阵字典
+
+    异常:
+        ValueError: 文件不是二进制 ASI 格式
+    """
+    with open(file_path, "rb") as f:
+        if f.read(8) != ASI_BINARY_MAGIC:
+            raise ValueError(f"不是二进制 ASI 文件: {file_path}")
+        header_len = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        entries = json.loads(f.read(header_len))
+
+    result: dict[str, NDArray] = {}
+    for entry in entries:
+        shape = (entry["rows"], entry["cols"])
+        if mmap:
+            result[entry["element"]] = np.memmap(
+                file_path, dtype="<f8", mode="r", offset=entry["offset"], shape=shape
+            )
+        else:
+            result[entry["element"]] = np.fromfile(
+                file_path,
+                dtype="<f8",
+                count=shape[0] * shape[1],
+                offset=entry["offset"],
+            ).reshape(shape)
     return result
 
 
+def convert_asi_text_to_binary(
+    text_file: str | Path,
+    binary_file: str | Path | None = None,
+) -> Path:
+    """
+    将 GPUMD 文本格式的 ASI 文件转换为二进制格式。
+
+    参数:
+        text_file: ASI 文本文件路径
+        binary_file: 输出路径，None 表示 <text_file>.bin
+
+    返回:
+        二进制文件路径
+    """
+    binary_file = asi_binary_path(text_file) if binary_file is None else binary_file
+    # Parse the text explicitly, ignoring any existing sidecar
+    write_asi_binary(_read_asi_text(text_file), binary_file)
+    return Path(binary_file)
+
+
+def convert_asi_binary_to_text(
+    binary_file: str | Path,
+    text_file: str | Path,
+) -> Path:
+    """
+    将二进制 ASI 文件转换为 GPUMD 兼容的文本格式。
+
+    参数:
+        binary_file: 二进制 ASI 文件路径
+        text_file: 输出的文本文件路径
+
+    返回:
+        文本文件路径
+    """
+    write_asi_file(
+        read_asi_binary(binary_file, mmap=False), text_file, binary_sidecar=False
+    )
+    return Path(text_file)
+
+
+def _round_up(value: int, align: int) -> int:
+    return (value + align - 1) // align * align
+
+
+def active_set_state_path(asi_file: str | Path) -> Path:
+    """
+    返回与 ASI 文件配套的活跃集状态文件路径 (active_set.asi → active_set.npz)。
+
+    参数:
+        asi_file: ASI 文件路径
+
+    返回:
+        状态文件路径
+    """
+    return Path(asi_file).with_suffix(".npz")
+
+
+def write_active_set_state(
+    active_set: ActiveSetResult,
+    file_path: str | Path,
+    nep_file: str | Path,
+    n_structures: int,
+    structure_hashes: list[str] | None = None,
+) -> None:
+    """
+    保存活跃集矩阵及其来源索引，供下一轮增量更新使用。
+
+    参数:
+        active_set: 活跃集结果
+        file_path: 输出文件路径 (.npz)
+        nep_file: 生成活跃集所用的 NEP 势函数文件
+        n_structures: 生成活跃集时训练集的结构数
+        structure_hashes: 训练集每个结构的哈希（hash_structure）。
+            None 表示不保存，下一轮增量更新会回退到完整重建
+    """
+    meta = {
+        "elements": list(active_set.active_set_dict.keys()),
+        "model_hash": hash_file(nep_file),
+        "n_structures": int(n_structures),
+    }
+    arrays: dict[str, NDArray] = {"meta": np.array(json.dumps(meta))}
+    if structure_hashes is not None:
+        if len(structure_hashes) != n_structures:
+            raise ValueError("structure_hashes 的长度与 n_structures 不一致")
+        arrays["structure_hashes"] = np.array(structure_hashes, dtype="S40")
+    for elem, A in active_set.active_set_dict.items():
+        arrays[f"{elem}.matrix"] = A
+        arrays[f"{elem}.structure_index"] = active_set.structure_index_dict[elem]
+        arrays[f"{elem}.atom_index"] = active_set.atom_index_dict[elem]
+
+    # np.savez appends .npz when missing, so write through a file handle
+    with open(file_path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def read_active_set_state(file_path: str | Path) -> ActiveSetState:
+    """
+    读取活跃集状态文件。
+
+    参数:
+        file_path: 状态文件路径 (.npz)
+
+    返回:
+        活跃集状态
+    """
+    with np.load(file_path) as data:
+        meta = json.loads(str(data["meta"]))
+        elements = meta["elements"]
+        return ActiveSetState(
+            active_set_dict={e: data[f"{e}.matrix"] for e in elements},
+            structure_index_dict={e: data[f"{e}.structure_index"] for e in elements},
+            atom_index_dict={e: data[f"{e}.atom_index"] for e in elements},
+            model_hash=meta["model_hash"],
+            n_structures=meta["n_structures"],
+            structure_hashes=(
+                [h.decode() for h in data["structure_hashes"]]
+                if "structure_hashes" in data
+                else []
+            ),
+        )
+
+
 # =============================================================================
 # High-Level Selection Functions
 # =============================================================================
@@ -539,6 +1391,12 @@ def select_active_set(
     asi_output_path: str | Path = "active_set.asi",
     gamma_tol: float = 1.001,
     batch_size: int = 10000,
+    method: str = "classic",
+    cache_dir: str | Path | None = None,
+    state_output_path: str | Path | None = None,
+    n_workers: int = 1,
+    structure_budget: int | None = None,
+    element_workers: int = 1,
 ) -> tuple[ActiveSetResult, list[Atoms]]:
     """
     从训练轨迹中选择活跃集。
@@ -551,82 +1409,610 @@ def select_active_set(
         asi_output_path: ASI 文件输出路径
         gamma_tol: MaxVol 收敛阈值
         batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+        cache_dir: 描述符缓存目录，None 表示不使用缓存
+        state_output_path: 活跃集状态文件 (.npz) 输出路径，None 表示不保存
+        n_workers: 并行计算描述符的工作进程数
+        structure_budget: 目标结构数（见 generate_active_set），None 表示不追加
+        element_workers: 按元素并行执行 MaxVol 的进程数
 
     返回:
         (活跃集结果, 被选中的结构列表)
     """
     # Compute descriptor projection
-    descriptor_result = compute_descriptor_projection(trajectory, nep_file)
+    descriptor_result = compute_descriptor_projection(
+        trajectory, nep_file, cache_dir=cache_dir, n_workers=n_workers
+    )
 
     # Generate active set
     active_set = generate_active_set(
         descriptor_result,
         gamma_tol=gamma_tol,
         batch_size=batch_size,
+        method=method,
         write_asi=True,
         asi_output_path=asi_output_path,
+        structure_budget=structure_budget,
+        element_workers=element_workers,
     )
 
+    if state_output_path is not None:
+        write_active_set_state(
+            active_set,
+            state_output_path,
+            nep_file,
+            len(trajectory),
+            [hash_structure(atoms) for atoms in trajectory],
+        )
+
     # Extract selected structures
     selected_structures = [trajectory[i] for i in active_set.structure_indices]
 
     return active_set, selected_structures
 
 
+def update_active_set_incremental(
+    trajectory: list[Atoms],
+    nep_file: str | Path,
+    state_file: str | Path,
+    asi_output_path: str | Path = "active_set.asi",
+    gamma_tol: float = 1.001,
+    batch_size: int = 10000,
+    method: str = "classic",
+    cache_dir: str | Path | None = None,
+    rebuild_tol: float = 0.1,
+    n_workers: int = 1,
+    element_workers: int = 1,
+) -> tuple[ActiveSetResult, bool]:
+    """
+    以上一轮活跃集为起点增量更新活跃集。
+
+    只投影上一轮活跃集所在的结构和新追加的结构（索引 >= n_structures），
+    以上一轮活跃集为初始选择，仅让新结构的原子环境参与 MaxVol 交换。
+    以下情况回退到完整重建：
+    - 状态文件不存在，或训练集比记录的更小
+    - 前 n_structures 个结构的哈希与状态中记录的不一致（训练集被修剪、改写或重排），
+      或状态文件没有记录结构哈希
+    - 元素或描述符维度变化
+    - 新模型下活跃集矩阵的相对变化 ||A_new - A_old|| / ||A_old|| 超过 rebuild_tol
+    - 初始子矩阵奇异
+
+    参数:
+        trajectory: 完整训练集轨迹（新结构追加在末尾）
+        nep_file: 当前 NEP 势函数文件路径
+        state_file: 上一轮活跃集状态文件 (.npz)，更新后会被覆盖
+        asi_output_path: ASI 文件输出路径
+        gamma_tol: MaxVol 收敛阈值
+        batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+        cache_dir: 描述符缓存目录，None 表示不使用缓存
+        rebuild_tol: 触发完整重建的模型漂移阈值
+        n_workers: 并行计算描述符的工作进程数
+        element_workers: 按元素并行执行 MaxVol 的进程数
+
+    返回:
+        (活跃集结果, 是否进行了完整重建)
+    """
+
+    def _rebuild(reason: str) -> tuple[ActiveSetResult, bool]:
+        print(f"Full active set rebuild: {reason}")
+        active_set, _ = select_active_set(
+            trajectory,
+            nep_file,
+            asi_output_path=asi_output_path,
+            gamma_tol=gamma_tol,
+            batch_size=batch_size,
+            method=method,
+            cache_dir=cache_dir,
+            state_output_path=state_file,
+            n_workers=n_workers,
+            element_workers=element_workers,
+        )
+        return active_set, True
+
+    if not Path(state_file).exists():
+        return _rebuild("no previous active set state")
+
+    state = read_active_set_state(state_file)
+    if state.n_structures > len(trajectory):
+        return _rebuild("training set is smaller than recorded")
+    if len(state.structure_hashes) != state.n_structures:
+        return _rebuild("previous state has no structure fingerprints")
+
+    # Structures [0, n_structures) must be exactly the ones the state refers to
+    structure_hashes = [hash_structure(atoms) for atoms in trajectory]
+    changed = next(
+        (
+            i
+            for i, (old, new) in enumerate(
+                zip(state.structure_hashes, structure_hashes)
+            )
+            if old != new
+        ),
+        None,
+    )
+    if changed is not None:
+        return _rebuild(
+            f"structure {changed} differs from the recorded training set "
+            "(pruned, rewritten or reordered)"
+        )
+
+    # Project previous active set structures and newly labelled structures only
+    active_structs = sorted(
+        {int(i) for idx in state.structure_index_dict.values() for i in idx}
+    )
+    new_structs = list(range(state.n_structures, len(trajectory)))
+    subset = np.array(active_structs + new_structs, dtype=np.int64)
+    print(
+        f"Incremental update: {len(active_structs)} active set structures, "
+        f"{len(new_structs)} new structures"
+    )
+
+    descriptor_result = compute_descriptor_projection(
+        [trajectory[i] for i in subset],
+        nep_file,
+        cache_dir=cache_dir,
+        require_tall=False,
+        n_workers=n_workers,
+    )
+    if set(descriptor_result.projection_dict) != set(state.active_set_dict):
+        return _rebuild("element set changed")
+
+    # Locate previous active set rows and measure model drift
+    local_of_global = {int(g): local for local, g in enumerate(subset)}
+    init_rows: dict[str, NDArray[np.int64]] = {}
+    for elem, A_old in state.active_set_dict.items():
+        B_proj = descriptor_result.projection_dict[elem]
+        if B_proj.shape[1] != A_old.shape[1]:
+            return _rebuild(f"descriptor dimension of {elem} changed")
+
+        row_of = {
+            (int(s_), int(a_)): row
+            for row, (s_, a_) in enumerate(
+                zip(
+                    descriptor_result.structure_index_dict[elem],
+                    descriptor_result.atom_index_dict[elem],
+                )
+            )
+        }
+        try:
+            rows = np.array(
+                [
+                    row_of[(local_of_global[int(s_)], int(a_))]
+                    for s_, a_ in zip(
+                        state.structure_index_dict[elem], state.atom_index_dict[elem]
+                    )
+                ],
+                dtype=np.int64,
+            )
+        except KeyError:
+            return _rebuild(f"previous active set rows of {elem} not found")
+        drift = np.linalg.norm(B_proj[rows] - A_old) / np.linalg.norm(A_old)
+        print(f"  {elem}: model drift of active set = {drift:.4f}")
+        if drift > rebuild_tol:
+            return _rebuild(f"model drift {drift:.4f} > {rebuild_tol}")
+        init_rows[elem] = rows
+
+    try:
+        active_set = generate_active_set(
+            descriptor_result,
+            gamma_tol=gamma_tol,
+            batch_size=batch_size,
+            method=method,
+            write_asi=True,
+            asi_output_path=asi_output_path,
+            init_rows=init_rows,
+            element_workers=element_workers,
+        )
+    except np.linalg.LinAlgError:
+        return _rebuild("previous active set is singular under the new model")
+
+    # Map subset indices back to the full training set
+    for elem in active_set.structure_index_dict:
+        active_set.structure_index_dict[elem] = subset[
+            active_set.structure_index_dict[elem]
+        ]
+    active_set.structure_indices = sorted(
+        int(subset[i]) for i in active_set.structure_indices
+    )
+
+    write_active_set_state(
+        active_set, state_file, nep_file, len(trajectory), structure_hashes
+    )
+    return active_set, False
+
+
 def select_extension_structures(
     train_trajectory: list[Atoms],
-    candidate_trajectory: list[Atoms],
+    candidate_trajectory: Iterable[Atoms],
     nep_file: str | Path,
     gamma_tol: float = 1.001,
     batch_size: int = 10000,
-) -> list[Atoms]:
+    method: str = "classic",
+    cache_dir: str | Path | None = None,
+    n_workers: int = 1,
+    chunk_size: int | None = None,
+    with_descriptors: bool = False,
+    element_workers: int = 1,
+) -> list[Atoms] | tuple[list[Atoms], NDArray[np.float64]]:
     """
     从候选结构中选择需要标注的新结构。
 
     这是 select_extend.py 的函数化版本。
     算法合并训练集和候选集，执行 MaxVol，然后只返回来自候选集的结构。
 
+    给定 chunk_size 时使用流式模式：先由训练集生成活跃集，再逐块读取候选结构，
+    每块与当前活跃集合并后热启动 MaxVol。内存中只保留当前活跃集和一块候选结构，
+    candidate_trajectory 可以是 iter_trajectory 返回的生成器。
+
     参数:
         train_trajectory: 当前训练集
-        candidate_trajectory: 高 Gamma 候选结构
+        candidate_trajectory: 高 Gamma 候选结构（列表或生成器）
         nep_file: NEP 势函数文件路径
         gamma_tol: MaxVol 收敛阈值
         batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+        cache_dir: 描述符缓存目录，None 表示不使用缓存
+        n_workers: 并行计算描述符的工作进程数
+        chunk_size: 流式模式下每块候选结构数，None 表示一次性合并计算
+        with_descriptors: 是否同时返回选中结构的平均描述符
+            （与 B_projection 在同一次 NEP 计算中得到，供 FPS 复用）
+        element_workers: 按元素并行执行 MaxVol 的进程数（仅非流式模式）
 
     返回:
-        被选中的新结构列表（仅来自候选集）
+        被选中的新结构列表（仅来自候选集）；
+        with_descriptors 为 True 时返回 (结构列表, 平均描述符矩阵)
     """
+    if chunk_size is not None:
+        train_result = compute_descriptor_projection(
+            train_trajectory,
+            nep_file,
+            cache_dir=cache_dir,
+            require_tall=False,
+            n_workers=n_workers,
+        )
+        active_set_dict: dict[str, NDArray] = {}
+        owner_dict: dict[str, NDArray] = {}
+        for elem, B_proj in train_result.projection_dict.items():
+            A_selected, _ = _maxvol_extend(
+                None,
+                None,
+                B_proj,
+                np.full(len(B_proj), -1, dtype=np.int64),
+                gamma_tol=gamma_tol,
+                batch_size=batch_size,
+                method=method,
+            )
+            active_set_dict[elem] = A_selected
+            owner_dict[elem] = np.full(len(A_selected), -1, dtype=np.int64)
+
+        new_structures, n_candidates, new_descriptors = _extend_active_set_streaming(
+            active_set_dict,
+            owner_dict,
+            candidate_trajectory,
+            nep_file,
+            gamma_tol=gamma_tol,
+            batch_size=batch_size,
+            method=method,
+            chunk_size=chunk_size,
+            n_workers=n_workers,
+            with_descriptors=with_descriptors,
+        )
+        print(
+            f"\nSelected {len(new_structures)} new structures from {n_candidates} candidates"
+        )
+        if with_descriptors:
+            return new_structures, new_descriptors
+        return new_structures
+
+    candidate_trajectory = list(candidate_trajectory)
     train_size = len(train_trajectory)
     merged_trajectory = train_trajectory + candidate_trajectory
 
     # Compute descriptor projection
-    descriptor_result = compute_descriptor_projection(merged_trajectory, nep_file)
+    descriptor_result = compute_descriptor_projection(
+        merged_trajectory,
+        nep_file,
+        cache_dir=cache_dir,
+        n_workers=n_workers,
+        with_descriptors=with_descriptors,
+    )
 
     # Generate active set (without writing ASI file)
     active_set = generate_active_set(
         descriptor_result,
         gamma_tol=gamma_tol,
         batch_size=batch_size,
+        method=method,
         write_asi=False,
+        element_workers=element_workers,
     )
 
     # Keep only structures from candidate set
-    new_structures = [
-        merged_trajectory[i] for i in active_set.structure_indices if i >= train_size
-    ]
+    new_indices = [i for i in active_set.structure_indices if i >= train_size]
+    new_structures = [merged_trajectory[i] for i in new_indices]
 
     print(
         f"\nSelected {len(new_structures)} new structures from {len(candidate_trajectory)} candidates"
     )
+    if with_descriptors:
+        return new_structures, descriptor_result.mean_descriptors[new_indices]
+    return new_structures
+
+
+def select_extension_from_active_set(
+    candidate_trajectory: Iterable[Atoms],
+    nep_file: str | Path,
+    state: ActiveSetState,
+    reference_trajectory: list[Atoms] | None = None,
+    gamma_tol: float = 1.001,
+    batch_size: int = 10000,
+    method: str = "classic",
+    n_workers: int = 1,
+    chunk_size: int = 1000,
+    with_descriptors: bool = False,
+) -> list[Atoms] | tuple[list[Atoms], NDArray[np.float64]]:
+    """
+    以保存的活跃集为基准，只对候选结构执行 MaxVol 扩展。
+
+    与 select_extension_structures 不同，训练集不参与计算：活跃集矩阵来自
+    active_set.npz（read_active_set_state），候选结构逐块投影后先按初始活跃集计算 gamma
+    （与 GPUMD compute_extrapolation 的判据一致），所有原子 gamma <= gamma_tol 的结构
+    视为已被覆盖而直接跳过，其余结构的原子环境与活跃集一起热启动 MaxVol。
+    计算量只与候选结构数有关。
+
+    参数:
+        candidate_trajectory: 高 Gamma 候选结构（列表或生成器）
+        nep_file: NEP 势函数文件路径，必须与生成活跃集的模型一致
+        state: 活跃集状态（read_active_set_state 的返回值）
+        reference_trajectory: 额外视为已标注的结构（如本轮已选中的结构），
+            先并入活跃集，不会被返回
+        gamma_tol: MaxVol 收敛阈值（同时作为 gamma 预筛阈值）
+        batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+        n_workers: 并行计算描述符的工作进程数
+        chunk_size: 每块候选结构数
+        with_descriptors: 是否同时返回选中结构的平均描述符
+
+    返回:
+        被选中的新结构列表；with_descriptors 为 True 时返回 (结构列表, 平均描述符矩阵)
+
+    异常:
+        ValueError: 活跃集状态由其他模型生成时抛出
+    """
+    if state.model_hash != hash_file(nep_file):
+        raise ValueError(f"活跃集状态与当前模型 {nep_file} 不一致")
+
+    active_set_dict = dict(state.active_set_dict)
+    owner_dict = {
+        elem: np.full(len(A), -1, dtype=np.int64) for elem, A in active_set_dict.items()
+    }
+    print(
+        "Loaded active set: "
+        + ", ".join(f"{e}: {A.shape}" for e, A in active_set_dict.items())
+    )
+
+    if reference_trajectory:
+        result = compute_descriptor_projection(
+            reference_trajectory,
+            nep_file,
+            show_progress=False,
+            require_tall=False,
+            n_workers=n_workers,
+        )
+        for elem, B_proj in result.projection_dict.items():
+            active_set_dict[elem], owner_dict[elem] = _maxvol_extend(
+                active_set_dict.get(elem),
+                owner_dict.get(elem),
+                B_proj,
+                np.full(len(B_proj), -1, dtype=np.int64),
+                gamma_tol=gamma_tol,
+                batch_size=batch_size,
+                method=method,
+            )
+
+    # Gamma prescreen uses the initial active set, independent of chunk order
+    prescreen_inverse = {
+        elem: _compute_pinv(A)
+        for elem, A in active_set_dict.items()
+        if A.shape[0] == A.shape[1]
+    }
+
+    new_structures, n_candidates, new_descriptors = _extend_active_set_streaming(
+        active_set_dict,
+        owner_dict,
+        candidate_trajectory,
+        nep_file,
+        gamma_tol=gamma_tol,
+        batch_size=batch_size,
+        method=method,
+        chunk_size=chunk_size,
+        n_workers=n_workers,
+        with_descriptors=with_descriptors,
+        prescreen_inverse=prescreen_inverse,
+    )
+    print(
+        f"\nSelected {len(new_structures)} new structures from {n_candidates} candidates"
+    )
+    if with_descriptors:
+        return new_structures, new_descriptors
     return new_structures
 
 
+def _maxvol_extend(
+    A_active: NDArray[np.float64] | None,
+    owner_active: NDArray[np.int64] | None,
+    A_new: NDArray[np.float64],
+    owner_new: NDArray[np.int64],
+    gamma_tol: float = 1.001,
+    batch_size: int | None = None,
+    method: str = "classic",
+) -> tuple[NDArray[np.float64], NDArray[np.int64]]:
+    """
+    将新的原子环境并入当前活跃集。
+
+    当前活跃集为方阵时以其为起点热启动 MaxVol；
+    环境数尚不足以构成方阵时保留全部环境，直到足够后再从头执行 MaxVol。
+
+    参数:
+        A_active: 当前活跃集矩阵，None 表示尚无活跃集
+        owner_active: 当前活跃集每一行的归属标签
+        A_new: 新增环境的描述符矩阵
+        owner_new: 新增环境的归属标签
+        gamma_tol: MaxVol 收敛阈值
+        batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+
+    返回:
+        (新的活跃集矩阵, 对应的归属标签)
+    """
+    if A_active is None or len(A_active) == 0:
+        A_joint, owner_joint = A_new, owner_new
+        init_selected = None
+    else:
+        A_joint = np.vstack([A_active, A_new])
+        owner_joint = np.concatenate([owner_active, owner_new])
+        n, d = A_active.shape
+        init_selected = np.arange(n) if n == d else None
+
+    if len(A_joint) <= A_joint.shape[1]:
+        # Not enough environments to form a square active set yet
+        return A_joint, owner_joint
+
+    return compute_maxvol(
+        A_joint,
+        owner_joint,
+        gamma_tol=gamma_tol,
+        batch_size=batch_size,
+        method=method,
+        n_refinement=0,
+        init_selected=init_selected,
+    )
+
+
+def _extend_active_set_streaming(
+    active_set_dict: dict[str, NDArray[np.float64]],
+    owner_dict: dict[str, NDArray[np.int64]],
+    candidates: Iterable[Atoms],
+    nep_file: str | Path,
+    gamma_tol: float = 1.001,
+    batch_size: int | None = None,
+    method: str = "classic",
+    chunk_size: int = 1000,
+    n_workers: int = 1,
+    with_descriptors: bool = False,
+    prescreen_inverse: dict[str, NDArray[np.float64]] | None = None,
+) -> tuple[list[Atoms], int, NDArray[np.float64] | None]:
+    """
+    逐块将候选结构并入活跃集，只返回最终活跃集中来自候选集的结构。
+
+    owner_dict 中 -1 表示该行来自训练集，非负数为候选结构的全局序号。
+    每处理完一块，只保留仍被活跃集引用的候选结构，内存占用与候选总数无关。
+    给定 prescreen_inverse 时，相对该活跃集逆矩阵所有原子 gamma <= gamma_tol
+    的结构不参与 MaxVol。
+
+    参数:
+        active_set_dict: 按元素分类的初始活跃集矩阵（原地更新）
+        owner_dict: 初始活跃集每一行的归属标签（原地更新）
+        candidates: 候选结构（列表或生成器）
+        nep_file: NEP 势函数文件路径
+        gamma_tol: MaxVol 收敛阈值
+        batch_size: 批处理大小
+        method: MaxVol 实现（见 MAXVOL_METHODS）
+        chunk_size: 每块候选结构数
+        n_workers: 并行计算描述符的工作进程数
+        with_descriptors: 是否同时保留新结构的平均描述符
+        prescreen_inverse: 用于 gamma 预筛的活跃集逆矩阵，None 表示不预筛
+
+    返回:
+        (按候选顺序排列的新结构列表, 候选结构总数,
+        新结构的平均描述符矩阵或 None)
+    """
+    retained: dict[int, Atoms] = {}
+    retained_desc: dict[int, NDArray] = {}
+    offset = 0
+
+    for i_chunk, chunk in enumerate(iter_chunks(candidates, chunk_size)):
+        print(f"\nCandidate chunk {i_chunk + 1}: {len(chunk)} structures")
+        result = compute_descriptor_projection(
+            chunk,
+            nep_file,
+            require_tall=False,
+            n_workers=n_workers,
+            with_descriptors=with_descriptors,
+        )
+        keep = None
+        if prescreen_inverse is not None:
+            keep = _prescreen_structures(
+                result, prescreen_inverse, len(chunk), gamma_tol
+            )
+            print(f"  Gamma prescreen: {int(keep.sum())}/{len(chunk)} structures kept")
+
+        for elem, B_proj in result.projection_dict.items():
+            struct_index = result.structure_index_dict[elem]
+            if keep is not None:
+                rows = keep[struct_index]
+                if not rows.any():
+                    continue
+                B_proj, struct_index = B_proj[rows], struct_index[rows]
+            active_set_dict[elem], owner_dict[elem] = _maxvol_extend(
+                active_set_dict.get(elem),
+                owner_dict.get(elem),
+                B_proj,
+                struct_index + offset,
+                gamma_tol=gamma_tol,
+                batch_size=batch_size,
+                method=method,
+            )
+
+        # Keep only candidates still referenced by the active set
+        for i, atoms in enumerate(chunk):
+            retained[offset + i] = atoms
+            if with_descriptors:
+                retained_desc[offset + i] = result.mean_descriptors[i]
+        owned = set(
+            np.concatenate([np.empty(0, dtype=np.int64), *owner_dict.values()]).tolist()
+        )
+        retained = {i: atoms for i, atoms in retained.items() if i in owned}
+        retained_desc = {i: d for i, d in retained_desc.items() if i in owned}
+        offset += len(chunk)
+
+    order = sorted(retained)
+    descriptors = (
+        np.array([retained_desc[i] for i in order]) if with_descriptors else None
+    )
+    return [retained[i] for i in order], offset, descriptors
+
+
+def _prescreen_structures(
+    result: DescriptorProjectionResult,
+    inverse_dict: dict[str, NDArray[np.float64]],
+    n_structures: int,
+    gamma_tol: float,
+) -> NDArray[np.bool_]:
+    """
+    按活跃集逆矩阵计算每个结构的最大 gamma，返回 gamma > gamma_tol 的结构掩码。
+
+    inverse_dict 中没有的元素（活跃集尚不是方阵）无法计算 gamma，含该元素的结构一律保留。
+    """
+    struct_gamma = np.zeros(n_structures)
+    for elem, B_proj in result.projection_dict.items():
+        inv_matrix = inverse_dict.get(elem)
+        if inv_matrix is None:
+            gamma = np.full(len(B_proj), np.inf)
+        else:
+            gamma = np.max(np.abs(B_proj @ inv_matrix), axis=1)
+        np.maximum.at(struct_gamma, result.structure_index_dict[elem], gamma)
+    return struct_gamma > gamma_tol
+
+
 def filter_high_gamma_structures(
     trajectory: list[Atoms],
     nep_file: str | Path,
     asi_file: str | Path,
     gamma_min: float = 1.0,
     gamma_max: float = float("inf"),
+    n_workers: int = 1,
 ) -> list[Atoms]:
     """
     根据 Gamma 值筛选结构。
@@ -639,12 +2025,13 @@ def filter_high_gamma_structures(
         asi_file: Active Set Inverse 文件路径
         gamma_min: Gamma 下限阈值
         gamma_max: Gamma 上限阈值
+        n_workers: 并行计算的工作进程数，<= 1 表示串行
 
     返回:
         满足 gamma_min < max_gamma < gamma_max 的结构列表
     """
     # Compute gamma values
-    compute_gamma(trajectory, nep_file, asi_file)
+    compute_gamma(trajectory, nep_file, asi_file, n_workers=n_workers)
 
     # Filter
     filtered = []
@@ -659,6 +2046,137 @@ def filter_high_gamma_structures(
     return filtered
 
 
+def select_within_budget(
+    structures: list[Atoms],
+    nep_file: str | Path,
+    active_set_inv: dict[str, NDArray[np.float64]],
+    max_count: int,
+    gamma_tol: float = 1.001,
+    reference_trajectory: list[Atoms] | None = None,
+    cache_dir: str | Path | None = None,
+    n_workers: int = 1,
+) -> list[Atoms]:
+    """
+    在结构数预算内按信息量贪心选择结构（替代随机截断）。
+
+    先用活跃集逆矩阵计算每个原子环境的 gamma，gamma > gamma_tol 的环境视为
+    新环境。结构得分为其新环境的 log(1 + l) 之和，其中 l = a (A^T A)^(-1) a^T
+    是环境相对当前参考集的杠杆值（加入该环境后体积平方增大 1 + l 倍），
+    因此同时反映 gamma 大小和新环境数量。每选中一个结构，就把它的新环境加入
+    参考集并用 Sherman-Morrison 公式更新 (A^T A)^(-1)，与其相似的环境得分随之下降。
+    所有结构得分为 0 后按最大 gamma 从大到小补足预算。
+
+    参数:
+        structures: 待筛选的结构列表（通常是 MaxVol 选出的结构）
+        nep_file: NEP 势函数文件路径
+        active_set_inv: 当前活跃集逆矩阵（与 nep_file 对应）
+        max_count: 结构数预算
+        gamma_tol: 判定新环境的 gamma 阈值
+        reference_trajectory: 已选中的结构（如流水线模式中本轮已选结构），
+            其新环境预先加入参考集
+        cache_dir: 描述符缓存目录，None 表示不使用缓存
+        n_workers: 并行计算描述符的工作进程数
+
+    返回:
+        选中的结构列表（数量 = min(max_count, len(structures))，保持原始顺序）
+    """
+    if len(structures) <= max_count:
+        return structures
+
+    reference_trajectory = reference_trajectory or []
+    n_ref = len(reference_trajectory)
+    descriptor_result = compute_descriptor_projection(
+        reference_trajectory + structures,
+        nep_file,
+        show_progress=False,
+        cache_dir=cache_dir,
+        require_tall=False,
+        n_workers=n_workers,
+    )
+
+    n = len(structures)
+    max_gamma = np.zeros(n)
+    elements: list[_BudgetElement] = []
+    for elem, B_proj in descriptor_result.projection_dict.items():
+        if elem not in active_set_inv:
+            continue
+        inv_matrix = active_set_inv[elem]
+        owner = descriptor_result.structure_index_dict[elem] - n_ref
+        C = B_proj @ inv_matrix
+        gamma = np.abs(C).max(axis=1)
+        is_new = gamma > gamma_tol
+
+        # (A^T A)^(-1) = A^(-1) A^(-T) for the square active set
+        state = _BudgetElement(
+            B_proj=B_proj,
+            owner=owner,
+            is_new=is_new,
+            gram_inv=inv_matrix @ inv_matrix.T,
+            leverage=np.einsum("ij,ij->i", C, C),
+        )
+        for row in np.flatnonzero(is_new & (owner < 0)):
+            state.add_row(row)
+
+        cand = owner >= 0
+        np.maximum.at(max_gamma, owner[cand], gamma[cand])
+        elements.append(state)
+
+    selected: list[int] = []
+    available = np.ones(n, dtype=bool)
+    while len(selected) < max_count:
+        score = np.zeros(n)
+        for state in elements:
+            rows = state.is_new & (state.owner >= 0)
+            np.add.at(
+                score,
+                state.owner[rows],
+                np.log1p(np.maximum(state.leverage[rows], 0.0)),
+            )
+
+        # Highest score first; structures without new environments by max gamma
+        order = np.lexsort((-max_gamma, -score))
+        best = int(order[available[order]][0])
+        selected.append(best)
+        available[best] = False
+
+        for state in elements:
+            rows = state.owner == best
+            for row in np.flatnonzero(state.is_new & rows):
+                state.add_row(row)
+            state.is_new[rows] = False
+
+    print(f"按预算选择 {len(selected)}/{n} 个结构（最大 gamma 与新环境覆盖）")
+    return [structures[i] for i in sorted(selected)]
+
+
+@dataclass
+class _BudgetElement:
+    """select_within_budget 中单个元素的状态"""
+
+    B_proj: NDArray[np.float64]
+    """参考结构和候选结构的 B 投影矩阵"""
+
+    owner: NDArray[np.int64]
+    """每行所属的候选结构索引（参考结构为负数）"""
+
+    is_new: NDArray[np.bool_]
+    """尚未加入参考集的新环境（gamma > gamma_tol）"""
+
+    gram_inv: NDArray[np.float64]
+    """参考集的 (A^T A)^(-1)"""
+
+    leverage: NDArray[np.float64]
+    """每行相对参考集的杠杆值 a (A^T A)^(-1) a^T"""
+
+    def add_row(self, row: int) -> None:
+        """将一个环境加入参考集（Sherman-Morrison 更新）"""
+        a = self.B_proj[row]
+        u = self.gram_inv @ a
+        denom = 1.0 + a @ u
+        self.gram_inv -= np.outer(u, u) / denom
+        self.leverage -= (self.B_proj @ u) ** 2 / denom
+
+
 # =============================================================================
 # Convenience I/O Functions
 # =============================================================================
@@ -683,12 +2201,16 @@ def read_trajectory(
     if format == "auto":
         format = "nep" if file_path.suffix == ".xyz" else "xyz"
 
-    if format == "nep" and load_nep is not None:
+    if format == "nep":
         try:
+            from pynep.io import load_nep
+
             return load_nep(str(file_path))
         except Exception:
             pass
 
+    from ase.io import read as ase_read
+
     return ase_read(str(file_path), index=":")
 
 
@@ -710,48 +2232,206 @@ def write_trajectory(
     if format == "auto":
         format = "nep"
 
-    if format == "nep" and dump_nep is not None:
+    if format == "nep":
         try:
+            from pynep.io import dump_nep
+
             dump_nep(str(file_path), trajectory)
             return
         except Exception:
             pass
 
+    from ase.io import write as ase_write
+
     ase_write(str(file_path), trajectory)
 
 
+def iter_trajectory(file_path: str | Path) -> Iterator[Atoms]:
+    """
+    逐帧流式读取 extxyz 轨迹文件，不把整个文件读入内存。
+
+    参数:
+        file_path: 轨迹文件路径
+
+    返回:
+        Atoms 对象生成器
+    """
+    from ase.io import iread as ase_iread
+
+    file_path = Path(file_path)
+    if file_path.stat().st_size == 0:
+        return iter(())
+    return ase_iread(str(file_path), index=":", format="extxyz")
+
+
+def iter_chunks(iterable: Iterable, chunk_size: int) -> Iterator[list]:
+    """
+    将可迭代对象按固定大小分块。
+
+    参数:
+        iterable: 任意可迭代对象
+        chunk_size: 每块的元素个数
+
+    返回:
+        列表生成器（最后一块可能不足 chunk_size）
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def append_trajectory(trajectory: list[Atoms], file_path: str | Path) -> None:
+    """
+    以 extxyz 格式把结构追加到文件末尾（文件不存在时创建）。
+
+    参数:
+        trajectory: Atoms 对象列表
+        file_path: 输出文件路径
+    """
+    if trajectory:
+        from ase.io import write as ase_write
+
+        ase_write(str(file_path), trajectory, format="extxyz", append=True)
+
+
+def stream_trajectory(
+    input_files: Iterable[str | Path],
+    output_file: str | Path,
+    frame_filter: Callable[[Atoms], bool] | None = None,
+    chunk_size: int = 1000,
+) -> list[int]:
+    """
+    流式合并多个轨迹文件：逐块读取、过滤并追加到输出文件。
+
+    内存占用只与 chunk_size 有关，与文件大小无关。
+    读取某个文件出错（如最后一帧被截断）时保留已写入的帧并打印警告。
+
+    参数:
+        input_files: 输入文件列表（不存在的文件会被跳过，计数为 0）
+        output_file: 输出文件路径（追加写入）
+        frame_filter: 帧过滤函数，返回 True 表示保留，None 表示全部保留
+        chunk_size: 每次读写的帧数
+
+    返回:
+        每个输入文件写入的帧数
+    """
+    counts = []
+    for input_file in input_files:
+        n_written = 0
+        if Path(input_file).exists():
+            try:
+                frames = iter_trajectory(input_file)
+                if frame_filter is not None:
+                    frames = filter(frame_filter, frames)
+                for chunk in iter_chunks(frames, chunk_size):
+                    append_trajectory(chunk, output_file)
+                    n_written += len(chunk)
+            except Exception as e:
+                print(f"警告: 读取 {input_file} 出错，已保留 {n_written} 帧: {e}")
+        counts.append(n_written)
+    return counts
+
+
 # =============================================================================
 # FPS (最远点采样) 筛选
 # =============================================================================
 
 
+def farthest_point_sample(
+    descriptors: NDArray[np.float64],
+    n_select: int,
+    reference: NDArray[np.float64] | None = None,
+    min_distance: float = 0.0,
+    chunk_size: int = 4096,
+) -> NDArray[np.int64]:
+    """
+    最远点采样：一次遍历选出 n_select 个相互距离最远的点。
+
+    维护每个点到已选点集的最小平方距离，每选一个点只计算它到所有点的距离并
+    逐元素取最小值，每步代价 O(N·D)。
+
+    参数:
+        descriptors: 候选点描述符，形状为 (N, D)
+        n_select: 目标选择数
+        reference: 已选点的描述符 (M, D)（如训练集），候选点到这些点的距离
+            作为初始最小距离；None 表示从第一个候选点开始
+        min_distance: 最远点到已选点集的距离不超过该值时提前停止（视为重复结构）
+        chunk_size: 计算到 reference 的距离时每块的行数
+
+    返回:
+        按选择顺序排列的候选点索引（数量 <= n_select）
+    """
+    X = np.asarray(descriptors, dtype=np.float64)
+    n = len(X)
+    n_select = min(n_select, n)
+    sq_norms = np.einsum("ij,ij->i", X, X)
+
+    min_dist = np.full(n, np.inf)
+    if reference is not None and len(reference) > 0:
+        R = np.asarray(reference, dtype=np.float64)
+        for start in range(0, len(R), chunk_size):
+            R_chunk = R[start : start + chunk_size]
+            d2 = (
+                sq_norms[:, None]
+                + np.einsum("ij,ij->i", R_chunk, R_chunk)[None, :]
+                - 2.0 * X @ R_chunk.T
+            )
+            np.minimum(min_dist, d2.min(axis=1), out=min_dist)
+        np.maximum(min_dist, 0.0, out=min_dist)
+
+    threshold = min_distance**2
+    selected = np.empty(n_select, dtype=np.int64)
+    n_selected = 0
+    while n_selected < n_select:
+        i = int(min_dist.argmax())
+        if min_dist[i] <= threshold:
+            break
+        selected[n_selected] = i
+        n_selected += 1
+        d2 = sq_norms - 2.0 * (X @ X[i]) + sq_norms[i]
+        np.minimum(min_dist, d2, out=min_dist)
+        min_dist[i] = 0.0
+
+    return selected[:n_selected]
+
+
 def apply_fps_filter(
     structures: list[Atoms],
     nep_file: str | Path,
     max_count: int,
-    initial_min_distance: float = 0.01,
+    min_distance: float = 0.0,
     show_progress: bool = True,
+    n_workers: int = 1,
+    descriptors: NDArray[np.float64] | None = None,
+    reference_descriptors: NDArray[np.float64] | None = None,
 ) -> list[Atoms]:
     """
     使用 FPS (最远点采样) 对结构进行二次筛选。
 
-    该函数用于在 MaxVol 选择后进一步确保结构的多样性。
-    如果 FPS 选出的结构数量不足 max_count，会自动降低 min_distance。
-    如果超过 max_count，会随机丢弃多余的结构。
+    该函数用于在 MaxVol 选择后进一步确保结构的多样性，
+    一次遍历直接选出 max_count 个结构（见 farthest_point_sample）。
 
     参数:
         structures: 待筛选的结构列表（通常是 MaxVol 选出的结构）
         nep_file: NEP 势函数文件路径
         max_count: 目标结构数量（max_structures_per_iteration）
-        initial_min_distance: 初始最小距离阈值
+        min_distance: 与已选结构的描述符距离不超过该值的结构视为重复，不再选择
         show_progress: 是否显示进度
+        n_workers: 并行计算描述符的工作进程数
+        descriptors: 预先计算的结构平均描述符 (n_structures, D)，
+            通常由 select_extension_structures(with_descriptors=True) 给出；
+            None 时重新调用 NEP 计算
+        reference_descriptors: 已有结构（如训练集）的平均描述符，
+            FPS 从这些结构出发，优先选择远离它们的结构；None 表示不使用
 
     返回:
-        筛选后的结构列表（数量 <= max_count）
+        筛选后的结构列表（数量 <= max_count，保持原始顺序）
     """
-    if FarthestPointSample is None:
-        raise ImportError("请先安装 PyNEP: pip install pynep")
-
     if len(structures) == 0:
         return structures
 
@@ -761,63 +2441,28 @@ def apply_fps_filter(
 
     # 计算描述符（结构级别平均）
     print(f"\n执行 FPS 二次筛选: {len(structures)} → 目标 {max_count}")
-    calc = NEP(str(nep_file))
-
-    descriptors = []
-    iterator = tqdm(structures, desc="计算描述符") if show_progress else structures
-
-    for structure in iterator:
-        desc = calc.get_property("descriptor", structure)
-        # 对每个结构求平均描述符
-        descriptors.append(np.mean(desc, axis=0))
-
-    descriptors_array = np.array(descriptors)
+    if descriptors is not None:
+        descriptors_array = np.asarray(descriptors)
+    else:
+        descriptors_array = mean_descriptors(
+            structures, nep_file, n_workers=n_workers, show_progress=show_progress
+        )
     print(f"描述符形状: {descriptors_array.shape}")
 
-    # 自动调整 min_distance 以满足 max_count 约束
-    min_distance = initial_min_distance
-    max_iterations = 10
-
-    for attempt in range(max_iterations):
-        sampler = FarthestPointSample(min_distance=min_distance)
-        selected_indices = sampler.select(descriptors_array, [])
-        n_selected = len(selected_indices)
-
+    selected_indices = farthest_point_sample(
+        descriptors_array,
+        max_count,
+        reference=reference_descriptors,
+        min_distance=min_distance,
+    )
+    if len(selected_indices) < max_count:
         print(
-            f"  尝试 {attempt + 1}: min_distance={min_distance:.6f}, "
-            f"选中 {n_selected} 个结构"
+            f"  剩余结构与已选结构的距离均不超过 {min_distance}，"
+            f"仅选出 {len(selected_indices)} 个结构"
         )
 
-        if n_selected >= max_count:
-            # 选出的数量足够或过多
-            if n_selected > max_count:
-                # 随机丢弃多余的结构
-                print(
-                    f"  FPS 选出 {n_selected} > {max_count}，随机丢弃 "
-                    f"{n_selected - max_count} 个"
-                )
-                np.random.shuffle(selected_indices)
-                selected_indices = selected_indices[:max_count]
-
-            selected_structures = [structures[i] for i in selected_indices]
-            print(f"✓ FPS 筛选完成: {len(structures)} → {len(selected_structures)}\n")
-            return selected_structures
-
-        # 数量不足，降低 min_distance
-        min_distance *= 0.7  # 每次减少30%
-
-        if min_distance < 1e-6:
-            # min_distance 太小了，直接返回所有选中的
-            print(
-                f"  警告: min_distance 已降至 {min_distance:.2e}，"
-                f"仅选出 {n_selected} 个结构"
-            )
-            selected_structures = [structures[i] for i in selected_indices]
-            return selected_structures
-
-    # 达到最大尝试次数，返回当前结果
-    print(f"  警告: 达到最大尝试次数，FPS 仅选出 {len(selected_indices)} 个结构")
-    selected_structures = [structures[i] for i in selected_indices]
+    selected_structures = [structures[i] for i in np.sort(selected_indices)]
+    print(f"✓ FPS 筛选完成: {len(structures)} → {len(selected_structures)}\n")
     return selected_structures
 
 
@@ -826,24 +2471,28 @@ def prune_training_set_maxvol(
     nep_file: str | Path,
     max_structures: int,
     show_progress: bool = True,
+    n_workers: int = 1,
+    method: str = "classic",
 ) -> list[Atoms]:
     """
     使用 MaxVol 算法修剪训练集。
 
-    通过计算结构级别的平均描述符，使用 MaxVol 选择最有代表性的结构，
-    确保训练集大小不超过描述符维度，提高训练效率。
+    通过计算结构级别的平均描述符，使用矩形 MaxVol（rect_maxvol）选择恰好
+    max_structures 个最有代表性的结构：不超过描述符维度时取列主元 QR 的前
+    max_structures 个主元，超过时在方阵 MaxVol 基础上贪心追加体积增长最大的结构。
 
     参数:
         structures: 原始训练集结构列表
         nep_file: NEP 势函数文件路径
         max_structures: 最大保留结构数
         show_progress: 是否显示进度
+        n_workers: 并行计算描述符的工作进程数
+        method: 方阵 MaxVol 实现（见 MAXVOL_METHODS）
 
     返回:
-        修剪后的结构列表（数量 <= max_structures）
+        修剪后的结构列表（数量 <= max_structures，保持原始顺序）
     """
-    if NEP is None:
-        raise ImportError("请先安装 PyNEP: pip install pynep")
+    require_calculator()
 
     if len(structures) <= max_structures:
         print(f"训练集大小 ({len(structures)}) <= 上限 ({max_structures})，无需修剪")
@@ -852,48 +2501,22 @@ def prune_training_set_maxvol(
     print(f"\n执行训练集修剪 (MaxVol): {len(structures)} → {max_structures}")
 
     # 计算结构级别的平均描述符
-    calc = NEP(str(nep_file))
-    descriptors = []
-
-    iterator = tqdm(structures, desc="计算描述符") if show_progress else structures
-
-    for structure in iterator:
-        desc = calc.get_property("descriptor", structure)
-        # 对每个结构求平均描述符
-        descriptors.append(np.mean(desc, axis=0))
-
-    descriptors_array = np.array(descriptors)  # shape: (n_structures, descriptor_dim)
+    descriptors_array = mean_descriptors(
+        structures, nep_file, n_workers=n_workers, show_progress=show_progress
+    )  # shape: (n_structures, descriptor_dim)
     n, d = descriptors_array.shape
 
     print(f"描述符矩阵形状: {descriptors_array.shape}")
     print(f"  结构数: {n}")
     print(f"  描述符维度: {d}")
 
-    # 检查是否满足 MaxVol 要求
-    if n <= d:
-        print(f"警告: 结构数 ({n}) <= 描述符维度 ({d})，无法使用 MaxVol")
-        print("      返回所有结构")
-        return structures
-
-    # 使用 MaxVol 算法选择最有代表性的结构
-    # 需要选择 max_structures 个结构
-    target_count = min(max_structures, d)  # 不能超过描述符维度
-
-    print(f"\n使用 MaxVol 选择 {target_count} 个最有代表性的结构...")
+    print(f"\n使用矩形 MaxVol 选择 {max_structures} 个最有代表性的结构...")
 
     try:
-        # 使用内部的 MaxVol 核心算法
-        selected_indices = _maxvol_core(
-            descriptors_array, gamma_tol=1.001, max_iter=1000
+        selected_indices = rect_maxvol(
+            descriptors_array, max_structures, gamma_tol=1.001, method=method
         )
-
-        # selected_indices 长度为 d，我们需要从中选择 target_count 个
-        if len(selected_indices) > target_count:
-            # 随机选择 target_count 个
-            np.random.shuffle(selected_indices)
-            selected_indices = selected_indices[:target_count]
-
-        selected_structures = [structures[i] for i in selected_indices]
+        selected_structures = [structures[i] for i in np.sort(selected_indices)]
 
         print(f"✓ 修剪完成: {len(structures)} → {len(selected_structures)} 个结构\n")
         return selected_structures
@@ -904,5 +2527,5 @@ def prune_training_set_maxvol(
         # 如果 MaxVol 失败，回退到随机采样
         indices = list(range(len(structures)))
         np.random.shuffle(indices)
-        selected_indices = indices[:target_count]
+        selected_indices = indices[:max_structures]
         return [structures[i] for i in selected_indices]
@@ -0,0 +1,584 @@
+"""
+异步编排模块
+
+基于 asyncio 的编排层，使一个进程可以同时驱动多个独立的主动学习任务
+（不同的 work_dir 或材料体系）：
+- AsyncTaskManager: 异步提交作业、异步等待作业完成，等待期间不阻塞事件循环
+- AsyncIterationManager: 各步骤的异步版本，MaxVol、描述符计算、文件读写
+  等耗时操作在线程池中执行
+- run_campaign / run_campaigns: 运行一个或多个主动学习任务
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import io
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, List, Optional, Sequence, Tuple
+
+from ase import Atoms
+
+from .config import Config, load_config
+from .initialize import initialize_workspace, setup_logger
+from .iteration import (
+    CompletionTracker,
+    ExplorationMonitor,
+    IterationManager,
+    TaskManager,
+)
+from .maxvol import write_trajectory
+
+# 当前任务的输出前缀，由 run_campaigns 为每个任务设置（asyncio.to_thread 会复制上下文）
+_campaign_prefix: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "campaign_prefix", default=None
+)
+
+
+class _CampaignOutput(io.TextIOBase):
+    """
+    按任务区分的标准输出
+
+    筛选、描述符计算等模块用 print 输出进度，多个任务并发时各行交错。
+    写入的文本按当前任务的前缀逐行加上前缀，不完整的行按任务缓存到换行为止；
+    不在任务中的输出原样写入。
+    """
+
+    def __init__(self, stream):
+        """
+        参数:
+            stream: 实际写入的输出流
+        """
+        self.stream = stream
+        self._partial: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        prefix = _campaign_prefix.get()
+        if prefix is None:
+            return self.stream.write(text)
+        with self._lock:
+            lines = (self._partial.pop(prefix, "") + text).split("\n")
+            if lines[-1]:
+                self._partial[prefix] = lines[-1]
+            for line in lines[:-1]:
+                self.stream.write(f"{prefix} {line}\n")
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def finish(self) -> None:
+        """写出各任务缓存的不完整行"""
+        with self._lock:
+            for prefix, line in self._partial.items():
+                self.stream.write(f"{prefix} {line}\n")
+            self._partial.clear()
+        self.stream.flush()
+
+
+async def _run_prefixed(prefix: str, campaign: Awaitable[bool]) -> bool:
+    """在设置了输出前缀的上下文中运行一个任务（gather 为每个任务复制上下文）"""
+    _campaign_prefix.set(prefix)
+    return await campaign
+
+
+class AsyncTaskManager(TaskManager):
+    """任务管理器的异步版本"""
+
+    async def submit_job_async(self, job_dir: Path) -> bool:
+        """
+        在指定目录异步提交作业
+
+        参数:
+            job_dir: 作业目录
+
+        返回:
+            是否提交成功
+        """
+        try:
+            proc = await asyncio.create_subprocess_shell(
+                self.submit_command,
+                cwd=job_dir,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await proc.communicate()
+        except Exception as e:
+            self.logger.error(f"  提交作业时发生异常: {e}")
+            return False
+
+        return self._handle_submit_result(
+            job_dir,
+            proc.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
+
+    async def iter_completed_async(
+        self,
+        job_dirs: List[Path],
+        timeout: Optional[int] = None,
+        monitor: Optional[ExplorationMonitor] = None,
+    ) -> AsyncIterator[Tuple[Path, bool]]:
+        """
+        iter_completed 的异步版本：按完成顺序逐个返回结束的作业
+
+        参数:
+            job_dirs: 作业目录列表
+            timeout: 超时时间（秒），None 表示无限等待
+            monitor: GPUMD 探索监控，None 表示不监控
+
+        返回:
+            (作业目录, 是否成功) 异步生成器
+
+        异常:
+            TimeoutError: 超时仍有作业未结束时抛出
+        """
+        tracker = CompletionTracker(self, job_dirs, timeout, monitor)
+        try:
+            while tracker.pending:
+                # 文件系统和调度系统查询可能较慢，放到线程中执行
+                for item in await asyncio.to_thread(tracker.poll):
+                    yield item
+                if tracker.pending:
+                    await tracker.watcher.wait_async(
+                        tracker.pending, tracker.next_sleep()
+                    )
+        finally:
+            tracker.close()
+
+    async def wait_for_completion_async(
+        self,
+        job_dirs: List[Path],
+        timeout: Optional[int] = None,
+        allow_failures: bool = False,
+        monitor: Optional[ExplorationMonitor] = None,
+    ) -> bool:
+        """
+        wait_for_completion 的异步版本
+
+        参数:
+            job_dirs: 作业目录列表
+            timeout: 超时时间（秒），None 表示无限等待
+            allow_failures: 为 True 时失败的作业不中断等待
+            monitor: GPUMD 探索监控，None 表示不监控
+
+        返回:
+            是否所有作业都成功完成（allow_failures 为 True 时只要没有超时即返回 True）
+        """
+        self.logger.info(f"等待 {len(job_dirs)} 个作业完成...")
+
+        n_failed = 0
+        try:
+            async for job_dir, success in self.iter_completed_async(
+                job_dirs, timeout=timeout, monitor=monitor
+            ):
+                self._log_finished(job_dir, success)
+                if not success:
+                    n_failed += 1
+                    if not allow_failures:
+                        return False
+        except TimeoutError as e:
+            self.logger.warning(str(e))
+            return False
+
+        self._log_all_finished(n_failed)
+        return True
+
+
+class AsyncIterationManager(IterationManager):
+    """迭代管理器的异步版本"""
+
+    def __init__(self, config: Config, logger: logging.Logger):
+        """
+        初始化异步迭代管理器
+
+        参数:
+            config: 配置对象
+            logger: 日志记录器
+        """
+        super().__init__(config, logger)
+        self.task_manager = AsyncTaskManager(config, logger)
+
+    async def _submit_all(self, job_dirs: List[Path]) -> bool:
+        """逐个异步提交作业"""
+        for job_dir in job_dirs:
+            if not await self.task_manager.submit_job_async(job_dir):
+                return False
+        return True
+
+    async def run_gpumd_async(self, iter_num: int) -> bool:
+        """
+        运行 GPUMD 探索（异步）
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            是否成功
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(f"步骤 1: GPUMD 探索（迭代 {iter_num}）")
+        self.logger.info("=" * 80)
+
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+
+        # 检查是否已经运行过
+        if (iter_dir / "large_gamma.xyz").exists():
+            self.logger.info("GPUMD 探索已完成，跳过此步骤")
+            return True
+
+        # iter_1 准备时会生成活跃集，放到线程中执行
+        job_dirs = await asyncio.to_thread(self._prepare_gpumd, iter_num)
+        if job_dirs is None:
+            return False
+
+        self.logger.info(f"提交 {len(job_dirs)} 个 GPUMD 作业...")
+        if not await self._submit_all(job_dirs):
+            return False
+
+        monitor = self._create_monitor()
+        if not await self.task_manager.wait_for_completion_async(
+            job_dirs, timeout=self.config.gpumd.timeout, monitor=monitor
+        ):
+            return False
+        if monitor is not None:
+            monitor.log_summary()
+
+        await asyncio.to_thread(self._merge_large_gamma, iter_dir, job_dirs)
+        return True
+
+    async def run_vasp_async(self, iter_num: int, structures: List[Atoms]) -> bool:
+        """
+        运行 VASP DFT 计算（异步）
+
+        参数:
+            iter_num: 当前迭代编号
+            structures: 待计算的结构列表
+
+        返回:
+            是否成功
+        """
+        if not structures:
+            self.logger.info("没有需要 DFT 标注的结构，跳过 VASP 步骤")
+            return True
+
+        self.logger.info("=" * 80)
+        self.logger.info(f"步骤 3: VASP DFT 标注（迭代 {iter_num}）")
+        self.logger.info("=" * 80)
+
+        iter_dir = self.work_dir / f"iter_{iter_num}"
+        vasp_dir = iter_dir / "vasp"
+        vasp_dir.mkdir(parents=True, exist_ok=True)
+
+        job_dirs = await asyncio.to_thread(
+            self._create_vasp_tasks, vasp_dir, structures
+        )
+        self.logger.info(f"创建了 {len(job_dirs)} 个 VASP 计算任务")
+
+        self.logger.info("\n提交 VASP 作业...")
+        if self.config.vasp.array_submit_command and len(job_dirs) > 1:
+            submitted = await asyncio.to_thread(
+                self._submit_vasp_tasks, job_dirs, vasp_dir
+            )
+        else:
+            submitted = await self._submit_all(job_dirs)
+        if not submitted:
+            return False
+
+        if not await self.task_manager.wait_for_completion_async(
+            job_dirs, timeout=self.config.vasp.timeout, allow_failures=True
+        ):
+            return False
+
+        return await asyncio.to_thread(self._collect_vasp_results, iter_num, job_dirs)
+
+    async def run_nep_async(self, iter_num: int) -> bool:
+        """
+        运行 NEP 训练（异步）
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            是否成功
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(f"步骤 4: NEP 训练（迭代 {iter_num}）")
+        self.logger.info("=" * 80)
+
+        # 训练集修剪涉及描述符计算，放到线程中执行
+        nep_dir = await asyncio.to_thread(self._prepare_nep, iter_num)
+        if nep_dir is None:
+            return False
+
+        if not await self.task_manager.submit_job_async(nep_dir):
+            return False
+
+        if not await self.task_manager.wait_for_completion_async(
+            [nep_dir], timeout=self.config.nep.timeout
+        ):
+            return False
+
+        return await asyncio.to_thread(self._finish_nep, iter_num, nep_dir)
+
+    async def run_pipelined_async(self, iter_num: int) -> Optional[List[Atoms]]:
+        """
+        run_pipelined 的异步版本：等待作业时不占用线程，
+        每个条件的筛选和 VASP 任务提交在线程中执行
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            选中并已完成标注的结构列表（空列表表示收敛），失败时返回 None
+        """
+        self.logger.info("=" * 80)
+        self.logger.info(
+            f"步骤 1-3: GPUMD 探索 / 结构筛选 / VASP 标注（流水线，迭代 {iter_num}）"
+        )
+        self.logger.info("=" * 80)
+
+        result = await asyncio.to_thread(self._resume_pipelined, iter_num)
+        if result is None:
+            result = await self._explore_and_submit_async(iter_num)
+        if result is None:
+            return None
+        selected_all, vasp_jobs = result
+        if not selected_all:
+            return []
+
+        if not await self.task_manager.wait_for_completion_async(
+            vasp_jobs, timeout=self.config.vasp.timeout, allow_failures=True
+        ):
+            return None
+        if not await asyncio.to_thread(self._collect_vasp_results, iter_num, vasp_jobs):
+            return None
+        return selected_all
+
+    async def _explore_and_submit_async(
+        self, iter_num: int
+    ) -> Optional[Tuple[List[Atoms], List[Path]]]:
+        """
+        _explore_and_submit 的异步版本
+
+        参数:
+            iter_num: 当前迭代编号
+
+        返回:
+            (所有选中的结构, 所有 VASP 任务目录)，失败时返回 None
+        """
+        job_dirs = await asyncio.to_thread(self._prepare_gpumd, iter_num)
+        if job_dirs is None:
+            return None
+
+        self.logger.info(f"提交 {len(job_dirs)} 个 GPUMD 作业...")
+        if not await self._submit_all(job_dirs):
+            return None
+
+        train_structures = await asyncio.to_thread(self._read_train_set, iter_num)
+        self.logger.info(f"训练集结构数: {len(train_structures)}")
+
+        selected_all: List[Atoms] = []
+        vasp_jobs: List[Path] = []
+        n_waiting = len(job_dirs)
+
+        self.logger.info(f"等待 {len(job_dirs)} 个 GPUMD 作业，逐个处理完成的条件...")
+        monitor = self._create_monitor()
+        try:
+            async for cond_dir, success in self.task_manager.iter_completed_async(
+                job_dirs, timeout=self.config.gpumd.timeout, monitor=monitor
+            ):
+                n_waiting -= 1
+                # MaxVol 筛选和任务提交在线程中执行，不阻塞其他任务
+                if not await asyncio.to_thread(
+                    self._process_condition,
+                    iter_num,
+                    cond_dir,
+                    success,
+                    n_waiting,
+                    train_structures,
+                    selected_all,
+                    vasp_jobs,
+                ):
+                    return None
+        except TimeoutError as e:
+            self.logger.warning(str(e))
+            return None
+
+        await asyncio.to_thread(
+            self._finish_exploration, iter_num, job_dirs, selected_all
+        )
+        return selected_all, vasp_jobs
+
+    async def run_iteration_async(self, iter_num: int) -> bool:
+        """
+        运行一次完整迭代（异步）
+
+        参数:
+            iter_num: 迭代编号
+
+        返回:
+            是否继续（True=继续，False=收敛或失败）
+        """
+        self.logger.info("\n" + "=" * 80)
+        self.logger.info(f"开始迭代 {iter_num}")
+        self.logger.info("=" * 80)
+
+        pipelined = self.config.global_config.pipelined
+        if pipelined:
+            # 流水线模式：按条件交替等待和筛选
+            selected = await self.run_pipelined_async(iter_num)
+            if selected is None:
+                self.logger.error("GPUMD 探索 / VASP 标注失败")
+                return False
+        else:
+            # 步骤 1: GPUMD 探索
+            if not await self.run_gpumd_async(iter_num):
+                self.logger.error("GPUMD 探索失败")
+                return False
+
+            # 步骤 2: 结构筛选（MaxVol / FPS 在线程中执行）
+            selected = await asyncio.to_thread(self.select_structures, iter_num)
+
+        # 检查是否收敛
+        if len(selected) == 0:
+            self.logger.info("\n" + "=" * 80)
+            self.logger.info("未选中新结构 - 训练已收敛！")
+            self.logger.info("=" * 80)
+            return False
+
+        if not pipelined:
+            # 保存待标注结构
+            to_add_file = self.work_dir / f"iter_{iter_num}" / "to_add.xyz"
+            await asyncio.to_thread(write_trajectory, selected, str(to_add_file))
+            self.logger.info(f"保存待标注结构: {to_add_file}")
+
+            # 步骤 3: VASP DFT 标注
+            if not await self.run_vasp_async(iter_num, selected):
+                self.logger.error("VASP 标注失败")
+                return False
+
+        # 步骤 4: NEP 训练
+        if not await self.run_nep_async(iter_num):
+            self.logger.error("NEP 训练失败")
+            return False
+
+        # 步骤 5: 更新活跃集
+        if not await asyncio.to_thread(self.update_active_set, iter_num):
+            self.logger.error("活跃集更新失败")
+            return False
+
+        # 步骤 6: 准备下一轮
+        if not await asyncio.to_thread(self.prepare_next_gpumd, iter_num):
+            self.logger.error("准备下一轮失败")
+            return False
+
+        self.logger.info("\n" + "=" * 80)
+        self.logger.info(f"迭代 {iter_num} 完成")
+        self.logger.info("=" * 80)
+
+        return True
+
+
+async def run_campaign(
+    config: Config, logger: logging.Logger, start_iter: int = 1
+) -> bool:
+    """
+    异步运行一个完整的主动学习任务
+
+    参数:
+        config: 配置对象
+        logger: 该任务的日志记录器
+        start_iter: 起始迭代编号
+
+    返回:
+        是否正常结束（收敛或达到最大迭代次数）
+    """
+    from .main import log_convergence_status
+
+    work_dir = Path(config.global_config.work_dir)
+    if start_iter == 1 and not (work_dir / "iter_1").exists():
+        logger.info("=" * 80)
+        logger.info("检测到 iter_1 不存在，开始初始化工作空间")
+        logger.info("=" * 80)
+        try:
+            await asyncio.to_thread(initialize_workspace, config, logger)
+        except Exception as e:
+            logger.error(f"初始化失败: {e}")
+            return False
+
+    manager = AsyncIterationManager(config, logger)
+    max_iterations = config.global_config.max_iterations
+
+    for current_iter in range(start_iter, max_iterations + 1):
+        try:
+            should_continue = await manager.run_iteration_async(current_iter)
+        except Exception as e:
+            logger.error(f"迭代 {current_iter} 发生异常: {e}")
+            logger.exception("详细错误信息:")
+            return False
+
+        if not should_continue:
+            logger.info("\n" + "=" * 80)
+            logger.info(f"主动学习在迭代 {current_iter} 结束")
+            logger.info("=" * 80)
+            break
+    else:
+        log_convergence_status(config, logger)
+
+    logger.info("\n主动学习流程完成！")
+    return True
+
+
+async def run_campaigns(
+    config_files: Sequence[str | Path], start_iter: int = 1
+) -> List[bool]:
+    """
+    在一个进程中并发运行多个主动学习任务
+
+    每个任务使用独立的配置文件、工作目录和日志记录器；
+    运行期间的标准输出按行加上任务的日志记录器名称作为前缀。
+    某个任务抛出的异常不会中断其他任务，所有任务结束后通过该任务的日志记录器
+    记录异常和调用栈，并计为未正常结束。
+
+    参数:
+        config_files: 配置文件路径列表
+        start_iter: 起始迭代编号（对所有任务生效）
+
+    返回:
+        每个任务是否正常结束
+    """
+    campaigns = []
+    loggers = []
+    logger_names = set()
+    for i, config_file in enumerate(config_files):
+        config = load_config(config_file)
+        # 日志记录器按工作目录名区分，重名时附加序号
+        name = f"nep_auto[{Path(config.global_config.work_dir).name}]"
+        if name in logger_names:
+            name = f"nep_auto[{Path(config.global_config.work_dir).name}#{i}]"
+        logger_names.add(name)
+        logger = setup_logger(config.global_config.log_file, name=name)
+        loggers.append(logger)
+        campaigns.append(_run_prefixed(name, run_campaign(config, logger, start_iter)))
+
+    output = _CampaignOutput(sys.stdout)
+    try:
+        with contextlib.redirect_stdout(output):
+            results = await asyncio.gather(*campaigns, return_exceptions=True)
+    finally:
+        output.finish()
+
+    for logger, result in zip(loggers, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                f"任务异常结束: {type(result).__name__}: {result}", exc_info=result
+            )
+    return [result is True for result in results]
@@ -0,0 +1,261 @@
+"""
+并行计算模块
+
+使用进程池并行计算逐原子 NEP 属性（B_projection、descriptor 等）：
+- 每个工作进程在初始化时创建自己的 NEP 计算器
+- 结构按块分发给工作进程
+- 结果按原始结构顺序返回，保证输出确定性
+
+run_in_processes 用于其他相互独立的数值任务（如按元素并行的 MaxVol），
+每个工作进程的 BLAS 线程数受限，避免线程超额订阅。
+
+进程池使用 forkserver（不可用时 spawn）启动工作进程：orchestrator 在线程中
+执行筛选，从多线程进程 fork 可能继承被其他线程持有的锁而死锁。任务函数、
+初始化函数和计算器工厂因此都需可被 pickle，入口脚本需有 __main__ 保护。
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+from threadpoolctl import threadpool_limits
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+_BLAS_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+)
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """进程池的启动方式：forkserver，不可用时（如 Windows）使用 spawn"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+# 工作进程内的 NEP 计算器（由 _init_worker 创建）
+_worker_calc: Any = None
+
+# 代替 PyNEP 的计算器工厂（如基准测试用的模拟计算器），None 表示使用 PyNEP
+_calculator_factory: Callable[[str], Any] | None = None
+
+
+def set_calculator_factory(
+    factory: Callable[[str], Any] | None,
+) -> Callable[[str], Any] | None:
+    """
+    设置创建 NEP 计算器的工厂函数。
+
+    工厂以 nep.txt 路径为参数，返回具有 calculate(atoms, properties) 和 results
+    的计算器（与 pynep.calculate.NEP 接口相同）。进程池的工作进程通过
+    初始化参数获得工厂，因此工厂需可被 pickle（模块级类或函数）。
+
+    参数:
+        factory: 计算器工厂，None 表示恢复使用 PyNEP
+
+    返回:
+        之前设置的工厂
+    """
+    global _calculator_factory
+    previous = _calculator_factory
+    _calculator_factory = factory
+    return previous
+
+
+def require_calculator() -> None:
+    """
+    确认可以创建 NEP 计算器。
+
+    异常:
+        ImportError: 未设置计算器工厂且 PyNEP 未安装时抛出
+    """
+    if _calculator_factory is not None:
+        return
+    # Only locate the package; PyNEP is imported when a calculator is created
+    if importlib.util.find_spec("pynep") is None:
+        raise ImportError("请先安装 PyNEP: pip install pynep")
+
+
+def _make_calculator(nep_file: str | Path) -> Any:
+    """创建 NEP 计算器"""
+    if _calculator_factory is not None:
+        return _calculator_factory(str(nep_file))
+    require_calculator()
+    from pynep.calculate import NEP
+
+    return NEP(str(nep_file))
+
+
+def _init_worker(nep_file: str, factory: Callable[[str], Any] | None = None) -> None:
+    """进程池初始化函数：每个工作进程持有一个 NEP 计算器"""
+    global _worker_calc
+    set_calculator_factory(factory)
+    _worker_calc = _make_calculator(nep_file)
+
+
+def _calculate(
+    calc: Any, atoms: Atoms, properties: Sequence[str]
+) -> dict[str, NDArray[np.float64]]:
+    """用给定计算器计算单个结构的逐原子属性"""
+    calc.calculate(atoms, list(properties))
+    return {prop: np.asarray(calc.results[prop]) for prop in properties}
+
+
+def _compute_chunk(
+    args: tuple[list[Atoms], tuple[str, ...]],
+) -> list[dict[str, NDArray[np.float64]]]:
+    """工作进程任务：计算一块结构的逐原子属性"""
+    chunk, properties = args
+    return [_calculate(_worker_calc, atoms, properties) for atoms in chunk]
+
+
+def compute_per_atom_properties(
+    trajectory: Sequence[Atoms],
+    nep_file: str | Path,
+    properties: Sequence[str] = ("B_projection",),
+    n_workers: int = 1,
+    chunk_size: int | None = None,
+    show_progress: bool = True,
+    desc: str = "Computing descriptors",
+) -> dict[str, list[NDArray[np.float64]]]:
+    """
+    计算轨迹中每个结构的逐原子 NEP 属性。
+
+    n_workers > 1 时使用进程池，每个工作进程持有独立的 NEP 计算器；
+    结构按块分发，结果按原始顺序合并。
+
+    参数:
+        trajectory: ASE Atoms 对象列表
+        nep_file: NEP 势函数文件路径
+        properties: 需要计算的属性名（一次计算器调用同时得到所有属性）
+        n_workers: 工作进程数，<= 1 表示在当前进程中串行计算
+        chunk_size: 每次分发的结构数，None 表示自动选择
+        show_progress: 是否显示进度条
+        desc: 进度条描述
+
+    返回:
+        {属性名: 与 trajectory 等长的逐原子数组列表}
+    """
+    from tqdm import tqdm
+
+    properties = tuple(properties)
+    n = len(trajectory)
+    per_structure: list[dict[str, NDArray]] = []
+
+    if n_workers <= 1 or n <= 1:
+        calc = _make_calculator(nep_file)
+        iterator = tqdm(trajectory, desc=desc) if show_progress else trajectory
+        per_structure = [_calculate(calc, atoms, properties) for atoms in iterator]
+    else:
+        if chunk_size is None:
+            # About 4 chunks per worker balances load without excessive pickling
+            chunk_size = max(1, int(np.ceil(n / (n_workers * 4))))
+        chunks = [
+            (list(trajectory[i : i + chunk_size]), properties)
+            for i in range(0, n, chunk_size)
+        ]
+
+        progress = tqdm(total=n, desc=desc) if show_progress else None
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+            initargs=(str(nep_file), _calculator_factory),
+        ) as executor:
+            # executor.map preserves submission order
+            for results in executor.map(_compute_chunk, chunks):
+                per_structure.extend(results)
+                if progress is not None:
+                    progress.update(len(results))
+        if progress is not None:
+            progress.close()
+
+    return {prop: [res[prop] for res in per_structure] for prop in properties}
+
+
+def mean_descriptors(
+    trajectory: Sequence[Atoms],
+    nep_file: str | Path,
+    n_workers: int = 1,
+    show_progress: bool = True,
+    desc: str = "计算描述符",
+) -> NDArray[np.float64]:
+    """
+    计算每个结构的平均描述符（结构级别）。
+
+    参数:
+        trajectory: ASE Atoms 对象列表
+        nep_file: NEP 势函数文件路径
+        n_workers: 工作进程数
+        show_progress: 是否显示进度条
+        desc: 进度条描述
+
+    返回:
+        形状为 (n_structures, descriptor_dim) 的矩阵
+    """
+    descriptors = compute_per_atom_properties(
+        trajectory,
+        nep_file,
+        properties=("descriptor",),
+        n_workers=n_workers,
+        show_progress=show_progress,
+        desc=desc,
+    )["descriptor"]
+    return np.array([np.mean(d, axis=0) for d in descriptors])
+
+
+def _init_blas_worker(blas_threads: int) -> None:
+    """进程池初始化函数：限制工作进程的 BLAS 线程数"""
+    # Covers BLAS libraries first loaded in the worker
+    for var in _BLAS_THREAD_VARS:
+        os.environ[var] = str(blas_threads)
+    # BLAS loaded while importing this module (numpy) ignores the variables
+    threadpool_limits(limits=blas_threads)
+
+
+def run_in_processes(
+    func: Callable[[Any], Any],
+    tasks: Sequence[Any],
+    n_workers: int,
+    blas_threads: int | None = None,
+) -> list[Any]:
+    """
+    在进程池中执行相互独立的任务，结果按任务顺序返回。
+
+    参数:
+        func: 任务函数（需可被 pickle，即模块级函数）
+        tasks: 任务参数列表，每个元素作为 func 的唯一参数
+        n_workers: 工作进程数，<= 1 表示在当前进程中串行执行
+        blas_threads: 每个工作进程的 BLAS 线程数，None 表示 CPU 核数 / n_workers。
+            通过 threadpoolctl 在运行时限制
+
+    返回:
+        与 tasks 等长的结果列表
+    """
+    n_workers = min(n_workers, len(tasks))
+    if n_workers <= 1:
+        return [func(task) for task in tasks]
+
+    if blas_threads is None:
+        blas_threads = max(1, (os.cpu_count() or 1) // n_workers)
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=_mp_context(),
+        initializer=_init_blas_worker,
+        initargs=(blas_threads,),
+    ) as executor:
+        # executor.map preserves submission order
+        return list(executor.map(func, tasks))
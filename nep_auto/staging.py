@@ -0,0 +1,138 @@
+"""
+作业目录暂存模块
+
+准备 GPUMD 条件目录和 VASP 任务目录时，INCAR / KPOINTS / POTCAR、nep.txt、
+active_set.asi、model.xyz 等共享输入在每个目录中内容完全相同。本模块按策略
+放置这些文件，并用线程池并行写入 POSCAR 等逐任务文件：
+- copy: 复制（默认）
+- hardlink: 硬链接，不占用额外的 inode 数据块和带宽；跨文件系统或不支持时退化为复制
+- symlink: 指向源文件绝对路径的符号链接
+
+所有放置方式都先写入临时名再 os.replace 到目标位置，覆盖已有文件时替换的是
+目录项而不是原 inode，因此不会改写与之共享 inode 的其他目录中的文件。
+只应暂存作业不会原地修改的输入文件（active_set.npz、NEP 训练目录中的 nep.txt 等
+会被原地改写的文件仍需复制）。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Sequence, TypeVar
+
+from .constants import STAGE_MODES
+
+_T = TypeVar("_T")
+
+
+def stage_file(src: str | Path, dst: str | Path, mode: str = "copy") -> str:
+    """
+    按指定方式将 src 放置到 dst，已存在的 dst 被原子替换。
+
+    参数:
+        src: 源文件路径
+        dst: 目标文件路径
+        mode: 放置方式（见 STAGE_MODES）
+
+    返回:
+        实际使用的放置方式（硬链接失败退化为复制时返回 "copy"）
+
+    异常:
+        ValueError: mode 不在 STAGE_MODES 中时抛出
+    """
+    if mode not in STAGE_MODES:
+        raise ValueError(f"未知的暂存方式: {mode}（可选: {', '.join(STAGE_MODES)}）")
+
+    src, dst = Path(src), Path(dst)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if mode == "hardlink":
+            try:
+                os.link(src, tmp)
+            except OSError:
+                # Cross-device link or a filesystem without hard links
+                mode = "copy"
+        elif mode == "symlink":
+            os.symlink(src.resolve(), tmp)
+        if mode == "copy":
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return mode
+
+
+class Stager:
+    """
+    按配置的策略暂存作业输入，并统计最近一次 run 的文件数和耗时。
+
+    stage / run 可以在多个线程中同时调用。
+    """
+
+    def __init__(self, mode: str = "copy", n_workers: int = 1):
+        """
+        参数:
+            mode: 共享输入文件的放置方式（见 STAGE_MODES）
+            n_workers: run 使用的线程数
+
+        异常:
+            ValueError: mode 不在 STAGE_MODES 中时抛出
+        """
+        if mode not in STAGE_MODES:
+            raise ValueError(
+                f"未知的暂存方式: {mode}（可选: {', '.join(STAGE_MODES)}）"
+            )
+        self.mode = mode
+        self.n_workers = max(1, n_workers)
+        self.counts = {m: 0 for m in STAGE_MODES}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def stage(self, src: str | Path, dst: str | Path, mode: str | None = None) -> None:
+        """
+        暂存一个共享输入文件。
+
+        参数:
+            src: 源文件路径
+            dst: 目标文件路径
+            mode: 覆盖本次使用的放置方式，None 表示使用 self.mode
+        """
+        used = stage_file(src, dst, mode or self.mode)
+        with self._lock:
+            self.counts[used] += 1
+
+    def run(self, func: Callable[[_T], None], tasks: Sequence[_T]) -> None:
+        """
+        在线程池中对每个任务调用 func（如创建目录、写入 POSCAR、暂存输入），
+        统计从零开始重新计数。任一任务抛出的异常在所有任务结束后重新抛出。
+
+        参数:
+            func: 单个任务的处理函数
+            tasks: 任务列表
+        """
+        with self._lock:
+            self.counts = {m: 0 for m in STAGE_MODES}
+        start = time.perf_counter()
+        try:
+            if self.n_workers == 1 or len(tasks) <= 1:
+                for task in tasks:
+                    func(task)
+            else:
+                with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+                    # list() propagates the first worker exception
+                    list(pool.map(func, tasks))
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def summary(self) -> str:
+        """返回最近一次 run 的暂存统计"""
+        parts = [f"{m} {n}" for m, n in self.counts.items() if n]
+        return (
+            f"暂存 {sum(self.counts.values())} 个共享文件"
+            f"（{', '.join(parts) or '无'}），耗时 {self.elapsed:.2f} 秒"
+        )
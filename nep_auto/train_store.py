@@ -0,0 +1,197 @@
+"""
+追加式训练集存储模块
+
+训练集按迭代分片保存在 <work_dir>/train_store/ 中，代替每轮读取整个 train.xyz、
+拼接后整体重写，再复制到下一轮目录的做法：
+- iter_<N>.xyz: 第 N 轮 DFT 标注新增的结构（iter_0.xyz 为初始训练集）
+- manifest.json: 分片列表（迭代编号、文件名、结构数），以替换方式原子更新
+
+第 N 轮开始时的训练集是迭代编号 < N 的所有分片，标注完成后是 ≤ N 的所有分片。
+只有 NEP 训练需要单个 train.xyz 时才按字节拼接分片生成（materialize），
+不解析结构。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from .maxvol import iter_trajectory, read_trajectory, write_trajectory
+
+if TYPE_CHECKING:
+    from ase import Atoms
+
+MANIFEST_NAME = "manifest.json"
+"""分片清单文件名"""
+
+
+class TrainStore:
+    """按迭代分片的追加式训练集"""
+
+    def __init__(self, root: str | Path):
+        """
+        参数:
+            root: 存储目录（不存在时在第一次写入时创建）
+        """
+        self.root = Path(root)
+        self.manifest_file = self.root / MANIFEST_NAME
+
+    def _load(self) -> list[dict]:
+        """读取分片列表（按迭代编号排序）"""
+        if not self.manifest_file.exists():
+            return []
+        with open(self.manifest_file) as f:
+            return json.load(f)["shards"]
+
+    def _save(self, shards: list[dict]) -> None:
+        """原子写入分片列表"""
+        shards = sorted(shards, key=lambda s: s["iteration"])
+        tmp = self.manifest_file.with_name(f".{MANIFEST_NAME}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"shards": shards}, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+    def _shards(self, upto: int | None) -> list[dict]:
+        return [s for s in self._load() if upto is None or s["iteration"] <= upto]
+
+    def is_empty(self) -> bool:
+        """是否还没有任何分片"""
+        return not self._load()
+
+    def shard_files(self, upto: int | None = None) -> list[Path]:
+        """
+        返回迭代编号不超过 upto 的分片文件（按迭代顺序）。
+
+        参数:
+            upto: 最大迭代编号，None 表示全部
+        """
+        return [self.root / s["file"] for s in self._shards(upto)]
+
+    def count(self, upto: int | None = None) -> int:
+        """返回迭代编号不超过 upto 的结构总数（只读 manifest）"""
+        return sum(s["n_structures"] for s in self._shards(upto))
+
+    def read(self, upto: int | None = None) -> list[Atoms]:
+        """
+        读取迭代编号不超过 upto 的所有结构。
+
+        参数:
+            upto: 最大迭代编号，None 表示全部
+
+        返回:
+            Atoms 对象列表（按分片顺序）
+        """
+        structures: list[Atoms] = []
+        for path in self.shard_files(upto):
+            structures.extend(read_trajectory(str(path)))
+        return structures
+
+    def iter_structures(self, upto: int | None = None) -> Iterator[Atoms]:
+        """逐帧读取迭代编号不超过 upto 的所有结构，不整体载入内存"""
+        for path in self.shard_files(upto):
+            yield from iter_trajectory(path)
+
+    def write_shard(self, iteration: int, structures: list[Atoms]) -> None:
+        """
+        写入第 iteration 轮的分片（已存在时替换）。
+
+        编号更大的分片来自中断后重新运行之前的旧结果，一并删除。
+
+        参数:
+            iteration: 迭代编号
+            structures: 本轮新增的结构
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = f"iter_{iteration}.xyz"
+        # The suffix stays .xyz so the ASE fallback writer detects the format
+        tmp = self.root / f".iter_{iteration}.tmp.xyz"
+        write_trajectory(structures, str(tmp))
+        os.replace(tmp, self.root / name)
+        self._replace_shard(iteration, name, len(structures))
+
+    def import_file(self, iteration: int, source: str | Path) -> int:
+        """
+        将已有的训练集文件复制为第 iteration 轮的分片（不解析结构）。
+
+        只能导入到空的存储中：重新导入初始训练集不应替换或删除之后标注的分片。
+
+        参数:
+            iteration: 迭代编号
+            source: xyz 训练集文件（如初始训练集或旧版的 iter_N/train.xyz）
+
+        返回:
+            导入的结构数
+
+        异常:
+            ValueError: 存储中已有分片时抛出
+        """
+        if not self.is_empty():
+            raise ValueError(f"train_store 中已有分片，不能导入 {source}: {self.root}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = f"iter_{iteration}.xyz"
+        tmp = self.root / f".{name}.tmp"
+        shutil.copy2(source, tmp)
+        os.replace(tmp, self.root / name)
+        n_structures = _count_frames(self.root / name)
+        self._save(
+            [{"iteration": iteration, "file": name, "n_structures": n_structures}]
+        )
+        return n_structures
+
+    def _replace_shard(self, iteration: int, name: str, n_structures: int) -> None:
+        """更新 manifest 中第 iteration 轮的分片，并删除之后的旧分片"""
+        shards = []
+        for shard in self._load():
+            if shard["iteration"] > iteration:
+                (self.root / shard["file"]).unlink(missing_ok=True)
+            elif shard["iteration"] < iteration:
+                shards.append(shard)
+        shards.append(
+            {"iteration": iteration, "file": name, "n_structures": n_structures}
+        )
+        self._save(shards)
+
+    def materialize(self, output_file: str | Path, upto: int | None = None) -> int:
+        """
+        按字节拼接分片，生成单个训练集文件（供 NEP 训练使用）。
+
+        参数:
+            output_file: 输出文件路径（已存在时替换）
+            upto: 最大迭代编号，None 表示全部
+
+        返回:
+            输出文件中的结构数
+        """
+        output_file = Path(output_file)
+        tmp = output_file.with_name(f".{output_file.name}.tmp")
+        with open(tmp, "wb") as out:
+            for path in self.shard_files(upto):
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, 1 << 20)
+                    # Keep frames of the next shard on their own line
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            out.write(b"\n")
+        os.replace(tmp, output_file)
+        return self.count(upto)
+
+
+def _count_frames(path: Path) -> int:
+    """统计 xyz 文件的帧数：读取每帧首行的原子数并跳过该帧"""
+    n_frames = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.readline()
+            if not header:
+                return n_frames
+            if not header.strip():
+                continue
+            n_atoms = int(header)
+            # Comment line plus one line per atom
+            for _ in range(n_atoms + 1):
+                f.readline()
+            n_frames += 1
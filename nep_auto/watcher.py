@@ -0,0 +1,318 @@
+"""
+作业完成检测模块
+
+提供可插拔的作业完成检测后端，替代逐个 stat DONE 文件的固定间隔轮询：
+- stat: 每次轮询逐个检查 <job_dir>/DONE（原有行为）
+- scandir: 作业结束时在父目录写入哨兵文件 .<job_name>.DONE，
+  每次轮询只对每个父目录执行一次 os.scandir
+- inotify: 在 scandir 基础上使用 Linux inotify 事件唤醒，
+  哨兵文件出现后立即返回（网络文件系统上其他节点的写入不会产生事件，
+  此时退化为按间隔扫描）
+- scheduler: 每次轮询只执行一次调度系统查询（qstat / squeue），
+  只对已离开队列的作业检查 DONE 文件
+
+轮询间隔从 check_interval 开始按 check_backoff 倍数增长，最大 check_interval_max；
+有作业完成时间隔重置。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import subprocess
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from .constants import COMPLETION_BACKENDS
+
+JOB_ID_FILE = "JOB_ID"
+"""作业目录中保存调度系统作业 ID 的文件名"""
+
+# scandir / inotify 后端每隔若干次轮询逐个 stat 一次，兜底未写入哨兵文件的作业
+_STAT_FALLBACK_EVERY = 10
+
+
+def done_sentinel_name(job_dir: Path) -> str:
+    """
+    作业在父目录中的哨兵文件名。
+
+    参数:
+        job_dir: 作业目录
+
+    返回:
+        哨兵文件名（.<作业目录名>.DONE）
+    """
+    return f".{job_dir.name}.DONE"
+
+
+def parse_job_id(output: str, pattern: str = r"(\d+)") -> str | None:
+    """
+    从提交命令输出中解析作业 ID。
+
+    参数:
+        output: 提交命令的标准输出（如 "Submitted batch job 12345"、"12345.server"）
+        pattern: 正则表达式，有捕获组时取第一个捕获组，否则取整个匹配
+
+    返回:
+        作业 ID，未匹配时返回 None
+    """
+    match = re.search(pattern, output)
+    if match is None:
+        return None
+    return match.group(1) if match.groups() else match.group()
+
+
+def query_active_job_ids(query_command: str) -> set[str] | None:
+    """
+    执行一次调度系统查询，返回仍在排队或运行中的作业 ID。
+
+    参数:
+        query_command: 列出作业的命令（如 "qstat"、"squeue -h -o %i"）
+
+    返回:
+        作业 ID 集合（每个字段开头的数字部分，兼容 PBS 的 "12345.server"、
+        "12345[].server" 和 SLURM 的 "12345_7"），查询失败返回 None
+    """
+    try:
+        result = subprocess.run(
+            query_command,
+            shell=True,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return {
+        m.group() for token in result.stdout.split() if (m := re.match(r"\d+", token))
+    }
+
+
+def _ensure_done_marker(job_script: str, sentinel: bool = False) -> str:
+    """
+    确保作业脚本末尾有 touch DONE 命令，按需添加父目录哨兵文件
+
+    参数:
+        job_script: 原始作业脚本内容
+        sentinel: 是否同时写入父目录哨兵文件（scandir / inotify 后端需要）
+
+    返回:
+        添加了 DONE 标记的脚本
+    """
+    script = job_script.rstrip()
+
+    # 检查是否已经有 touch DONE
+    if "touch DONE" not in script and "touch ./DONE" not in script:
+        script += "\n\n# 自动添加：标记任务完成\ntouch DONE\n"
+
+    # 父目录哨兵文件，供 scandir / inotify 后端一次扫描检测所有作业
+    touch_sentinel = 'touch "../.$(basename "$PWD").DONE"'
+    if sentinel and touch_sentinel not in script:
+        script = script.rstrip() + f"\n{touch_sentinel}\n"
+
+    return script
+
+
+class CompletionWatcher:
+    """作业完成检测后端基类（stat 后端：逐个检查 DONE 文件）"""
+
+    def poll(self, pending: list[Path]) -> list[Path]:
+        """
+        检查一次哪些作业已完成。
+
+        参数:
+            pending: 未完成的作业目录列表
+
+        返回:
+            本次检测到已完成的作业目录
+        """
+        return [job_dir for job_dir in pending if (job_dir / "DONE").exists()]
+
+    def wait(self, pending: list[Path], interval: float) -> None:
+        """
+        等待下一次轮询（可被事件提前唤醒）。
+
+        参数:
+            pending: 未完成的作业目录列表
+            interval: 最长等待时间（秒）
+        """
+        time.sleep(interval)
+
+    async def wait_async(self, pending: list[Path], interval: float) -> None:
+        """
+        wait() 的异步版本，等待期间不阻塞事件循环。
+
+        参数:
+            pending: 未完成的作业目录列表
+            interval: 最长等待时间（秒）
+        """
+        await asyncio.sleep(interval)
+
+    def close(self) -> None:
+        """释放后端占用的资源"""
+
+
+class ScandirWatcher(CompletionWatcher):
+    """每个父目录一次 os.scandir，检测作业写入的哨兵文件"""
+
+    def __init__(self) -> None:
+        self._n_polls = 0
+
+    def poll(self, pending: list[Path]) -> list[Path]:
+        self._n_polls += 1
+        if self._n_polls % _STAT_FALLBACK_EVERY == 0:
+            return super().poll(pending)
+
+        by_parent: dict[Path, list[Path]] = defaultdict(list)
+        for job_dir in pending:
+            by_parent[job_dir.parent].append(job_dir)
+
+        completed = []
+        for parent, job_dirs in by_parent.items():
+            try:
+                with os.scandir(parent) as it:
+                    names = {entry.name for entry in it}
+            except OSError:
+                continue
+            completed.extend(
+                job_dir for job_dir in job_dirs if done_sentinel_name(job_dir) in names
+            )
+        return completed
+
+
+# inotify 常量（见 <sys/inotify.h>）
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+
+class InotifyWatcher(ScandirWatcher):
+    """使用 inotify 事件唤醒的 scandir 后端"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 失败: {os.strerror(errno)}")
+        self._watched: set[Path] = set()
+
+    def _add_watch(self, path: Path) -> None:
+        if path in self._watched:
+            return
+        mask = _IN_CREATE | _IN_MOVED_TO | _IN_CLOSE_WRITE | _IN_ATTRIB
+        # 监视数量达到系统上限时忽略，仍有按间隔扫描兜底
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask) >= 0:
+            self._watched.add(path)
+
+    def _watch_pending(self, pending: list[Path]) -> None:
+        for parent in {job_dir.parent for job_dir in pending}:
+            self._add_watch(parent)
+        for job_dir in pending:
+            self._add_watch(job_dir)
+
+    def _drain(self) -> None:
+        # 只需要唤醒，事件内容由下一次 poll 扫描确认
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, pending: list[Path], interval: float) -> None:
+        self._watch_pending(pending)
+        readable, _, _ = select.select([self._fd], [], [], interval)
+        if readable:
+            self._drain()
+
+    async def wait_async(self, pending: list[Path], interval: float) -> None:
+        self._watch_pending(pending)
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        loop.add_reader(self._fd, event.set)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(self._fd)
+        self._drain()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class SchedulerWatcher(CompletionWatcher):
+    """每次轮询执行一次调度系统查询，只对离开队列的作业检查 DONE"""
+
+    def __init__(self, job_ids: dict[Path, str], query_command: str) -> None:
+        """
+        参数:
+            job_ids: 作业目录到调度系统作业 ID 的映射
+            query_command: 列出当前排队/运行中作业的命令（如 "qstat"、"squeue -h -o %i"）
+        """
+        self.job_ids = job_ids
+        self.query_command = query_command
+        self.active_job_ids: set[str] | None = None
+        """最近一次查询得到的队列中作业 ID（供丢失作业检测复用）"""
+
+    def poll(self, pending: list[Path]) -> list[Path]:
+        active = self.active_job_ids = query_active_job_ids(self.query_command)
+        if active is None:
+            return super().poll(pending)
+
+        to_check = [
+            job_dir
+            for job_dir in pending
+            if self.job_ids.get(job_dir) is None or self.job_ids[job_dir] not in active
+        ]
+        return super().poll(to_check)
+
+
+def create_watcher(
+    backend: str,
+    job_ids: dict[Path, str] | None = None,
+    scheduler_query_command: str = "qstat",
+) -> CompletionWatcher:
+    """
+    创建作业完成检测后端。
+
+    参数:
+        backend: 后端名称（stat / scandir / inotify / scheduler）
+        job_ids: 作业目录到作业 ID 的映射（scheduler 后端使用）
+        scheduler_query_command: 调度系统查询命令（scheduler 后端使用）
+
+    返回:
+        检测后端实例（inotify 不可用时退化为 scandir）
+
+    异常:
+        ValueError: 后端名称无效时抛出
+    """
+    if backend == "stat":
+        return CompletionWatcher()
+    if backend == "scandir":
+        return ScandirWatcher()
+    if backend == "inotify":
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            return ScandirWatcher()
+    if backend == "scheduler":
+        return SchedulerWatcher(job_ids or {}, scheduler_query_command)
+    raise ValueError(
+        f"未知的作业完成检测后端: {backend}（可选: {', '.join(COMPLETION_BACKENDS)}）"
+    )
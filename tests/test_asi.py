@@ -0,0 +1,95 @@
+"""ASI 文件读写测试（GPUMD 文本格式与二进制格式的往返一致性）"""
+
+import os
+
+import numpy as np
+import pytest
+
+from nep_auto.maxvol import (
+    asi_binary_path,
+    convert_asi_binary_to_text,
+    convert_asi_text_to_binary,
+    read_asi_binary,
+    read_asi_file,
+    write_asi_binary,
+    write_asi_file,
+)
+
+
+@pytest.fixture
+def inverse_dict():
+    """不同形状的两个元素的逆矩阵"""
+    rng = np.random.default_rng(0)
+    return {
+        "Si": rng.standard_normal((30, 30)),
+        "O": rng.standard_normal((30, 17)) * 1e-12,
+    }
+
+
+def _assert_equal(result, expected):
+    assert list(result) == list(expected)
+    for elem, matrix in expected.items():
+        np.testing.assert_array_equal(result[elem], matrix)
+
+
+def test_text_round_trip(tmp_path, inverse_dict):
+    """文本格式按 %.17g 写出，读回与原矩阵逐位相同"""
+    asi_file = tmp_path / "active_set.asi"
+    write_asi_file(inverse_dict, asi_file, binary_sidecar=False)
+
+    assert not asi_binary_path(asi_file).exists()
+    _assert_equal(read_asi_file(asi_file), inverse_dict)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_binary_round_trip(tmp_path, inverse_dict, mmap):
+    """二进制格式读回与原矩阵逐位相同，数据块按 64 字节对齐"""
+    binary_file = tmp_path / "active_set.asi.bin"
+    write_asi_binary(inverse_dict, binary_file)
+
+    result = read_asi_binary(binary_file, mmap=mmap)
+    _assert_equal(result, inverse_dict)
+    if mmap:
+        assert all(m.offset % 64 == 0 for m in result.values())
+
+
+def test_conversion_round_trip(tmp_path, inverse_dict):
+    """文本 → 二进制 → 文本 得到相同的文本文件"""
+    text_file = tmp_path / "active_set.asi"
+    write_asi_file(inverse_dict, text_file, binary_sidecar=False)
+
+    binary_file = convert_asi_text_to_binary(text_file)
+    assert binary_file == asi_binary_path(text_file)
+    _assert_equal(read_asi_binary(binary_file), inverse_dict)
+
+    text_again = convert_asi_binary_to_text(binary_file, tmp_path / "again.asi")
+    assert text_again.read_bytes() == text_file.read_bytes()
+
+
+def test_read_prefers_fresh_sidecar(tmp_path, inverse_dict):
+    """二进制副本不旧于文本文件时读取副本，否则读取文本"""
+    asi_file = tmp_path / "active_set.asi"
+    write_asi_file(inverse_dict, asi_file)
+    binary_file = asi_binary_path(asi_file)
+
+    assert isinstance(read_asi_file(asi_file)["Si"], np.memmap)
+
+    # GPUMD or a user rewrote the text file after the sidecar
+    updated = {elem: matrix * 2 for elem, matrix in inverse_dict.items()}
+    write_asi_file(updated, asi_file, binary_sidecar=False)
+    write_asi_binary(inverse_dict, binary_file)
+    stat = asi_file.stat()
+    os.utime(binary_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+    result = read_asi_file(asi_file)
+    assert not isinstance(result["Si"], np.memmap)
+    _assert_equal(result, updated)
+
+
+def test_read_binary_rejects_text(tmp_path, inverse_dict):
+    """非二进制 ASI 文件抛出 ValueError"""
+    asi_file = tmp_path / "active_set.asi"
+    write_asi_file(inverse_dict, asi_file, binary_sidecar=False)
+
+    with pytest.raises(ValueError):
+        read_asi_binary(asi_file)
@@ -0,0 +1,60 @@
+"""子结构切割测试（切割结果的元素顺序与 POSCAR 元素段）"""
+
+import numpy as np
+import pytest
+from ase.build import bulk
+from ase.io import write
+from ase.neighborlist import neighbor_list
+
+from nep_auto.cluster import _build_cut
+
+RADIUS = 4.5
+
+
+def _cut(atoms, center: int, mode: str):
+    search_radius = RADIUS * np.sqrt(3) if mode == "box" else RADIUS
+    i, j, D = neighbor_list("ijD", atoms, search_radius)
+    neighbors, vectors = j[i == center], D[i == center]
+    if mode == "box":
+        keep = np.abs(vectors).max(axis=1) < RADIUS
+        neighbors, vectors = neighbors[keep], vectors[keep]
+    return _build_cut(atoms, center, neighbors, vectors, mode, RADIUS, vacuum=6.0)
+
+
+def _poscar_species(cut, path) -> tuple[list[str], list[int]]:
+    """写出 POSCAR，返回元素行和原子数行"""
+    write(path, cut, format="vasp")
+    lines = path.read_text().splitlines()
+    return lines[5].split(), [int(n) for n in lines[6].split()]
+
+
+@pytest.mark.parametrize("mode", ["cluster", "box"])
+@pytest.mark.parametrize("center_symbol", ["Na", "Cl"])
+def test_cut_species_blocks(tmp_path, mode, center_symbol):
+    """每种元素在 POSCAR 中只占一段，顺序与源结构一致"""
+    atoms = bulk("NaCl", "rocksalt", a=5.64, cubic=True).repeat((3, 3, 3))
+    atoms.rattle(0.05, seed=1)
+    center = atoms.get_chemical_symbols().index(center_symbol)
+
+    cut = _cut(atoms, center, mode)
+    species, counts = _poscar_species(cut, tmp_path / "POSCAR")
+
+    assert species == ["Na", "Cl"]
+    assert counts == [
+        cut.get_chemical_symbols().count("Na"),
+        cut.get_chemical_symbols().count("Cl"),
+    ]
+    assert sum(counts) == len(cut)
+
+
+def test_cut_follows_source_species_order(tmp_path):
+    """源结构中先出现的元素在切割结果中也在前"""
+    atoms = bulk("NaCl", "rocksalt", a=5.64, cubic=True).repeat((3, 3, 3))
+    order = np.argsort(atoms.numbers == 11, kind="stable")
+    atoms = atoms[order]  # Cl first
+    center = atoms.get_chemical_symbols().index("Na")
+
+    cut = _cut(atoms, center, "cluster")
+    species, _ = _poscar_species(cut, tmp_path / "POSCAR")
+
+    assert species == ["Cl", "Na"]
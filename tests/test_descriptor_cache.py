@@ -0,0 +1,56 @@
+"""描述符缓存测试（读写、分片合并与旧模型缓存的清理）"""
+
+import os
+
+import numpy as np
+import pytest
+
+from nep_auto.descriptor_cache import DescriptorCache, hash_file
+
+
+def _nep_file(tmp_path, version: int):
+    path = tmp_path / f"nep_{version}.txt"
+    path.write_text(f"nep4 1 Cu\n# model {version}\n")
+    return path
+
+
+def test_round_trip_and_compaction(tmp_path):
+    """写入的数据按结构哈希读回，分片数超过上限时合并"""
+    cache = DescriptorCache(tmp_path / "cache", _nep_file(tmp_path, 0), max_shards=3)
+    rng = np.random.default_rng(0)
+    data = {f"s{i}": rng.standard_normal((i + 1, 4)) for i in range(10)}
+    for key, value in data.items():
+        cache.put([(key, value)])
+
+    assert len(list(cache.root.glob("shard_*.npy"))) <= 3
+    reopened = DescriptorCache(tmp_path / "cache", _nep_file(tmp_path, 0))
+    for key, value in zip(data, reopened.get(list(data))):
+        np.testing.assert_array_equal(value, data[key])
+    assert reopened.get(["missing"]) == [None]
+
+
+def test_prune_keeps_recent_models(tmp_path):
+    """只保留最近使用的 keep_models 个模型缓存"""
+    cache_dir = tmp_path / "cache"
+    for version in range(3):
+        cache = DescriptorCache(cache_dir, _nep_file(tmp_path, version))
+        # Distinct mtimes regardless of filesystem timestamp resolution
+        os.utime(cache.model_dir, (version, version))
+    DescriptorCache(cache_dir, _nep_file(tmp_path, 3), keep_models=2)
+
+    remaining = {p.name for p in cache_dir.iterdir()}
+    assert remaining == {hash_file(_nep_file(tmp_path, version)) for version in (2, 3)}
+
+
+@pytest.mark.parametrize("keep_models", [1, 2])
+def test_prune_ignores_unrelated_directories(tmp_path, keep_models):
+    """cache_dir 中不是模型缓存的目录（如工作目录中的 iter_N）不被删除"""
+    for name in ("iter_1", "iter_2", "important", "a" * 63):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "train.xyz").write_text("data\n")
+        os.utime(tmp_path / name, (0, 0))
+
+    DescriptorCache(tmp_path, _nep_file(tmp_path, 0), keep_models=keep_models)
+
+    for name in ("iter_1", "iter_2", "important", "a" * 63):
+        assert (tmp_path / name / "train.xyz").read_text() == "data\n"
@@ -0,0 +1,185 @@
+"""OUTCAR 快速解析器测试（与 ase.io.read(format="vasp-out") 对比）"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from ase import Atoms
+from ase.io import read
+from ase.units import GPa
+
+from nep_auto import harvest
+from nep_auto.harvest import harvest_vasp_results, read_outcar_final
+
+TRAIN_XYZ = Path(__file__).resolve().parents[1] / "test_nep_auto/input/train.xyz"
+
+# OUTCAR stress line order: XX YY ZZ XY YZ ZX
+_STRESS_ORDER = [(0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (2, 0)]
+
+
+def _ionic_step(
+    atoms: Atoms,
+    energy: float,
+    forces: np.ndarray,
+    stress: np.ndarray,
+    index: int,
+) -> list[str]:
+    """一个离子步的应力、晶胞、坐标和力、能量段"""
+    kb = -stress / (GPa / 10)
+    lines = [
+        f"{'-' * 41} Iteration {index:4d}(   1)  {'-' * 39}",
+        "  in kB  " + "".join(f"{kb[i, j]:12.5f}" for i, j in _STRESS_ORDER),
+        "      direct lattice vectors                 reciprocal lattice vectors",
+    ]
+    for vec, rec in zip(atoms.cell, atoms.cell.reciprocal()):
+        lines.append(
+            "   "
+            + "".join(f"{x:13.9f}" for x in vec)
+            + "  "
+            + "".join(f"{x:13.9f}" for x in rec)
+        )
+    lines += [
+        "",
+        " POSITION                                       TOTAL-FORCE (eV/Angst)",
+        " " + "-" * 83,
+    ]
+    for pos, force in zip(atoms.positions, forces):
+        lines.append(
+            "  "
+            + "".join(f"{x:13.5f}" for x in pos)
+            + "   "
+            + "".join(f"{x:14.6f}" for x in force)
+        )
+    lines += [
+        " " + "-" * 83,
+        "",
+        "  FREE ENERGIE OF THE ION-ELECTRON SYSTEM (eV)",
+        "  ---------------------------------------------------",
+        f"  free  energy   TOTEN  = {energy:18.8f} eV",
+        "",
+        f"  energy  without entropy= {energy:18.8f}  energy(sigma->0) = {energy:18.8f}",
+        "",
+    ]
+    return lines
+
+
+def _write_outcar(
+    atoms: Atoms, path: Path, n_steps: int = 3, truncate: bool = False
+) -> Atoms:
+    """
+    按 VASP 格式写出 OUTCAR：最后一个离子步为 atoms 的能量、力和应力，
+    之前的离子步为扰动后的结构。返回按元素排序后（与 OUTCAR 顺序一致）的结构。
+    """
+    order = np.argsort(atoms.numbers, kind="stable")
+    energy = atoms.get_potential_energy()
+    forces = atoms.get_forces()[order]
+    stress = atoms.get_stress(voigt=False)
+    atoms = atoms[order]
+
+    symbols = atoms.get_chemical_symbols()
+    species = list(dict.fromkeys(symbols))
+    lines = [" vasp.6.3.0 (build synthetic)"]
+    lines += [f" POTCAR:    PAW_PBE {s} 02Aug2007" for s in species] * 2
+    lines.append(f"   number of ions     NIONS = {len(atoms):7d}")
+    lines.append(
+        "   ions per type =   " + "".join(f"{symbols.count(s):5d}" for s in species)
+    )
+
+    rng = np.random.default_rng(0)
+    for step in range(1, n_steps):
+        moved = atoms.copy()
+        moved.positions += rng.normal(0, 0.01, atoms.positions.shape)
+        lines += _ionic_step(moved, energy + step, forces + 0.1, stress * 1.1, step)
+    lines += _ionic_step(atoms, energy, forces, stress, n_steps)
+    if truncate:
+        # A job killed while writing the next ionic step
+        partial = _ionic_step(atoms, energy - 1, forces, stress, n_steps + 1)
+        lines += partial[: len(partial) // 2]
+
+    path.write_text("\n".join(lines) + "\n")
+    atoms.calc = None
+    return atoms
+
+
+def _assert_same(result: Atoms, expected: Atoms) -> None:
+    assert result.get_chemical_symbols() == expected.get_chemical_symbols()
+    np.testing.assert_allclose(result.cell, expected.cell)
+    np.testing.assert_allclose(result.positions, expected.positions)
+    assert result.get_potential_energy() == pytest.approx(
+        expected.get_potential_energy()
+    )
+    np.testing.assert_allclose(result.get_forces(), expected.get_forces())
+    np.testing.assert_allclose(result.get_stress(), expected.get_stress())
+
+
+@pytest.fixture(params=[0, 1, 2])
+def train_atoms(request) -> Atoms:
+    """test_nep_auto 训练集中的结构（带能量、力和应力）"""
+    return read(TRAIN_XYZ, index=request.param)
+
+
+@pytest.mark.parametrize("truncate", [False, True])
+def test_read_outcar_final_matches_ase(tmp_path, train_atoms, truncate):
+    """最后一个完整离子步与 ase.io.read(index=-1) 一致，也与原结构一致"""
+    outcar = tmp_path / "OUTCAR"
+    sorted_atoms = _write_outcar(train_atoms, outcar, truncate=truncate)
+
+    result = read_outcar_final(outcar)
+    expected = read(outcar, index=-1, format="vasp-out")
+
+    _assert_same(result, expected)
+    assert result.get_potential_energy() == pytest.approx(
+        train_atoms.get_potential_energy()
+    )
+    np.testing.assert_allclose(result.positions, sorted_atoms.positions, atol=1e-5)
+    np.testing.assert_allclose(result.get_stress(), train_atoms.get_stress(), atol=1e-7)
+
+
+def test_read_outcar_final_small_window(tmp_path, train_atoms, monkeypatch):
+    """末尾窗口小于一个离子步时逐步扩大窗口，结果不变"""
+    outcar = tmp_path / "OUTCAR"
+    _write_outcar(train_atoms, outcar, n_steps=4, truncate=True)
+    expected = read(outcar, index=-1, format="vasp-out")
+
+    for block in (4096, 1024, 256):
+        monkeypatch.setattr(harvest, "_TAIL_BLOCK", block)
+        monkeypatch.setattr(harvest, "_STRESS_MARGIN", block // 2)
+        _assert_same(read_outcar_final(outcar), expected)
+
+
+def test_read_outcar_final_without_ionic_step(tmp_path, train_atoms):
+    """没有完整离子步时抛出 ValueError"""
+    outcar = tmp_path / "OUTCAR"
+    _write_outcar(train_atoms, outcar, n_steps=1)
+    text = outcar.read_text()
+    outcar.write_text(text[: text.index("FREE ENERGIE")])
+
+    with pytest.raises(ValueError):
+        read_outcar_final(outcar)
+
+
+@pytest.mark.parametrize("parser, n_workers", [("fast", 1), ("ase", 1), ("fast", 2)])
+def test_harvest_vasp_results(tmp_path, parser, n_workers):
+    """按任务顺序返回结果，缺少输出文件的任务记录失败原因"""
+    job_dirs = []
+    for i in range(3):
+        job_dir = tmp_path / f"task_{i:04d}"
+        job_dir.mkdir()
+        job_dirs.append(job_dir)
+    for i in (0, 2):
+        _write_outcar(read(TRAIN_XYZ, index=i), job_dirs[i] / "OUTCAR")
+
+    records = harvest_vasp_results(job_dirs, parser=parser, n_workers=n_workers)
+
+    assert [r.task_dir for r in records] == job_dirs
+    assert [r.success for r in records] == [True, False, True]
+    assert records[0].source == "OUTCAR"
+    assert "OUTCAR不存在" in records[1].error
+    assert records[2].atoms.get_potential_energy() == pytest.approx(
+        read(TRAIN_XYZ, index=2).get_potential_energy()
+    )
+
+
+def test_harvest_rejects_unknown_parser(tmp_path):
+    with pytest.raises(ValueError):
+        harvest_vasp_results([tmp_path], parser="pymatgen")
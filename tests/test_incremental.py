@@ -0,0 +1,162 @@
+"""活跃集增量更新测试（增量路径的正确性与完整重建的触发条件）"""
+
+import numpy as np
+import pytest
+from ase.build import bulk
+
+from nep_auto.bench import MockNEPFactory
+from nep_auto.maxvol import (
+    compute_descriptor_projection,
+    read_active_set_state,
+    select_active_set,
+    update_active_set_incremental,
+)
+from nep_auto.parallel import set_calculator_factory
+
+GAMMA_TOL = 1.001
+
+
+@pytest.fixture(autouse=True)
+def mock_calculator():
+    """用模拟计算器代替 PyNEP"""
+    previous = set_calculator_factory(MockNEPFactory(8))
+    yield
+    set_calculator_factory(previous)
+
+
+def _structure(seed: int):
+    atoms = bulk("Cu", "fcc", a=3.6, cubic=True).repeat((2, 2, 2))
+    atoms.rattle(0.05, seed=seed)
+    return atoms
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """训练集、势函数文件和已保存状态的活跃集"""
+    nep_file = tmp_path / "nep.txt"
+    nep_file.write_text("nep4 1 Cu\n")
+    train = [_structure(seed) for seed in range(20)]
+    state_file = tmp_path / "active_set.npz"
+    select_active_set(
+        train,
+        nep_file,
+        asi_output_path=tmp_path / "active_set.asi",
+        gamma_tol=GAMMA_TOL,
+        state_output_path=state_file,
+    )
+    return train, nep_file, state_file
+
+
+def _update(trajectory, nep_file, state_file):
+    return update_active_set_incremental(
+        trajectory,
+        nep_file,
+        state_file,
+        asi_output_path=state_file.with_name("active_set.asi"),
+        gamma_tol=GAMMA_TOL,
+    )
+
+
+def _max_gamma(trajectory, nep_file, active_set) -> float:
+    """全部原子环境相对于活跃集的最大外推等级"""
+    projection = compute_descriptor_projection(trajectory, nep_file)
+    return max(
+        float(np.abs(B @ active_set.inverse_dict[elem]).max())
+        for elem, B in projection.projection_dict.items()
+    )
+
+
+def test_append_is_incremental(workspace):
+    """只追加新结构时增量更新，结果对整个训练集收敛并记录新的指纹"""
+    train, nep_file, state_file = workspace
+    trajectory = train + [_structure(100), _structure(101)]
+
+    active_set, rebuilt = _update(trajectory, nep_file, state_file)
+
+    assert not rebuilt
+    assert _max_gamma(trajectory, nep_file, active_set) <= GAMMA_TOL + 1e-6
+    state = read_active_set_state(state_file)
+    assert state.n_structures == len(trajectory)
+    assert len(state.structure_hashes) == len(trajectory)
+
+    # The updated state supports the next incremental round
+    _, rebuilt = _update(trajectory + [_structure(102)], nep_file, state_file)
+    assert not rebuilt
+
+
+def test_no_state_rebuilds(workspace):
+    train, nep_file, state_file = workspace
+    state_file.unlink()
+
+    _, rebuilt = _update(train, nep_file, state_file)
+
+    assert rebuilt
+    assert state_file.exists()
+
+
+@pytest.mark.parametrize(
+    "modify",
+    [
+        pytest.param(lambda t: t[5:] + [_structure(100)], id="pruned"),
+        pytest.param(lambda t: [t[1], t[0]] + t[2:], id="reordered"),
+        pytest.param(lambda t: t[:3] + [_structure(200)] + t[4:], id="rewritten"),
+        pytest.param(lambda t: t[:10], id="smaller"),
+    ],
+)
+def test_changed_training_set_rebuilds(workspace, modify, capsys):
+    """记录的前 n_structures 个结构被修剪、重排或改写时完整重建"""
+    train, nep_file, state_file = workspace
+    trajectory = modify(train)
+
+    active_set, rebuilt = _update(trajectory, nep_file, state_file)
+
+    assert rebuilt
+    assert "Full active set rebuild" in capsys.readouterr().out
+    assert _max_gamma(trajectory, nep_file, active_set) <= GAMMA_TOL + 1e-6
+    assert read_active_set_state(state_file).n_structures == len(trajectory)
+
+
+def _rewrite_state(state_file, **changes) -> None:
+    """修改状态文件中的数组（模拟旧版本或损坏的状态）"""
+    with np.load(state_file) as data:
+        arrays = dict(data)
+    for key, value in changes.items():
+        if value is None:
+            del arrays[key]
+        else:
+            arrays[key] = value
+    with open(state_file, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def test_state_without_fingerprints_rebuilds(workspace):
+    """旧版本状态文件没有结构指纹时完整重建"""
+    train, nep_file, state_file = workspace
+    _rewrite_state(state_file, structure_hashes=None)
+
+    _, rebuilt = _update(train + [_structure(100)], nep_file, state_file)
+
+    assert rebuilt
+    assert len(read_active_set_state(state_file).structure_hashes) == len(train) + 1
+
+
+def test_missing_active_set_row_rebuilds(workspace, capsys):
+    """状态中的活跃集行在投影中找不到时完整重建，而不是抛出 KeyError"""
+    train, nep_file, state_file = workspace
+    atom_index = read_active_set_state(state_file).atom_index_dict["Cu"]
+    _rewrite_state(state_file, **{"Cu.atom_index": atom_index + 1000})
+
+    _, rebuilt = _update(train + [_structure(100)], nep_file, state_file)
+
+    assert rebuilt
+    assert "rows of Cu not found" in capsys.readouterr().out
+
+
+def test_descriptor_dimension_change_rebuilds(workspace):
+    train, nep_file, state_file = workspace
+    set_calculator_factory(MockNEPFactory(10))
+
+    _, rebuilt = _update(train + [_structure(100)], nep_file, state_file)
+
+    assert rebuilt
+    assert read_active_set_state(state_file).active_set_dict["Cu"].shape == (10, 10)
@@ -0,0 +1,141 @@
+"""MaxVol 测试（收敛性、选中行的唯一性、矩形 MaxVol 与结构预算）"""
+
+import numpy as np
+import pytest
+
+from nep_auto.maxvol import (
+    DescriptorProjectionResult,
+    _maxvol_core,
+    _maxvol_core_blocked,
+    compute_maxvol,
+    generate_active_set,
+    rect_maxvol,
+)
+
+
+def _descriptors(n: int, d: int, seed: int = 0) -> np.ndarray:
+    """各列尺度不同的随机描述符矩阵"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, d)) * np.linspace(1.0, 5.0, d)
+
+
+def _max_gamma(A: np.ndarray, rows: np.ndarray) -> float:
+    """所有行相对于选中子矩阵的最大外推等级"""
+    return float(np.abs(A @ np.linalg.inv(A[rows])).max())
+
+
+@pytest.mark.parametrize("core", [_maxvol_core, _maxvol_core_blocked])
+def test_maxvol_core_converges(core):
+    """收敛后所有行的 |B| 不超过 gamma_tol，选中 D 个互不相同的行"""
+    A = _descriptors(500, 12)
+    rows = core(A, gamma_tol=1.001)
+
+    assert len(rows) == A.shape[1]
+    assert len(np.unique(rows)) == len(rows)
+    # The blocked variant iterates in float32
+    assert _max_gamma(A, rows) <= 1.001 + 1e-4
+
+
+def test_blocked_matches_classic_volume():
+    """分块实现与逐行交换实现得到的体积相近（都是局部最优）"""
+    A = _descriptors(800, 16, seed=1)
+    classic = _maxvol_core(A)
+    blocked = _maxvol_core_blocked(A, block_size=8)
+
+    _, logdet_classic = np.linalg.slogdet(A[classic])
+    _, logdet_blocked = np.linalg.slogdet(A[blocked])
+    assert logdet_blocked == pytest.approx(logdet_classic, abs=0.5)
+
+
+def test_maxvol_core_initial_indices():
+    """从给定初始行出发，已是最优时不做交换"""
+    A = _descriptors(300, 8, seed=2)
+    rows = _maxvol_core(A)
+    again = _maxvol_core(A, initial_indices=rows)
+    assert sorted(again) == sorted(rows)
+
+
+@pytest.mark.parametrize("method", ["classic", "blocked"])
+@pytest.mark.parametrize("batch_size", [None, 120])
+def test_compute_maxvol_unique_rows(method, batch_size):
+    """批处理与细化后仍返回 D 个互不相同的行，外推等级收敛"""
+    A = _descriptors(600, 10, seed=3)
+    struct_index = np.arange(len(A)) // 4
+
+    selected, selected_struct = compute_maxvol(
+        A, struct_index, batch_size=batch_size, method=method
+    )
+
+    assert selected.shape == (10, 10)
+    assert len(np.unique(selected, axis=0)) == 10
+    rows = [int(np.flatnonzero((A == row).all(axis=1))[0]) for row in selected]
+    np.testing.assert_array_equal(selected_struct, struct_index[rows])
+    assert _max_gamma(A, np.array(rows)) <= 1.001 + 1e-4
+
+
+@pytest.mark.parametrize("k", [5, 12, 30])
+def test_rect_maxvol_unique_rows(k):
+    """k 小于、等于、大于维度时都返回 k 个互不相同的行"""
+    A = _descriptors(200, 12, seed=4)
+    rows = rect_maxvol(A, k)
+
+    assert len(rows) == k
+    assert len(np.unique(rows)) == k
+    assert np.linalg.matrix_rank(A[rows]) == min(k, A.shape[1])
+
+
+def test_rect_maxvol_greedy_volume():
+    """k > 维度时每个追加行都使 det(A_J^T A_J) 的增长最大"""
+    A = _descriptors(80, 6, seed=5)
+    rows = rect_maxvol(A, 10)
+
+    for step in range(6, 10):
+        J = rows[:step]
+        gram_inv = np.linalg.inv(A[J].T @ A[J])
+        gains = 1 + np.einsum("ij,jk,ik->i", A, gram_inv, A)
+        gains[J] = -np.inf
+        assert rows[step] == gains.argmax()
+
+
+def test_rect_maxvol_all_rows():
+    """k 不小于行数时返回全部行"""
+    A = _descriptors(10, 4)
+    np.testing.assert_array_equal(rect_maxvol(A, 10), np.arange(10))
+
+
+def _projection(n_structures: int, atoms_per_structure: int, d: int):
+    """两种元素、每个结构原子数相同的合成描述符投影"""
+    projection_dict, structure_index_dict = {}, {}
+    for seed, elem in enumerate(("A", "B")):
+        projection_dict[elem] = _descriptors(
+            n_structures * atoms_per_structure, d, seed
+        )
+        structure_index_dict[elem] = np.repeat(
+            np.arange(n_structures), atoms_per_structure
+        )
+    return DescriptorProjectionResult(projection_dict, structure_index_dict)
+
+
+@pytest.mark.parametrize("budget", [20, 40])
+def test_structure_budget_met_exactly(budget):
+    """structure_budget 不超过结构总数时恰好选出 budget 个结构"""
+    projection = _projection(60, 4, 6)
+    square = generate_active_set(projection, write_asi=False)
+    assert len(square.structure_indices) < budget
+
+    result = generate_active_set(projection, write_asi=False, structure_budget=budget)
+
+    assert len(result.structure_indices) == budget
+    assert set(square.structure_indices) <= set(result.structure_indices)
+    # The inverse still comes from the square active set only
+    for elem, inverse in result.inverse_dict.items():
+        np.testing.assert_allclose(inverse, square.inverse_dict[elem])
+
+
+def test_structure_budget_warns_when_short(capsys):
+    """候选结构不足时返回全部结构并给出警告"""
+    projection = _projection(15, 4, 6)
+    result = generate_active_set(projection, write_asi=False, structure_budget=20)
+
+    assert result.structure_indices == list(range(15))
+    assert "未达到 structure_budget (20)" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+"""多任务并发测试（某个任务异常时的状态与日志）"""
+
+import asyncio
+from types import SimpleNamespace
+
+from nep_auto import orchestrator
+
+
+def _config(tmp_path, name: str):
+    work_dir = tmp_path / name
+    work_dir.mkdir()
+    return SimpleNamespace(
+        global_config=SimpleNamespace(work_dir=str(work_dir), log_file=work_dir / "log")
+    )
+
+
+def test_campaign_exception_is_logged(tmp_path, monkeypatch):
+    """异常不影响其他任务，记录到该任务的日志文件并计为失败"""
+    configs = {name: _config(tmp_path, name) for name in ("ok", "broken")}
+
+    async def run_campaign(config, logger, start_iter):
+        if config is configs["broken"]:
+            raise RuntimeError("gpumd exploded")
+        await asyncio.sleep(0)
+        return True
+
+    monkeypatch.setattr(orchestrator, "load_config", configs.__getitem__)
+    monkeypatch.setattr(orchestrator, "run_campaign", run_campaign)
+
+    assert asyncio.run(orchestrator.run_campaigns(["ok", "broken"])) == [True, False]
+
+    log = (tmp_path / "broken/log").read_text()
+    assert "RuntimeError: gpumd exploded" in log
+    assert "Traceback" in log
+    assert "gpumd exploded" not in (tmp_path / "ok/log").read_text()
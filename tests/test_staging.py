@@ -0,0 +1,130 @@
+"""作业输入暂存测试（放置方式、硬链接失败时的复制回退、原子替换）"""
+
+import errno
+import os
+
+import pytest
+
+from nep_auto import staging
+from nep_auto.staging import Stager, stage_file
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "INCAR"
+    path.write_text("ENCUT = 520\n")
+    return path
+
+
+@pytest.fixture
+def no_hardlinks(monkeypatch):
+    """模拟跨文件系统，os.link 总是失败"""
+
+    def link(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(staging.os, "link", link)
+
+
+def _leftovers(directory):
+    return [p.name for p in directory.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_copy(tmp_path, src):
+    dst = tmp_path / "task/INCAR"
+    dst.parent.mkdir()
+
+    assert stage_file(src, dst, "copy") == "copy"
+    assert dst.read_text() == src.read_text()
+    assert not os.path.samefile(src, dst)
+
+
+def test_hardlink(tmp_path, src):
+    dst = tmp_path / "task/INCAR"
+    dst.parent.mkdir()
+
+    assert stage_file(src, dst, "hardlink") == "hardlink"
+    assert os.path.samefile(src, dst)
+
+
+def test_hardlink_falls_back_to_copy(tmp_path, src, no_hardlinks):
+    """os.link 失败时复制，返回实际使用的方式且不留临时文件"""
+    dst = tmp_path / "task/INCAR"
+    dst.parent.mkdir()
+
+    assert stage_file(src, dst, "hardlink") == "copy"
+    assert dst.read_text() == src.read_text()
+    assert not os.path.samefile(src, dst)
+    assert _leftovers(dst.parent) == []
+
+
+def test_symlink(tmp_path, src):
+    dst = tmp_path / "task/INCAR"
+    dst.parent.mkdir()
+
+    assert stage_file(src, dst, "symlink") == "symlink"
+    assert dst.is_symlink()
+    assert os.readlink(dst) == str(src.resolve())
+
+
+def test_replace_does_not_modify_shared_inode(tmp_path, src):
+    """覆盖硬链接目标时替换目录项，其他共享该 inode 的目录不受影响"""
+    task_a, task_b = tmp_path / "a", tmp_path / "b"
+    task_a.mkdir()
+    task_b.mkdir()
+    stage_file(src, task_a / "INCAR", "hardlink")
+    stage_file(src, task_b / "INCAR", "hardlink")
+
+    new_src = tmp_path / "INCAR.new"
+    new_src.write_text("ENCUT = 600\n")
+    stage_file(new_src, task_a / "INCAR", "copy")
+
+    assert (task_a / "INCAR").read_text() == "ENCUT = 600\n"
+    assert (task_b / "INCAR").read_text() == src.read_text()
+    assert src.read_text() == "ENCUT = 520\n"
+
+
+def test_failure_removes_temporary_file(tmp_path):
+    dst = tmp_path / "task/INCAR"
+    dst.parent.mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        stage_file(tmp_path / "missing", dst, "copy")
+    assert _leftovers(dst.parent) == []
+
+
+def test_unknown_mode(tmp_path, src):
+    with pytest.raises(ValueError):
+        stage_file(src, tmp_path / "dst", "reflink")
+    with pytest.raises(ValueError):
+        Stager("reflink")
+
+
+@pytest.mark.parametrize("n_workers", [1, 4])
+def test_stager_counts_fallback(tmp_path, src, no_hardlinks, n_workers):
+    """统计按实际使用的方式计数，每次 run 重新计数"""
+    stager = Stager("hardlink", n_workers=n_workers)
+
+    def prepare(i):
+        task_dir = tmp_path / f"task_{i:04d}"
+        task_dir.mkdir(exist_ok=True)
+        stager.stage(src, task_dir / "INCAR")
+        stager.stage(src, task_dir / "KPOINTS", mode="symlink")
+
+    stager.run(prepare, range(8))
+    assert stager.counts == {"copy": 8, "hardlink": 0, "symlink": 8}
+
+    stager.run(prepare, range(2))
+    assert stager.counts == {"copy": 2, "hardlink": 0, "symlink": 2}
+    assert "暂存 4 个共享文件" in stager.summary()
+
+
+def test_stager_run_reraises(tmp_path):
+    stager = Stager(n_workers=4)
+
+    def fail(i):
+        if i == 3:
+            raise RuntimeError("task 3")
+
+    with pytest.raises(RuntimeError, match="task 3"):
+        stager.run(fail, range(8))
@@ -0,0 +1,112 @@
+"""追加式训练集存储测试（分片追加、截断与拼接）"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from ase.io import read
+
+from nep_auto.train_store import MANIFEST_NAME, TrainStore
+
+TRAIN_XYZ = Path(__file__).resolve().parents[1] / "test_nep_auto/input/train.xyz"
+
+
+@pytest.fixture(scope="module")
+def train_set():
+    return read(TRAIN_XYZ, index=":")
+
+
+@pytest.fixture
+def store(tmp_path, train_set):
+    """iter_0 为导入的初始训练集，iter_1、iter_2 各追加若干结构"""
+    store = TrainStore(tmp_path / "train_store")
+    store.import_file(0, TRAIN_XYZ)
+    store.write_shard(1, train_set[:3])
+    store.write_shard(2, train_set[3:5])
+    return store
+
+
+def _energies(structures) -> list[float]:
+    return [atoms.get_potential_energy() for atoms in structures]
+
+
+def test_import_file(tmp_path, train_set):
+    """导入时只统计帧数，分片与源文件逐字节相同"""
+    store = TrainStore(tmp_path / "train_store")
+    assert store.is_empty()
+
+    assert store.import_file(0, TRAIN_XYZ) == len(train_set)
+    assert store.shard_files() == [tmp_path / "train_store/iter_0.xyz"]
+    assert store.shard_files()[0].read_bytes() == TRAIN_XYZ.read_bytes()
+
+
+def test_append(store, train_set):
+    """按迭代编号累计结构数，读取顺序为分片顺序"""
+    n = len(train_set)
+    assert store.count(upto=0) == n
+    assert store.count(upto=1) == n + 3
+    assert store.count() == n + 5
+
+    expected = train_set + train_set[:3] + train_set[3:5]
+    structures = store.read()
+    assert _energies(structures) == pytest.approx(_energies(expected))
+    assert _energies(store.iter_structures(upto=1)) == pytest.approx(
+        _energies(expected[: n + 3])
+    )
+    np.testing.assert_allclose(structures[-1].get_forces(), train_set[4].get_forces())
+
+    # The manifest is the only state; a new instance sees the same shards
+    assert TrainStore(store.root).count() == n + 5
+
+
+def test_rewrite_truncates_later_shards(store, train_set):
+    """重写某一轮的分片时删除编号更大的旧分片"""
+    store.write_shard(1, train_set[5:6])
+
+    assert [p.name for p in store.shard_files()] == ["iter_0.xyz", "iter_1.xyz"]
+    assert not (store.root / "iter_2.xyz").exists()
+    assert store.count() == len(train_set) + 1
+    assert store.read()[-1].get_potential_energy() == pytest.approx(
+        train_set[5].get_potential_energy()
+    )
+    assert sorted(p.name for p in store.root.iterdir()) == [
+        "iter_0.xyz",
+        "iter_1.xyz",
+        MANIFEST_NAME,
+    ]
+
+
+def test_materialize(store, tmp_path, train_set):
+    """拼接结果可被 ASE 读取，与逐个读取分片的结果一致"""
+    output = tmp_path / "train.xyz"
+    assert store.materialize(output, upto=1) == len(train_set) + 3
+
+    assert _energies(read(output, index=":")) == pytest.approx(
+        _energies(store.read(upto=1))
+    )
+    assert output.read_bytes().startswith(TRAIN_XYZ.read_bytes())
+
+
+def test_materialize_without_trailing_newline(tmp_path, train_set):
+    """分片末尾没有换行时，下一分片的帧仍从新行开始"""
+    source = tmp_path / "no_newline.xyz"
+    source.write_bytes(TRAIN_XYZ.read_bytes().rstrip(b"\n"))
+    store = TrainStore(tmp_path / "train_store")
+    store.import_file(0, source)
+    store.write_shard(1, train_set[:1])
+
+    output = tmp_path / "train.xyz"
+    store.materialize(output)
+    assert len(read(output, index=":")) == len(train_set) + 1
+
+
+def test_import_into_non_empty_store(store, train_set):
+    """已有分片时拒绝导入，之后标注的分片保持不变"""
+    before = store.shard_files()
+
+    with pytest.raises(ValueError):
+        store.import_file(0, TRAIN_XYZ)
+
+    assert store.shard_files() == before
+    assert all(path.exists() for path in before)
+    assert store.count() == len(train_set) + 5